@@ -0,0 +1,39 @@
+import copy
+
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from config.cache import LocalCache
+
+
+# Users recently loaded for tokens, keyed by (user id, auth version)
+user_cache = LocalCache(maxsize=10000, timeout=60)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    Authenticates JWTs without loading the user on every request.
+
+    Tokens carry the user's auth version, so users are cached briefly in-process
+    by id and version. Bumping a user's auth version revokes their tokens.
+    Tokens issued without an auth version are authenticated as usual.
+    Each request gets its own copy of a cached user, so changes to it aren't shared.
+    """
+
+    def get_user(self, validated_token):
+        auth_version = validated_token.get('auth_version')
+        if auth_version is None:
+            return super().get_user(validated_token)
+
+        key = (validated_token.get(api_settings.USER_ID_CLAIM), auth_version)
+        user = user_cache.get(key)
+        if user is not None:
+            return copy.copy(user)
+        
+        user = super().get_user(validated_token)
+        if user.auth_version != auth_version:
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+        user_cache.set(key, copy.copy(user))
+        return user
@@ -2,8 +2,8 @@ import string
 from datetime import timedelta
 from django.db import models
 from django.utils import timezone
-from django.contrib.auth.hashers import make_password, check_password
-from django.utils.crypto import get_random_string
+from django.contrib.auth.hashers import check_password
+from django.utils.crypto import get_random_string, salted_hmac, constant_time_compare
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 
 
@@ -32,13 +32,56 @@ class User(AbstractUser):
     email_verified = models.BooleanField(default=False)
     phone = models.CharField(max_length=15, blank=True, null=True)
     phone_verified = models.BooleanField(default=False)
+    auth_version = models.PositiveIntegerField(default=0, editable=False)
     username = None
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
     objects = UserManager()
 
+    # Tokens carry or depend on these fields, so changing any of them revokes the user's tokens.
+    # Other processes may still accept revoked tokens for up to 60 seconds, until their cached user expires.
+    TOKEN_FIELDS = ['is_active', 'is_staff', 'email_verified']
+
     def __str__(self) -> str:
         return self.email
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        user._token_state = user.get_token_state()
+        return user
+
+    def get_token_state(self) -> dict:
+        # Deferred fields are left out rather than loaded
+        return {field: self.__dict__[field] for field in self.TOKEN_FIELDS if field in self.__dict__}
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, '_token_state', {})
+        update_fields = kwargs.get('update_fields')
+        changed = [
+            field for field, value in self.get_token_state().items()
+            if field in loaded and loaded[field] != value and (update_fields is None or field in update_fields)
+        ]
+        if changed:
+            self.auth_version += 1
+            if update_fields is not None:
+                kwargs['update_fields'] = [*update_fields, 'auth_version']
+        super().save(*args, **kwargs)
+        self._token_state = {**loaded, **self.get_token_state()}
+        if changed:
+            self.forget_cached(self.auth_version - 1)
+
+    def revoke_tokens(self) -> None:
+        """Invalidate all tokens issued to this user."""
+        User.objects.filter(pk=self.pk).update(auth_version=models.F('auth_version') + 1)
+        self.refresh_from_db(fields=['auth_version'])
+        self.forget_cached(self.auth_version - 1)
+
+    def forget_cached(self, auth_version: int) -> None:
+        """Remove this user from this process's cache of users loaded for tokens. Other processes expire it shortly."""
+        # Imported here to keep the authentication classes out of model loading
+        from accounts.authentication import user_cache
+        user_cache.delete((self.pk, auth_version))
     
 
 class EmailVerificationCode(models.Model):
@@ -65,12 +108,36 @@ class EmailVerificationCode(models.Model):
             defaults={
                 'attempts': 0,
                 'expires_at': expires_at,
-                'code': make_password(code), 
+                'code': cls.hash_code(code), 
             }
         )
         return obj, code
     
 
+    @staticmethod
+    def hash_code(code: str, salt: str | None = None) -> str:
+        """
+        Hash a code with an HMAC keyed by the SECRET_KEY.
+
+        Codes are short-lived and limited to a few attempts, so a slow password hash
+        only adds latency. The secret key prevents offline guessing of leaked hashes.
+        """
+        if salt is None:
+            salt = get_random_string(length=12)
+        digest = salted_hmac(f"email-verification-code:{salt}", code, algorithm="sha256").hexdigest()
+        return f"hmac${salt}${digest}"
+    
+
+    def check_code(self, code: str) -> bool:
+        """Check the provided code against the stored hash."""
+        algorithm, _, rest = self.code.partition("$")
+        if algorithm != "hmac":
+            # Codes generated before HMAC hashing use the password hashers
+            return check_password(code, self.code)
+        salt, _, _ = rest.partition("$")
+        return constant_time_compare(self.hash_code(code, salt), self.code)
+    
+
     def verify(self, code: str) -> bool:
         """Verify the provided code against the stored hash."""
         # Check if the code is expired or too many attempts have been made
@@ -81,6 +148,6 @@ class EmailVerificationCode(models.Model):
         
         # Update the number of attempts
         self.attempts += 1
-        self.save()
+        self.save(update_fields=['attempts'])
 
-        return check_password(code, self.code)        
+        return self.check_code(code)        
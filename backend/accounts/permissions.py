@@ -4,4 +4,7 @@ from rest_framework.permissions import BasePermission
 class EmailVerifiedPermission(BasePermission):
     message = "Your email must be verified to perform this action."
     def has_permission(self, request, view):
+        # Tokens carry the verification state where available
+        if request.auth is not None and 'email_verified' in request.auth:
+            return request.auth['email_verified']
         return request.user.email_verified
\ No newline at end of file
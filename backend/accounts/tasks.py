@@ -0,0 +1,36 @@
+from celery import shared_task
+from django.conf import settings
+from django.core.mail import send_mail
+from django.template.loader import render_to_string
+from django.utils.html import strip_tags
+
+from .models import EmailVerificationCode
+
+
+@shared_task(autoretry_for=(Exception,), retry_backoff=True, max_retries=3, ignore_result=True)
+def send_verification_code_task(email_verification_code_id: int):
+    # The code is generated here, so that it is never in the broker (or the result backend) in plain text
+    try:
+        email_verification_code = EmailVerificationCode.objects.select_related('user').get(id=email_verification_code_id)
+    except EmailVerificationCode.DoesNotExist:
+        # The code was already used
+        return
+    _, code = EmailVerificationCode.generate(email_verification_code.user)
+    send_verification_code(email_verification_code.user.email, code)
+
+
+def send_verification_code(email: str, code: str) -> None:
+    """Send a sign-in verification code to the given email address."""
+    subject = render_to_string('accounts/verification_code_subject.txt')
+    html_message = render_to_string('accounts/verification_code_body.html', {
+        'code': code
+    })
+    plain_message = strip_tags(html_message)
+    send_mail(
+        subject=subject,
+        message=plain_message,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient_list=[email],
+        html_message=html_message,
+        fail_silently=False,
+    )
@@ -1,20 +1,36 @@
+import hashlib
+from unittest.mock import patch
+
+from redis import Redis
+from redis.exceptions import NoScriptError
+
 from django.urls import reverse
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from rest_framework.test import APITestCase
+from django.test import override_settings
+from rest_framework.request import Request
+from rest_framework.test import APITestCase, APIRequestFactory
 from rest_framework import status
 
 from accounts.models import EmailVerificationCode
+from accounts.authentication import CachedJWTAuthentication
 from accounts.views import RequestSignInCode
+from accounts.tasks import send_verification_code_task
+from accounts.tokens import UserRefreshToken
+from accounts import throttles
+from accounts.throttles import RequestEmailVerificationHourlyThrottle, SLIDING_WINDOW_SCRIPT, get_sliding_window_wait
+from config.testing import TokenTestMixin
 
 
 User = get_user_model()
 
 
-class TestSignIn(APITestCase):
+class TestSignIn(TokenTestMixin, APITestCase):
 
 
     def setUp(self):
+        super().setUp()
         self._request_email_verification_throttle_classes = RequestSignInCode.throttle_classes
         RequestSignInCode.throttle_classes = []
 
@@ -55,6 +71,48 @@ class TestSignIn(APITestCase):
         self.assertFalse(user2.email_verified)
 
 
+    @patch("accounts.views.send_verification_code_task.delay")
+    def test_request_signin_code_sends_email_on_commit(self, mock_delay):
+
+        url = reverse('accounts:request-signin-code')
+
+        data = {"email": "user1@example.com"}
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        email_verification_code = EmailVerificationCode.objects.get(user__email="user1@example.com")
+        mock_delay.assert_called_once_with(email_verification_code.id)
+
+        # The emailed code is generated by the task, and matches the stored hash
+        with patch("accounts.tasks.send_verification_code") as send_verification_code:
+            send_verification_code_task(email_verification_code.id)
+        email, code = send_verification_code.call_args.args
+        self.assertEqual(email, "user1@example.com")
+        email_verification_code.refresh_from_db()
+        self.assertTrue(email_verification_code.code.startswith("hmac$"))
+        self.assertNotIn(code, email_verification_code.code)
+        self.assertTrue(email_verification_code.verify(code))
+
+        # Codes which were already used are not sent
+        email_verification_code_id = email_verification_code.id
+        email_verification_code.delete()
+        with patch("accounts.tasks.send_verification_code") as send_verification_code:
+            send_verification_code_task(email_verification_code_id)
+        send_verification_code.assert_not_called()
+
+
+    def test_verify_legacy_code(self):
+
+        user1 = User.objects.create(email="user1@example.com")
+        email_verification_code, _ = EmailVerificationCode.generate(user1)
+
+        # Codes hashed with the password hashers are still accepted
+        email_verification_code.code = make_password("123456")
+        email_verification_code.save()
+        self.assertFalse(email_verification_code.verify("654321"))
+        self.assertTrue(email_verification_code.verify("123456"))
+
+
     def test_verify_signin_code(self):
 
         # Create a user and request a sign-in code
@@ -103,4 +161,191 @@ class TestSignIn(APITestCase):
 
 
     def tearDown(self) -> None:
-        RequestSignInCode.throttle_classes = self._request_email_verification_throttle_classes
\ No newline at end of file
+        RequestSignInCode.throttle_classes = self._request_email_verification_throttle_classes
+
+class FakeRedis(Redis):
+    """Runs the sliding window script in Python against an in-memory store, like a Redis server would."""
+
+    def __init__(self):
+        super().__init__()
+        self.store = {}
+        self.scripts = set()
+        self.script_loads = 0
+
+    def script_load(self, script):
+        self.script_loads += 1
+        self.scripts.add(hashlib.sha1(script.encode()).hexdigest())
+        return hashlib.sha1(script.encode()).hexdigest()
+
+    def evalsha(self, sha, numkeys, *keys_and_args):
+        if sha not in self.scripts:
+            raise NoScriptError("NOSCRIPT No matching script")
+        (previous_key, current_key), (limit, duration, elapsed) = keys_and_args[:numkeys], keys_and_args[numkeys:]
+        previous = self.store.get(previous_key, 0)
+        current = self.store.get(current_key, 0)
+        if previous * (duration - elapsed) / duration + current >= limit:
+            return [0, previous, current]
+        self.store[current_key] = current + 1
+        return [1, previous, current + 1]
+
+
+@override_settings(CACHES={
+    "default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://localhost:6379"},
+})
+class TestRedisSlidingWindowThrottle(APITestCase):
+
+    def setUp(self) -> None:
+        self.redis = FakeRedis()
+        patcher = patch("accounts.throttles.get_redis_client", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch("accounts.throttles._sliding_window_script", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+    def test_redis_throttle(self):
+
+        request = Request(APIRequestFactory().post(reverse('accounts:request-signin-code')))
+        throttle = RequestEmailVerificationHourlyThrottle()
+        throttle.timer = lambda: 3600 * 100 + 900
+
+        allowed = [throttle.allow_request(request, None) for _ in range(11)]
+        self.assertEqual(allowed, [True] * 10 + [False])
+        self.assertEqual(throttle.wait(), get_sliding_window_wait(10, 3600, 900, 0, 10))
+
+        # Requests from the previous window slide out over the current window
+        throttle = RequestEmailVerificationHourlyThrottle()
+        throttle.timer = lambda: 3600 * 101 + 1800
+        self.assertEqual([throttle.allow_request(request, None) for _ in range(6)], [True] * 5 + [False])
+        self.assertEqual(throttle.wait(), get_sliding_window_wait(10, 3600, 1800, 10, 5))
+
+        # The script is loaded into the server once, and its hash reused
+        self.assertEqual(self.redis.script_loads, 1)
+        self.assertEqual(throttles._sliding_window_script.script, SLIDING_WINDOW_SCRIPT)
+
+
+class TestSlidingWindowThrottle(APITestCase):
+
+
+    def test_sliding_window_wait(self):
+
+        # Over the limit in the current window
+        self.assertEqual(get_sliding_window_wait(10, 60, 20, 0, 10), 40)
+        # Previous requests still count towards the limit
+        self.assertEqual(get_sliding_window_wait(10, 60, 30, 10, 5), 0)
+        self.assertEqual(get_sliding_window_wait(10, 60, 15, 10, 5), 15)
+        self.assertEqual(get_sliding_window_wait(10, 60, 0, 20, 0), 30)
+
+
+    def test_fallback_throttle(self):
+
+        # Caches other than Redis fall back to DRF's throttling
+        throttle = RequestEmailVerificationHourlyThrottle()
+        throttle.cache.clear()
+        request = Request(APIRequestFactory().post(reverse('accounts:request-signin-code')))
+        allowed = [throttle.allow_request(request, None) for _ in range(11)]
+        self.assertEqual(allowed, [True] * 10 + [False])
+        self.assertGreater(throttle.wait(), 0)
+
+
+class TestCachedJWTAuthentication(TokenTestMixin, APITestCase):
+
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(email="user1@example.com", email_verified=True)
+
+
+    def test_cached_user(self):
+
+        access = UserRefreshToken.for_user(self.user).access_token
+        self.assertTrue(access['email_verified'])
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+        # The user is only loaded for the first request
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('accounts:me'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('accounts:me'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['email'], self.user.email)
+
+
+    def test_cached_user_copies(self):
+
+        access = UserRefreshToken.for_user(self.user).access_token
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f"Bearer {access}")
+        authentication = CachedJWTAuthentication()
+
+        # Changes made to a user during one request are not seen by the next
+        user, _ = authentication.authenticate(request)
+        user.email = "changed@example.com"
+        user, _ = authentication.authenticate(request)
+        self.assertEqual(user.email, self.user.email)
+        user.email = "changed@example.com"
+        user, _ = authentication.authenticate(request)
+        self.assertEqual(user.email, self.user.email)
+
+
+    def test_revoked_tokens(self):
+
+        access = UserRefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        self.user.revoke_tokens()
+        response = self.client.get(reverse('accounts:me'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # New tokens carry the new version
+        access = UserRefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        response = self.client.get(reverse('accounts:me'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+    def test_deactivation_revokes_tokens(self):
+
+        access = UserRefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        response = self.client.get(reverse('accounts:me'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        user = User.objects.get(pk=self.user.pk)
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        response = self.client.get(reverse('accounts:me'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+    def test_unrelated_changes_keep_tokens(self):
+
+        access = UserRefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        user = User.objects.get(pk=self.user.pk)
+        user.phone = "+15555550100"
+        user.is_staff = True
+        # Only the saved fields are compared
+        user.save(update_fields=['phone'])
+        response = self.client.get(reverse('accounts:me'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+    def test_admin_changes_revoke_tokens(self):
+
+        admin = User.objects.create_superuser("admin@example.com", "password")
+        access = UserRefreshToken.for_user(self.user).access_token
+        self.client.force_login(admin)
+        response = self.client.post(reverse('admin:accounts_user_change', args=[self.user.pk]), {
+            'email': self.user.email,
+            'email_verified': False,
+            'phone_verified': False,
+            'last_login_0': '', 'last_login_1': '',
+            'date_joined_0': '2024-01-01', 'date_joined_1': '00:00:00',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.client.logout()
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        response = self.client.get(reverse('accounts:me'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
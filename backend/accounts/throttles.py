@@ -1,9 +1,119 @@
-from rest_framework.throttling import AnonRateThrottle
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches, cache as default_cache
+from django.core.cache.backends.redis import RedisCache
+from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
 
 
-class RequestEmailVerificationHourlyThrottle(AnonRateThrottle):
+# Atomically check a sliding window (approximated by weighting the previous fixed window)
+# and count the request if it is allowed. Returns {allowed, previous count, current count}.
+SLIDING_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local duration = tonumber(ARGV[2])
+local elapsed = tonumber(ARGV[3])
+local previous = tonumber(redis.call('GET', KEYS[1]) or '0')
+local current = tonumber(redis.call('GET', KEYS[2]) or '0')
+if previous * (duration - elapsed) / duration + current >= limit then
+    return {0, previous, current}
+end
+current = redis.call('INCR', KEYS[2])
+if current == 1 then
+    redis.call('EXPIRE', KEYS[2], duration * 2)
+end
+return {1, previous, current}
+"""
+
+
+# The script is registered with the first client it is run with, and its hash reused for every client after
+_sliding_window_script = None
+
+
+def get_redis_client(cache: RedisCache):
+    """Return a client for the Redis server behind a cache."""
+    # Django's Redis backend does not expose its clients, which share a connection pool per cache
+    return cache._cache.get_client(write=True)
+
+
+def run_sliding_window_script(client, keys: list[str], args: list) -> list:
+    """Run the sliding window script, loading it into the server only if it is not there yet."""
+    global _sliding_window_script
+    if _sliding_window_script is None:
+        _sliding_window_script = client.register_script(SLIDING_WINDOW_SCRIPT)
+    return _sliding_window_script(keys=keys, args=args, client=client)
+
+
+def get_sliding_window_wait(limit: int, duration: int, elapsed: float, previous: int, current: int) -> float:
+    """Return the number of seconds until a throttled client may make another request."""
+    remaining = duration - elapsed
+    if current >= limit:
+        # Wait for the next window, then for the current requests to start sliding out
+        return remaining + duration * (current - limit) / current
+    if previous == 0:
+        return remaining
+    # Wait for enough of the previous window's requests to slide out
+    return max(0, remaining - (limit - current) * duration / previous)
+
+
+class SlidingWindowRateThrottleMixin:
+    """
+    Counts requests in a sliding window with a single atomic Redis script.
+
+    DRF's throttles read and rewrite a history of timestamps for each client,
+    which is racy under concurrency. Falls back to DRF's behaviour when the
+    cache is not Redis (e.g. in development and tests).
+    """
+
+    wait_seconds = None
+
+    def get_redis_cache(self) -> RedisCache | None:
+        # The default cache is a proxy, so look up the backend behind it
+        cache = caches[DEFAULT_CACHE_ALIAS] if self.cache is default_cache else self.cache
+        return cache if isinstance(cache, RedisCache) else None
+
+    def allow_request(self, request, view):
+        cache = self.get_redis_cache()
+        if self.rate is None or cache is None:
+            return super().allow_request(request, view)
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer()
+        window = int(now // self.duration)
+        elapsed = now - window * self.duration
+        keys = [
+            cache.make_and_validate_key(f"{self.key}_{self.duration}_{window - 1}"),
+            cache.make_and_validate_key(f"{self.key}_{self.duration}_{window}"),
+        ]
+
+        allowed, previous, current = run_sliding_window_script(
+            get_redis_client(cache), keys, [self.num_requests, self.duration, elapsed]
+        )
+
+        if allowed:
+            self.wait_seconds = None
+            return True
+        self.wait_seconds = get_sliding_window_wait(
+            self.num_requests, self.duration, elapsed, int(previous), int(current)
+        )
+        return False
+
+    def wait(self):
+        if self.get_redis_cache() is None:
+            return super().wait()
+        return self.wait_seconds
+
+
+class SlidingWindowAnonRateThrottle(SlidingWindowRateThrottleMixin, AnonRateThrottle):
+    pass
+
+
+class SlidingWindowUserRateThrottle(SlidingWindowRateThrottleMixin, UserRateThrottle):
+    pass
+
+
+class RequestEmailVerificationHourlyThrottle(SlidingWindowAnonRateThrottle):
     rate = '10/hour'
 
 
-class RequestEmailVerificationDailyThrottle(AnonRateThrottle):
-    rate = '30/day'
\ No newline at end of file
+class RequestEmailVerificationDailyThrottle(SlidingWindowAnonRateThrottle):
+    rate = '30/day'
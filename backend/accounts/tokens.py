@@ -0,0 +1,12 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class UserRefreshToken(RefreshToken):
+    """A refresh token that also carries the user's verification state and auth version."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['email_verified'] = user.email_verified
+        token['auth_version'] = user.auth_version
+        return token
@@ -1,18 +1,16 @@
-from django.conf import settings
-from django.core.mail import send_mail
+from django.db import transaction
 from django.contrib.auth import get_user_model
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
 from rest_framework import generics
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
-from rest_framework_simplejwt.tokens import RefreshToken
 
 from .serializers import UserSerializer, RequestSignInCodeSerializer, VerifySignInCodeSerializer
 from .throttles import RequestEmailVerificationHourlyThrottle, RequestEmailVerificationDailyThrottle
 from .models import EmailVerificationCode
+from .tasks import send_verification_code_task
+from .tokens import UserRefreshToken
 
 
 User = get_user_model()
@@ -29,24 +27,12 @@ class RequestSignInCode(APIView):
         serializer.is_valid(raise_exception=True)
         email = serializer.validated_data['email']
 
-        # Create the user if it doesn't exist
+        # Create the user if it doesn't exist, and replace any earlier code
         user, _ = User.objects.get_or_create(email=email)
-        _, code = EmailVerificationCode.generate(user)
-
-        # Send the verification code to the user's email
-        subject = render_to_string('accounts/verification_code_subject.txt')
-        html_message = render_to_string('accounts/verification_code_body.html', {
-            'code': code
-        })
-        plain_message = strip_tags(html_message)
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[email],
-            html_message=html_message,
-            fail_silently=False,
-        )
+        email_verification_code, _ = EmailVerificationCode.generate(user)
+
+        # Generate and send the code that is emailed to the user in the background
+        transaction.on_commit(lambda: send_verification_code_task.delay(email_verification_code.id))
 
         return Response({
             'detail': 'Email verification code sent.'
@@ -87,7 +73,7 @@ class VerifySignInCode(APIView):
         email_verification_code.delete()
 
         # Provide a set of tokens to the user
-        refresh = RefreshToken.for_user(user)
+        refresh = UserRefreshToken.for_user(user)
         access = refresh.access_token
 
         return Response({
@@ -102,4 +88,5 @@ class Me(generics.RetrieveUpdateAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
-        return self.request.user
\ No newline at end of file
+        # The authenticated user may be cached, so load the current data
+        return User.objects.get(pk=self.request.user.pk)
\ No newline at end of file
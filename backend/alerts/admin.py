@@ -1,7 +1,14 @@
 from django.contrib import admin
-from .models import Subscription
+from .models import Subscription, OutboxMessage
 
 
 @admin.register(Subscription)
 class SubscriptionAdmin(admin.ModelAdmin):
-    raw_id_fields = ['user', 'section']
\ No newline at end of file
+    raw_id_fields = ['user', 'section']
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    raw_id_fields = ['user']
+    list_display = ['user', 'channel', 'state', 'attempts', 'next_attempt_at']
+    list_filter = ['channel', 'state']
\ No newline at end of file
@@ -0,0 +1,215 @@
+import io
+import os
+import sys
+import json
+import time
+import random
+import resource
+import threading
+import functools
+from contextlib import contextmanager
+from typing import Callable
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Max
+from django.test import override_settings
+
+from .models import Subscription
+from .outbox import deliver_outbox
+from .sms import SMSSender, SMS_MESSAGES_PER_SECOND
+from .tasks import send_alerts_task
+from accounts.models import User
+from courses.fakeserver import FakeMyCampusServer
+from courses.synthetic import SyntheticTerm
+from courses.models import Term, Section, Meeting, LinkedSection
+from courses.tasks import warm_cache
+
+
+BENCHMARK_TERM = "999902"
+
+# Stages of the pipeline, in the order they run
+STAGES = ["ingestion", "warming", "alerts", "delivery"]
+
+# The fields of a stage's results, with the units they are printed in
+METRICS = ["rows", "seconds", "rows_per_second", "queries", "http_calls", "peak_rss_mb"]
+
+
+class FakeSMS:
+    """Stands in for Twilio, counting messages sent and taking about `latency` seconds for each."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def send(self, to: str, body: str) -> str:
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.count += 1
+            return f"SM{self.count:032}"
+
+
+class QueryCounter:
+    """Counts the queries run on a connection, for use with `connection.execute_wrapper`."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def get_peak_rss() -> float:
+    """Return the peak resident set size of this process in megabytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes and macOS reports bytes
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+@contextmanager
+def measure(results: dict, stage: str, count_http_calls: Callable[[], int]):
+    """Record the time, queries and HTTP calls of a stage in `results[stage]`."""
+    counter = QueryCounter()
+    http_calls = count_http_calls()
+    start = time.perf_counter()
+    result = {}
+    with connection.execute_wrapper(counter):
+        yield result
+    result["seconds"] = time.perf_counter() - start
+    result["queries"] = counter.count
+    result["http_calls"] = count_http_calls() - http_calls
+    result["peak_rss_mb"] = get_peak_rss()
+    results[stage] = result
+
+
+def create_subscriptions(term: str, users: int, subscriptions: int, phone_fraction: float, seed: int) -> None:
+    """Create users subscribed to random sections of a term."""
+
+    rng = random.Random(seed)
+    User.objects.bulk_create([
+        User(
+            email=f"benchmark{i}@example.com",
+            password="!",
+            email_verified=True,
+            phone=f"+1555{i:07}" if rng.random() < phone_fraction else None,
+        )
+        for i in range(users)
+    ], batch_size=1000)
+
+    user_ids = list(User.objects.filter(email__startswith="benchmark").values_list("id", flat=True))
+    section_ids = list(Section.objects.filter(term_id=term).values_list("id", flat=True))
+    if subscriptions > len(user_ids) * len(section_ids):
+        raise ValueError(f"Cannot create {subscriptions} subscriptions for {users} users and {len(section_ids)} sections")
+
+    pairs = set()
+    while len(pairs) < subscriptions:
+        pairs.add((rng.choice(user_ids), rng.choice(section_ids)))
+    Subscription.objects.bulk_create([
+        Subscription(user_id=user_id, section_id=section_id) for user_id, section_id in pairs
+    ], batch_size=1000)
+
+
+def run_pipeline_benchmark(courses: int = 500, users: int = 1000, subscriptions: int = 5000, phone_fraction: float = 0.25, latency: float = 0.0, sms_latency: float = 0.0, sms_rate: float = SMS_MESSAGES_PER_SECOND, workers: int = 8, seed: int = 0) -> dict:
+    """
+    Ingest a synthetic term from a fake MyCampus server and send alerts for it.
+
+    Emails are kept in memory and SMS messages are sent to a fake Twilio, so each
+    stage's HTTP calls are the requests to MyCampus, Mailgun and Twilio it would make.
+    Everything is saved in a transaction which is rolled back afterwards, and the
+    snapshot files written by `updatesections` are removed. Section ids are numbered
+    after any existing section, so that no real section is overwritten meanwhile.
+    """
+
+    if Subscription.objects.exists():
+        raise ValueError("The pipeline benchmark must be run against a database without subscriptions")
+    if Term.objects.filter(term=BENCHMARK_TERM).exists():
+        raise ValueError(f"The benchmark term {BENCHMARK_TERM} already exists")
+
+    first_id = (Section.objects.aggregate(Max("id"))["id__max"] or 0) + 1
+    term = SyntheticTerm.generate(BENCHMARK_TERM, courses=courses, seed=seed, volatility=0.5, first_id=first_id)
+    server = FakeMyCampusServer([term], latency=latency, seed=seed)
+    sms = FakeSMS(sms_latency)
+    results = {}
+
+    def count_http_calls() -> int:
+        return server.request_count + len(mail.outbox) + sms.count
+
+    server.start()
+    try:
+        with (
+            override_settings(
+                MYCAMPUS_BASE_URL=server.base_url,
+                EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+                CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+            ),
+            mock.patch("alerts.sms.send_sms", sms.send),
+            mock.patch("alerts.outbox.SMSSender", functools.partial(SMSSender, rate=sms_rate)),
+            # Cache warming is measured as its own stage instead of being queued
+            mock.patch("courses.management.commands.updatesections.warm_cache_task"),
+            transaction.atomic(),
+        ):
+            mail.outbox = []
+
+            with measure(results, "ingestion", count_http_calls):
+                call_command(
+                    "updatesections", BENCHMARK_TERM, jsessionid="benchmark", workers=workers, stdout=io.StringIO()
+                )
+            results["ingestion"]["rows"] = (
+                Section.objects.filter(term_id=BENCHMARK_TERM).count()
+                + Meeting.objects.filter(section__term_id=BENCHMARK_TERM).count()
+                + LinkedSection.objects.filter(primary_section__term_id=BENCHMARK_TERM).count()
+            )
+
+            with measure(results, "warming", count_http_calls) as result:
+                result["rows"] = warm_cache(BENCHMARK_TERM, workers)["sections"]
+
+            create_subscriptions(BENCHMARK_TERM, users, subscriptions, phone_fraction, seed)
+
+            with measure(results, "alerts", count_http_calls):
+                send_alerts_task()
+            results["alerts"]["rows"] = subscriptions
+
+            with measure(results, "delivery", count_http_calls) as result:
+                result["rows"] = sum(deliver_outbox().values())
+
+            transaction.set_rollback(True)
+    finally:
+        server.stop()
+        remove_snapshots(BENCHMARK_TERM)
+
+    for result in results.values():
+        result["rows_per_second"] = result["rows"] / result["seconds"] if result["seconds"] else 0.0
+    return results
+
+
+def remove_snapshots(term: str) -> None:
+    """Remove the raw data recorded by `updatesections` for a term."""
+    # Avoid importing management commands until they are needed
+    from courses.management.commands.updatesections import get_sections_snapshot_path, get_linked_snapshot_path
+
+    for path in (get_sections_snapshot_path(term), get_linked_snapshot_path(term)):
+        if path is not None and os.path.exists(path):
+            os.remove(path)
+
+
+def append_history(path: str, entry: dict) -> dict | None:
+    """Append an entry to a history file of JSON lines, returning the last earlier entry with the same options."""
+
+    previous = None
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                earlier = json.loads(line)
+                if earlier.get("options") == entry["options"]:
+                    previous = earlier
+
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+    return previous
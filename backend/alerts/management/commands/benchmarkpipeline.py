@@ -0,0 +1,65 @@
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from alerts.benchmarks import STAGES, METRICS, run_pipeline_benchmark, append_history
+from alerts.sms import SMS_MESSAGES_PER_SECOND
+
+
+class Command(BaseCommand):
+    help = "Time ingesting a synthetic term and sending alerts for it against a fake MyCampus, Mailgun and Twilio"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--courses", type=int, default=500, help="The number of courses in the synthetic term")
+        parser.add_argument("--users", type=int, default=1000, help="The number of users to create")
+        parser.add_argument("--subscriptions", type=int, default=5000, help="The number of subscriptions to create")
+        parser.add_argument("--phone-fraction", type=float, default=0.25, help="The fraction of users with a phone number")
+        parser.add_argument("--latency", type=float, default=0.0, help="The average delay of each MyCampus response in seconds")
+        parser.add_argument("--sms-latency", type=float, default=0.0, help="The delay of each SMS message in seconds")
+        parser.add_argument("--sms-rate", type=float, default=SMS_MESSAGES_PER_SECOND, help="The SMS messages sent per second")
+        parser.add_argument("--workers", type=int, default=8, help="The number of concurrent requests for linked sections and cache warming")
+        parser.add_argument("--seed", type=int, default=0, help="The seed for synthetic data")
+        parser.add_argument("--history", type=str, default="benchmarks/pipeline.jsonl", help="A file of JSON lines to add the results to")
+        parser.add_argument("--no-history", action="store_true", help="Do not record the results")
+
+    def handle(self, *args, **options):
+
+        benchmark_options = {
+            key: options[key] for key in 
+            ("courses", "users", "subscriptions", "phone_fraction", "latency", "sms_latency", "sms_rate", "workers", "seed")
+        }
+        try:
+            results = run_pipeline_benchmark(**benchmark_options)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        previous = None
+        if not options["no_history"]:
+            previous = append_history(options["history"], {
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "commit": get_commit(),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "options": benchmark_options,
+                "results": results,
+            })
+
+        self.stdout.write(f"{'stage':<10} " + " ".join(f"{metric:>15}" for metric in METRICS))
+        for stage in STAGES:
+            self.stdout.write(f"{stage:<10} " + " ".join(f"{results[stage][metric]:>15.2f}" for metric in METRICS))
+            if previous is not None and stage in previous["results"]:
+                self.stdout.write(f"{'  previous':<10} " + " ".join(
+                    f"{previous['results'][stage].get(metric, 0):>15.2f}" for metric in METRICS
+                ))
+
+
+def get_commit() -> str | None:
+    """Return the current git commit, if there is one."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
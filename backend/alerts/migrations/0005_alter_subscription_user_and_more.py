@@ -0,0 +1,38 @@
+# Generated by Django 5.1 on 2026-10-19 13:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remove_duplicate_subscriptions(apps, schema_editor):
+    Subscription = apps.get_model('alerts', 'Subscription')
+    keep = (
+        Subscription.objects.values('user', 'section')
+        .annotate(first_id=Min('id'))
+        .values_list('first_id', flat=True)
+    )
+    Subscription.objects.exclude(id__in=list(keep)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0004_alter_subscription_last_status'),
+        ('courses', '0009_section_section_term_course_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_subscriptions, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='subscription',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='subscription',
+            constraint=models.UniqueConstraint(fields=('user', 'section'), name='unique_user_section'),
+        ),
+    ]
@@ -19,11 +19,59 @@ class Subscription(models.Model):
         CLOSED: CLOSED,
     }
 
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
     section = models.ForeignKey(Section, on_delete=models.CASCADE)
     last_status = models.CharField(max_length=20, choices=LAST_STATUS_CHOICES, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # Also serves lookups by user, so the user foreign key has no index of its own
+        constraints = [
+            models.UniqueConstraint(fields=["user", "section"], name="unique_user_section"),
+        ]
+
+    def __str__(self):
+        return f'{self.user} - {self.section}'
+
+
+class OutboxMessage(models.Model):
+    """An alert message waiting to be (or already) delivered to a user."""
+
+    EMAIL = "email"
+    SMS = "sms"
+
+    CHANNEL_CHOICES = {
+        EMAIL: EMAIL,
+        SMS: SMS,
+    }
+
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
+    STATE_CHOICES = {
+        PENDING: PENDING,
+        SENT: SENT,
+        FAILED: FAILED,
+    }
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    payload = models.JSONField()
+    payload_hash = models.CharField(max_length=64)
+    idempotency_key = models.CharField(max_length=64, unique=True)
+    state = models.CharField(max_length=10, choices=STATE_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["state", "next_attempt_at"], name="outbox_state_next_attempt_idx"),
+        ]
+
     def __str__(self):
-        return f'{self.user} - {self.section}'
\ No newline at end of file
+        return f'{self.user} - {self.channel} ({self.state})'
@@ -0,0 +1,172 @@
+import json
+import hashlib
+from datetime import datetime, timedelta
+
+from celery.utils.log import get_task_logger
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import OutboxMessage
+from .rendering import AlertRenderer
+from .sms import SMSSender
+from accounts.models import User
+
+logger = get_task_logger(__name__)
+
+# The number of messages claimed by a delivery worker at a time
+DELIVERY_BATCH_SIZE = 200
+
+# Claimed messages are retried after this long if a worker dies while sending them
+DELIVERY_LEASE = timedelta(minutes=5)
+
+# Failed messages are retried with exponential backoff, up to a limit
+MAX_ATTEMPTS = 5
+RETRY_DELAY = timedelta(minutes=1)
+
+# Delivered messages are kept for this long, and messages which failed for longer to investigate them
+SENT_RETENTION = timedelta(days=7)
+FAILED_RETENTION = timedelta(days=30)
+
+
+def get_payload_hash(payload: dict) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def get_idempotency_key(user_id: int, channel: str, payload_hash: str, run_id: str) -> str:
+    """Return a key which is the same for a message each time a run is repeated."""
+    return hashlib.sha256(f"{user_id}:{channel}:{payload_hash}:{run_id}".encode()).hexdigest()
+
+
+def enqueue_alerts(alerts: dict[User, dict], run_id: str) -> int:
+    """Add email and SMS messages for each alert to the outbox. Returns the number of messages."""
+
+    renderer = AlertRenderer()
+    now = timezone.now()
+
+    messages = []
+    for user, alert in alerts.items():
+        html_message, plain_message = renderer.render_email(alert)
+        payloads = {
+            OutboxMessage.EMAIL: {
+                "to": user.email, "subject": renderer.subject, "body": plain_message, "html": html_message
+            },
+        }
+        # Send SMS alerts (if a phone number is provided)
+        if user.phone:
+            payloads[OutboxMessage.SMS] = {"to": user.phone, "body": renderer.render_sms(alert)}
+
+        for channel, payload in payloads.items():
+            payload_hash = get_payload_hash(payload)
+            messages.append(OutboxMessage(
+                user=user,
+                channel=channel,
+                payload=payload,
+                payload_hash=payload_hash,
+                idempotency_key=get_idempotency_key(user.id, channel, payload_hash, run_id),
+                next_attempt_at=now,
+            ))
+
+    # Messages already added by an earlier attempt at the same run are skipped
+    OutboxMessage.objects.bulk_create(messages, batch_size=1000, ignore_conflicts=True)
+    return len(messages)
+
+
+def claim_messages(batch_size: int = DELIVERY_BATCH_SIZE) -> list[OutboxMessage]:
+    """Claim pending messages that are due, so that no other worker delivers them."""
+    now = timezone.now()
+    with transaction.atomic():
+        messages = list(
+            OutboxMessage.objects
+            .select_for_update(skip_locked=True)
+            .filter(state=OutboxMessage.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        for message in messages:
+            message.attempts += 1
+            message.next_attempt_at = now + DELIVERY_LEASE
+        OutboxMessage.objects.bulk_update(messages, ["attempts", "next_attempt_at"])
+    return messages
+
+
+def deliver_outbox(batch_size: int = DELIVERY_BATCH_SIZE) -> dict[str, int]:
+    """
+    Deliver due messages in the outbox until none remain. Returns the number of messages in each final state.
+
+    Delivery is at-least-once: a message is sent again if its worker dies before recording the outcome,
+    or if the provider accepts it but the response is lost. Emails carry their idempotency key in an
+    `X-Idempotency-Key` header so that duplicates can be traced, but Twilio has no equivalent for SMS.
+    """
+
+    stats = {OutboxMessage.SENT: 0, OutboxMessage.PENDING: 0, OutboxMessage.FAILED: 0}
+
+    with SMSSender() as sms_sender, get_connection() as connection:
+        while messages := claim_messages(batch_size):
+
+            # Start sending SMS messages while emails are sent
+            errors = {}
+            sms_results = {
+                message: sms_sender.submit(to=message.payload["to"], body=message.payload["body"])
+                for message in messages if message.channel == OutboxMessage.SMS
+            }
+            for message in messages:
+                if message.channel == OutboxMessage.EMAIL:
+                    errors[message] = send_email(connection, message.payload, message.idempotency_key)
+            for message, result in sms_results.items():
+                errors[message] = result.result()["error"]
+
+            for message in messages:
+                update_message(message, errors[message])
+                stats[message.state] += 1
+            OutboxMessage.objects.bulk_update(
+                messages, ["state", "last_error", "next_attempt_at", "updated_at"]
+            )
+
+    return stats
+
+
+def send_email(connection, payload: dict, idempotency_key: str) -> Exception | None:
+    """Send an email over an open connection, returning the error if it fails."""
+    message = EmailMultiAlternatives(
+        subject=payload["subject"],
+        body=payload["body"],
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[payload["to"]],
+        headers={"X-Idempotency-Key": idempotency_key},
+    )
+    message.attach_alternative(payload["html"], "text/html")
+    try:
+        if not connection.send_messages([message]):
+            return Exception("Email was not accepted")
+    except Exception as e:
+        return e
+    return None
+
+
+def update_message(message: OutboxMessage, error: Exception | None) -> None:
+    """Record the outcome of a delivery attempt, scheduling a retry if needed."""
+    message.updated_at = timezone.now()
+    if error is None:
+        message.state = OutboxMessage.SENT
+        message.last_error = ""
+        return
+
+    logger.error(f"Failed to send {message.channel} alert to {message.payload['to']}: {error}")
+    message.last_error = str(error)
+    if message.attempts >= MAX_ATTEMPTS:
+        message.state = OutboxMessage.FAILED
+    else:
+        message.next_attempt_at = timezone.now() + RETRY_DELAY * 2 ** (message.attempts - 1)
+
+
+def purge_outbox(now: datetime | None = None) -> int:
+    """Delete messages which were sent or failed long enough ago. Returns the number deleted."""
+    if now is None:
+        now = timezone.now()
+    deleted, _ = OutboxMessage.objects.filter(
+        Q(state=OutboxMessage.SENT, updated_at__lt=now - SENT_RETENTION)
+        | Q(state=OutboxMessage.FAILED, updated_at__lt=now - FAILED_RETENTION)
+    ).delete()
+    return deleted
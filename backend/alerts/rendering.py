@@ -0,0 +1,43 @@
+from django.template.loader import get_template, render_to_string
+from django.utils.html import strip_tags
+
+from .models import Subscription
+
+
+class AlertRenderer:
+    """
+    Renders alert messages for a single run of alerts.
+
+    Templates are compiled once, and messages are rendered once for each distinct
+    set of open and waitlist open sections, since many users share the same alert.
+    """
+
+    def __init__(self):
+        self.subject = render_to_string("alerts/email_update_subject.txt").strip()
+        self.email_template = get_template("alerts/email_update_body.html")
+        self.sms_template = get_template("alerts/sms_update.txt")
+        self._emails = {}
+        self._sms = {}
+
+    @staticmethod
+    def get_alert_key(alert: dict) -> tuple[frozenset, frozenset]:
+        """Return a key for the parts of an alert that appear in messages."""
+        return (
+            frozenset(section.id for section in alert[Subscription.OPEN]),
+            frozenset(section.id for section in alert[Subscription.WAITLIST_OPEN]),
+        )
+
+    def render_email(self, alert: dict) -> tuple[str, str]:
+        """Return the HTML and plain text bodies of an alert email."""
+        key = self.get_alert_key(alert)
+        if key not in self._emails:
+            html_message = self.email_template.render({"alert": alert})
+            self._emails[key] = (html_message, strip_tags(html_message))
+        return self._emails[key]
+
+    def render_sms(self, alert: dict) -> str:
+        """Return the body of an alert SMS."""
+        key = self.get_alert_key(alert)
+        if key not in self._sms:
+            self._sms[key] = self.sms_template.render({"alert": alert})
+        return self._sms[key]
@@ -1,16 +1,90 @@
 import os
+import time
+import threading
+from functools import cache
+from concurrent.futures import Future, ThreadPoolExecutor
 
-from twilio.rest import Client
+from requests.exceptions import RequestException
 
-account_sid = os.getenv('TWILIO_ACCOUNT_SID')
-auth_token = os.getenv('TWILIO_AUTH_TOKEN')
 phone_number = os.getenv('TWILIO_PHONE_NUMBER')
-client = Client(account_sid, auth_token)
+
+# Limits for sending messages concurrently
+SMS_WORKERS = 8
+SMS_MESSAGES_PER_SECOND = float(os.getenv('TWILIO_MESSAGES_PER_SECOND', '10'))
+SMS_MAX_RETRIES = 3
+SMS_RETRY_DELAY = 1
+
+
+@cache
+def get_client():
+    """Return a Twilio client, creating it the first time it is needed."""
+    from twilio.rest import Client
+    return Client(os.getenv('TWILIO_ACCOUNT_SID'), os.getenv('TWILIO_AUTH_TOKEN'))
+
 
 def send_sms(to: str, body: str) -> str:
-    message = client.messages.create(
+    message = get_client().messages.create(
         from_=phone_number,
         body=body,
         to=to
     )
-    return message.sid
\ No newline at end of file
+    return message.sid
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Return whether sending a message may succeed if retried."""
+    from twilio.base.exceptions import TwilioRestException
+    if isinstance(error, TwilioRestException):
+        return error.status == 429 or error.status >= 500
+    return isinstance(error, RequestException)
+
+
+class RateLimiter:
+    """Spaces out calls across threads so that at most `rate` happen each second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            scheduled = max(now, self._next)
+            self._next = scheduled + self.interval
+        if scheduled > now:
+            time.sleep(scheduled - now)
+
+
+class SMSSender:
+    """
+    Sends SMS messages from a bounded thread pool.
+
+    Messages are sent as soon as they are submitted, within the per-second limit,
+    and transient errors are retried with exponential backoff. Each submitted
+    message resolves to a result with either its `sid` or its `error`.
+    """
+
+    def __init__(self, workers: int = SMS_WORKERS, rate: float = SMS_MESSAGES_PER_SECOND, max_retries: int = SMS_MAX_RETRIES):
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.limiter = RateLimiter(rate)
+        self.max_retries = max_retries
+
+    def __enter__(self) -> "SMSSender":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.executor.shutdown(wait=True)
+
+    def submit(self, to: str, body: str) -> Future:
+        return self.executor.submit(self.send, to, body)
+
+    def send(self, to: str, body: str) -> dict:
+        for attempt in range(self.max_retries + 1):
+            self.limiter.wait()
+            try:
+                return {"to": to, "sid": send_sms(to=to, body=body), "error": None}
+            except Exception as e:
+                if attempt == self.max_retries or not is_transient_error(e):
+                    return {"to": to, "sid": None, "error": e}
+            time.sleep(SMS_RETRY_DELAY * 2 ** attempt)
@@ -1,94 +1,113 @@
-from typing import Iterable
+import uuid
+from itertools import groupby
+from typing import Iterable, Iterator
 from collections import defaultdict
 
 from celery import shared_task
 from celery.utils.log import get_task_logger
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
-from django.conf import settings
-from django.utils.html import strip_tags
+from django.db import transaction
 
 from .models import Subscription
-from .sms import send_sms
+from .outbox import enqueue_alerts, deliver_outbox, purge_outbox
+from config import metrics
+from courses import cache as section_cache
+from courses.history import record_enrollment_snapshots
 from courses.models import Section
 from accounts.models import User
 
 logger = get_task_logger(__name__)
 
+ENROLLMENT_FETCH_WORKERS = 16
 
-@shared_task
-def send_alerts_task():
-    subscriptions = list(Subscription.objects.select_related("user", "section").all())
-    enrollment_infos = get_enrollment_infos(subscriptions)
-    statuses = get_statuses(subscriptions, enrollment_infos)
-    alerts = get_alerts(subscriptions, statuses)
-    failed = send_alerts(alerts)
-    update_statuses(subscriptions, statuses, failed)
-    logger.info(f"Sent {len(alerts) - len(failed)}/{len(alerts)} alerts")
-
-
-def send_alerts(alerts: dict[User, dict]) -> list[User]:
-    """Send email and SMS alerts to users."""
-
-    # Keep track of users who failed to receive alerts
-    failed = []
-
-    for user, alert in alerts.items():
-
-        sent = False
-
-        # Send email alerts
-        subject = render_to_string("alerts/email_update_subject.txt").strip()
-        html_message = render_to_string(
-            "alerts/email_update_body.html", {"alert": alert}
-        )
-        plain_message = strip_tags(html_message)
-
-        try:
-            send_mail(
-                subject=subject,
-                message=plain_message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[user.email],
-                html_message=html_message,
-                fail_silently=False,
-            )
-            sent = True
-        except Exception as e:
-            logger.error(f"Failed to send email alert to {user.email}: {e}")
-
-        # Send SMS alerts (if a phone number is provided)
-        if user.phone:
-            sms = render_to_string(
-                "alerts/sms_update.txt", {"alert": alert}
-            )
-            try:
-                send_sms(
-                    to=user.phone, 
-                    body=sms,
+# The number of subscriptions loaded from the database at a time
+SUBSCRIPTION_CHUNK_SIZE = 2000
+
+
+@shared_task(bind=True)
+def send_alerts_task(self):
+    run_id = self.request.id or str(uuid.uuid4())
+
+    # Only sections with subscriptions are fetched, and the columns needed for alerts
+    with metrics.timer("alerts_stage_seconds", stage="sections"):
+        sections = {
+            section.id: section for section in Section.objects
+            .filter(id__in=Subscription.objects.values("section_id"))
+            .only("id", "term_id", "course_id", "course_reference_number")
+        }
+    with metrics.timer("alerts_stage_seconds", stage="enrollment"):
+        enrollment_infos = get_enrollment_infos(sections.values())
+        statuses = get_statuses(enrollment_infos)
+    with metrics.timer("alerts_stage_seconds", stage="snapshots"):
+        record_enrollment_snapshots(enrollment_infos)
+
+    # Each batch's alerts are queued together with the statuses they report, and delivered separately.
+    # A run which fails part way only repeats the uncommitted batches, whose alerts are queued once by run id
+    count = 0
+    alert_count = 0
+    with metrics.timer("alerts_stage_seconds", stage="enqueue"):
+        for subscriptions in iter_user_batches(get_subscriptions(), SUBSCRIPTION_CHUNK_SIZE):
+            with transaction.atomic():
+                alerts = get_alerts(subscriptions, statuses)
+                users = User.objects.filter(id__in=alerts).only("id", "email", "phone")
+                count += enqueue_alerts(
+                    {user: get_section_alert(alerts[user.id], sections) for user in users}, run_id=run_id
                 )
-                sent = True
-            except Exception as e:
-                logger.error(f"Failed to send SMS alert to {user.phone}: {e}")
-        
-        # Update the list of failed alerts
-        if not sent:
-            failed.append(user)
+                alert_count += len(alerts)
+                update_statuses(subscriptions, statuses)
+    transaction.on_commit(deliver_outbox_task.delay)
+    metrics.increment("alerts_total", alert_count)
+    metrics.increment("alert_messages_queued_total", count)
+    logger.info(f"Queued {count} messages for {alert_count} alerts")
 
-    return failed
+
+@shared_task
+def deliver_outbox_task():
+    with metrics.timer("alerts_stage_seconds", stage="delivery"):
+        stats = deliver_outbox()
+    for state, count in stats.items():
+        metrics.increment("outbox_messages_total", count, state=state)
+    logger.info(f"Delivered outbox messages: {stats}")
+
+
+@shared_task
+def purge_outbox_task():
+    deleted = purge_outbox()
+    logger.info(f"Deleted {deleted} old outbox messages")
 
 
-def get_alerts(subscriptions: Iterable[Subscription], statuses: dict[Section, str]) -> dict[User, dict]:
-    """Returns notifications of new OPEN or WAITLIST_OPEN sections per user."""
+def get_subscriptions() -> Iterator[dict]:
+    """Stream the fields of each subscription needed for alerts, grouped by user."""
+    return (
+        Subscription.objects
+        .order_by("user_id", "section_id")
+        .values("id", "user_id", "section_id", "last_status")
+        .iterator(chunk_size=SUBSCRIPTION_CHUNK_SIZE)
+    )
+
+
+def iter_user_batches(subscriptions: Iterable[dict], batch_size: int = SUBSCRIPTION_CHUNK_SIZE) -> Iterator[list[dict]]:
+    """Split subscriptions (ordered by user) into batches, keeping each user's subscriptions together."""
+    batch = []
+    for _, user_subscriptions in groupby(subscriptions, key=lambda subscription: subscription["user_id"]):
+        batch.extend(user_subscriptions)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def get_alerts(subscriptions: Iterable[dict], statuses: dict[int, str]) -> dict[int, dict]:
+    """Returns notifications of new OPEN or WAITLIST_OPEN section ids per user id."""
 
     # Group subscriptions by user
     user_subscriptions = defaultdict(list)
     for subscription in subscriptions:
-        user_subscriptions[subscription.user].append(subscription)
+        user_subscriptions[subscription["user_id"]].append(subscription)
 
     # Check for new updates
     alerts = {}
-    for user in user_subscriptions:
+    for user_id in user_subscriptions:
 
         user_alert = {
             Subscription.OPEN: set(), 
@@ -97,50 +116,58 @@ def get_alerts(subscriptions: Iterable[Subscription], statuses: dict[Section, st
         }
         is_new = False
 
-        for subscription in user_subscriptions[user]:
+        for subscription in user_subscriptions[user_id]:
+
+            # Skip sections whose status is unknown for this run
+            if subscription["section_id"] not in statuses:
+                continue
 
-            status = statuses[subscription.section]
-            user_alert[status].add(subscription.section)
+            status = statuses[subscription["section_id"]]
+            user_alert[status].add(subscription["section_id"])
 
             # Keep track of the last enrollment status for each subscription
-            if subscription.last_status != status:
+            if subscription["last_status"] != status:
                 is_new = True
 
         # Only send alerts if there are new open or waitlist open sections
         if is_new and (user_alert[Subscription.OPEN] or user_alert[Subscription.WAITLIST_OPEN]):
-            alerts[user] = user_alert
+            alerts[user_id] = user_alert
 
     return alerts
 
 
-def update_statuses(subscriptions: Iterable[Subscription], statuses: dict[Section, str], failed: list[User]) -> None:
-    """Update the last status of successfully sent alerts."""
-    updates = []
+def get_section_alert(alert: dict[str, set[int]], sections: dict[int, Section]) -> dict[str, set[Section]]:
+    """Replace the section ids in an alert with sections, for rendering."""
+    return {
+        status: {sections[section_id] for section_id in section_ids} 
+        for status, section_ids in alert.items()
+    }
+
+
+def update_statuses(subscriptions: Iterable[dict], statuses: dict[int, str]) -> None:
+    """Update the last status of each subscription."""
+    updates = defaultdict(list)
     for subscription in subscriptions:
-        status = statuses[subscription.section]
-        # Skip status updates for users who failed to receive alerts
-        if subscription.user in failed:
+        # Skip sections whose status is unknown for this run
+        if subscription["section_id"] not in statuses:
             continue
+        status = statuses[subscription["section_id"]]
         # Skip status updates for unchanged statuses
-        if subscription.last_status == status:
+        if subscription["last_status"] == status:
             continue
         # Update statuses
-        subscription.last_status = status
-        updates.append(subscription)
+        subscription["last_status"] = status
+        updates[status].append(subscription["id"])
     # Update the database with the new statuses
-    if updates:
-        Subscription.objects.bulk_update(updates, ["last_status"])
+    for status, ids in updates.items():
+        Subscription.objects.filter(id__in=ids).update(last_status=status)
 
 
-def get_statuses(subscriptions: Iterable[Subscription], enrollment_infos: dict[Section, dict]) -> dict[Section, str]:
-    """Map each section to its enrollment status."""
-    statuses = {}
-    for subscription in subscriptions:
-        if subscription.section not in statuses:
-            statuses[subscription.section] = get_status(
-                enrollment_infos[subscription.section]
-            )
-    return statuses
+def get_statuses(enrollment_infos: dict[int, dict]) -> dict[int, str]:
+    """Map the id of each section with known enrollment info to its enrollment status."""
+    return {
+        section_id: get_status(enrollment_info) for section_id, enrollment_info in enrollment_infos.items()
+    }
 
 
 def get_status(enrollment_info: dict) -> str:
@@ -154,12 +181,13 @@ def get_status(enrollment_info: dict) -> str:
     return Subscription.CLOSED
 
 
-def get_enrollment_infos(subscriptions: Iterable[Subscription]) -> dict[Section, dict]:
-    """Map each section to its enrollment info."""
-    enrollment_infos = {}
-    for subscription in subscriptions:
-        if subscription.section not in enrollment_infos:
-            enrollment_infos[subscription.section] = (
-                subscription.section.get_enrollment_info(force_refresh=True)
-            )
-    return enrollment_infos
\ No newline at end of file
+def get_enrollment_infos(sections: Iterable[Section]) -> dict[int, dict]:
+    """Map each section id to its (freshly fetched) enrollment info, skipping sections that could not be fetched."""
+    sections = list(sections)
+    enrollment_infos = section_cache.get_enrollment_infos(
+        sections, force_refresh=True, max_workers=ENROLLMENT_FETCH_WORKERS
+    )
+    metrics.increment("alerts_enrollment_failures_total", len(sections) - len(enrollment_infos))
+    if len(enrollment_infos) < len(sections):
+        logger.warning(f"Failed to fetch enrollment info for {len(sections) - len(enrollment_infos)}/{len(sections)} sections")
+    return enrollment_infos
@@ -1,3 +1,14 @@
+import os
+import time
+import tempfile
+from datetime import timedelta
+from unittest.mock import ANY, patch
+
+from twilio.base.exceptions import TwilioRestException
+
+from django.core import mail
+from django.utils import timezone
+from django.utils.html import strip_tags
 from django.test import TestCase
 from django.urls import reverse
 from django.contrib.auth import get_user_model
@@ -5,9 +16,12 @@ from rest_framework.test import APITestCase
 from django.core.management import call_command
 from rest_framework import status
 
-from courses.models import Section, Term
-from alerts.models import Subscription
-from alerts.tasks import get_alerts, get_status, get_statuses, update_statuses
+from config.testing import QueryPlanMixin, make_course, make_sections
+from courses.models import Section, Term, EnrollmentSnapshot
+from alerts.models import Subscription, OutboxMessage
+from alerts.sms import RateLimiter, SMSSender
+from alerts.tasks import get_alerts, get_status, get_statuses, update_statuses, iter_user_batches, send_alerts_task
+from alerts.outbox import enqueue_alerts, deliver_outbox, purge_outbox
 
 
 User = get_user_model()
@@ -109,6 +123,46 @@ class TestSubscriptionListCreateDeleteView(APITestCase):
         self.assertEqual(len(response.data), 1)
 
 
+class TestSubscriptionQueries(APITestCase):
+
+    def setUp(self) -> None:
+        term = Term.objects.create(term="209901", registration_open=True)
+        self.crns = [
+            section.course_reference_number for section in make_sections(term, make_course(), 20)
+        ]
+
+        self.user = User.objects.create_user(email="email@example.com", password="password")
+        self.user.email_verified = True
+        self.user.save()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('subscriptions-list-create-delete')
+
+
+    def test_query_counts(self):
+
+        # Sections, meetings, existing subscriptions and the insert
+        with self.assertNumQueries(4):
+            response = self.client.post(self.url, {
+                'term': '209901', 'course_reference_numbers': self.crns[:10]
+            }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 10)
+
+        # Existing subscriptions are not repeated
+        with self.assertNumQueries(4):
+            response = self.client.post(self.url, {
+                'term': '209901', 'course_reference_numbers': self.crns
+            }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 10)
+        self.assertEqual(Subscription.objects.filter(user=self.user).count(), 20)
+
+        # Sections and meetings
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'term': '209901'})
+        self.assertEqual(len(response.data), 20)
+
+
 class TestAlerts(TestCase):
 
     def setUp(self) -> None:
@@ -229,7 +283,7 @@ class TestAlerts(TestCase):
 
         # Mock enrollment infos
         enrollment_infos = {
-            section1: {
+            section1.id: {
                 'enrollment': 250,
                 'maximumEnrollment': 250,
                 'seatsAvailable': None,
@@ -237,7 +291,7 @@ class TestAlerts(TestCase):
                 'waitCount': None,
                 'waitAvailable': None
             },
-            section2: {
+            section2.id: {
                 'enrollment': 245,
                 'maximumEnrollment': 250,
                 'seatsAvailable': 5,
@@ -245,7 +299,7 @@ class TestAlerts(TestCase):
                 'waitCount': None,
                 'waitAvailable': None
             },
-            section3: {
+            section3.id: {
                 'enrollment': 250,
                 'maximumEnrollment': 250,
                 'seatsAvailable': 0,
@@ -253,7 +307,7 @@ class TestAlerts(TestCase):
                 'waitCount': 10,
                 'waitAvailable': 10
             },
-            section4: {
+            section4.id: {
                 'enrollment': 250,
                 'maximumEnrollment': 250,
                 'seatsAvailable': 0,
@@ -264,21 +318,301 @@ class TestAlerts(TestCase):
         }
 
         # Test alerts
-        subscriptions = Subscription.objects.all()
-        statuses = get_statuses(subscriptions, enrollment_infos)
+        subscriptions = list(Subscription.objects.values("id", "user_id", "section_id", "last_status"))
+        statuses = get_statuses(enrollment_infos)
         alerts = get_alerts(subscriptions, statuses)
         expected = {
-            user: {
-                Subscription.OPEN: {section2},
-                Subscription.WAITLIST_OPEN: {section3},
-                Subscription.CLOSED: {section1, section4}
+            user.id: {
+                Subscription.OPEN: {section2.id},
+                Subscription.WAITLIST_OPEN: {section3.id},
+                Subscription.CLOSED: {section1.id, section4.id}
             }
         }
         self.assertEqual(alerts, expected)
 
         # Test repeated alerts
-        update_statuses(subscriptions, statuses, [])
-        statuses = get_statuses(subscriptions, enrollment_infos)
+        update_statuses(subscriptions, statuses)
+        subscriptions = list(Subscription.objects.values("id", "user_id", "section_id", "last_status"))
         alerts = get_alerts(subscriptions, statuses)
         expected = {}
-        self.assertEqual(alerts, expected)
\ No newline at end of file
+        self.assertEqual(alerts, expected)
+
+
+class TestOutbox(TestCase):
+
+    def setUp(self) -> None:
+        term = Term.objects.create(term="209901", registration_open=True)
+        self.sections = make_sections(term, make_course(), 2)
+        self.users = [
+            User.objects.create_user(email=f"user{i}@example.com", password="password") for i in range(3)
+        ]
+        self.users[2].phone = "+10000000000"
+
+
+    @patch("alerts.sms.send_sms")
+    @patch("alerts.rendering.strip_tags", wraps=strip_tags)
+    def test_send_alerts(self, mock_strip_tags, mock_send_sms):
+
+        alerts = {
+            self.users[0]: {Subscription.OPEN: {self.sections[0]}, Subscription.WAITLIST_OPEN: set(), Subscription.CLOSED: set()},
+            self.users[1]: {Subscription.OPEN: {self.sections[0]}, Subscription.WAITLIST_OPEN: set(), Subscription.CLOSED: {self.sections[1]}},
+            self.users[2]: {Subscription.OPEN: set(), Subscription.WAITLIST_OPEN: {self.sections[1]}, Subscription.CLOSED: set()},
+        }
+        with self.assertNumQueries(1):
+            self.assertEqual(enqueue_alerts(alerts, run_id="run"), 4)
+
+        # Identical alerts are only rendered once
+        self.assertEqual(mock_strip_tags.call_count, 2)
+
+        # Repeating a run doesn't queue the same messages again
+        enqueue_alerts(alerts, run_id="run")
+        self.assertEqual(OutboxMessage.objects.count(), 4)
+
+        stats = deliver_outbox()
+        self.assertEqual(stats[OutboxMessage.SENT], 4)
+        self.assertEqual(len(mail.outbox), 3)
+        bodies = {message.to[0]: message.body for message in mail.outbox}
+        self.assertEqual(bodies["user0@example.com"], bodies["user1@example.com"])
+        self.assertIn("TEST1000U (CRN: 90000)", bodies["user0@example.com"])
+        self.assertIn("TEST1000U (CRN: 90001)", bodies["user2@example.com"])
+        mock_send_sms.assert_called_once_with(to="+10000000000", body=ANY)
+
+        # Sent messages are not delivered again
+        self.assertEqual(deliver_outbox()[OutboxMessage.SENT], 0)
+        self.assertEqual(len(mail.outbox), 3)
+
+
+    @patch("alerts.sms.send_sms")
+    @patch("django.core.mail.backends.locmem.EmailBackend.send_messages", side_effect=Exception("Unavailable"))
+    def test_failed_alerts(self, mock_send_messages, mock_send_sms):
+
+        alert = {Subscription.OPEN: {self.sections[0]}, Subscription.WAITLIST_OPEN: set(), Subscription.CLOSED: set()}
+        enqueue_alerts({user: alert for user in self.users}, run_id="run")
+        stats = deliver_outbox()
+
+        # Only the failed messages are retried, after a delay
+        self.assertEqual(stats, {OutboxMessage.SENT: 1, OutboxMessage.PENDING: 3, OutboxMessage.FAILED: 0})
+        self.assertEqual(deliver_outbox()[OutboxMessage.PENDING], 0)
+        OutboxMessage.objects.filter(state=OutboxMessage.PENDING).update(next_attempt_at=timezone.now())
+        mock_send_messages.side_effect = None
+        mock_send_messages.return_value = 1
+        self.assertEqual(deliver_outbox()[OutboxMessage.SENT], 3)
+        self.assertEqual(
+            list(OutboxMessage.objects.filter(channel=OutboxMessage.EMAIL).values_list("attempts", flat=True)), [2, 2, 2]
+        )
+
+
+    @patch("alerts.outbox.MAX_ATTEMPTS", 1)
+    def test_failed_email_in_batch(self):
+
+        alert = {Subscription.OPEN: {self.sections[0]}, Subscription.WAITLIST_OPEN: set(), Subscription.CLOSED: set()}
+        enqueue_alerts({user: alert for user in self.users[:2]}, run_id="run")
+
+        def send_messages(messages):
+            if messages[0].to == ["user0@example.com"]:
+                raise Exception("Mailbox unavailable")
+            mail.outbox.extend(messages)
+            return len(messages)
+
+        # Emails delivered together are sent separately, so one failure doesn't fail the others
+        with patch("django.core.mail.backends.locmem.EmailBackend.send_messages", side_effect=send_messages):
+            stats = deliver_outbox()
+        self.assertEqual(stats, {OutboxMessage.SENT: 1, OutboxMessage.PENDING: 0, OutboxMessage.FAILED: 1})
+        self.assertEqual([message.to for message in mail.outbox], [["user1@example.com"]])
+        self.assertEqual(
+            mail.outbox[0].extra_headers["X-Idempotency-Key"],
+            OutboxMessage.objects.get(channel=OutboxMessage.EMAIL, payload__to="user1@example.com").idempotency_key,
+        )
+        self.assertEqual(
+            dict(OutboxMessage.objects.values_list("payload__to", "state")),
+            {"user0@example.com": OutboxMessage.FAILED, "user1@example.com": OutboxMessage.SENT},
+        )
+
+
+    @patch("alerts.outbox.MAX_ATTEMPTS", 1)
+    @patch("django.core.mail.backends.locmem.EmailBackend.send_messages", side_effect=Exception("Unavailable"))
+    def test_max_attempts(self, mock_send_messages):
+
+        alert = {Subscription.OPEN: {self.sections[0]}, Subscription.WAITLIST_OPEN: set(), Subscription.CLOSED: set()}
+        enqueue_alerts({self.users[0]: alert}, run_id="run")
+        self.assertEqual(deliver_outbox()[OutboxMessage.FAILED], 1)
+        self.assertEqual(OutboxMessage.objects.get().last_error, "Unavailable")
+
+
+    def test_purge_outbox(self):
+
+        alert = {Subscription.OPEN: {self.sections[0]}, Subscription.WAITLIST_OPEN: set(), Subscription.CLOSED: set()}
+        enqueue_alerts({user: alert for user in self.users}, run_id="run")
+        messages = list(OutboxMessage.objects.order_by("id"))
+        now = timezone.now()
+        for message, state, age in [
+            (messages[0], OutboxMessage.SENT, timedelta(days=8)),
+            (messages[1], OutboxMessage.SENT, timedelta(days=1)),
+            (messages[2], OutboxMessage.FAILED, timedelta(days=8)),
+            (messages[3], OutboxMessage.PENDING, timedelta(days=60)),
+        ]:
+            OutboxMessage.objects.filter(id=message.id).update(state=state, updated_at=now - age)
+
+        # Old sent messages are deleted, failed messages are kept longer and pending messages are kept
+        self.assertEqual(purge_outbox(now), 1)
+        self.assertEqual(
+            list(OutboxMessage.objects.order_by("id").values_list("id", flat=True)),
+            [message.id for message in messages[1:]],
+        )
+        self.assertEqual(purge_outbox(now + timedelta(days=30)), 2)
+        self.assertEqual(list(OutboxMessage.objects.values_list("id", flat=True)), [messages[3].id])
+
+
+class TestSendAlertsTask(TestCase):
+
+    def setUp(self) -> None:
+        term = Term.objects.create(term="209901", registration_open=True)
+        sections = make_sections(term, make_course(), 3)
+        for i in range(5):
+            user = User.objects.create_user(email=f"user{i}@example.com", password="password")
+            for section in sections:
+                Subscription.objects.create(user=user, section=section)
+
+
+    @patch("alerts.tasks.SUBSCRIPTION_CHUNK_SIZE", 4)
+    @patch("courses.api.get_enrollment_info")
+    def test_send_alerts_task(self, mock_get_enrollment_info):
+
+        def get_enrollment_info(term, crn, timeout=None):
+            if crn == "90000":
+                raise Exception("Unavailable")
+            return {"seatsAvailable": 5 if crn == "90001" else 0, "waitCount": 0, "waitAvailable": 0}
+        mock_get_enrollment_info.side_effect = get_enrollment_info
+
+        send_alerts_task.apply()
+
+        # Each user gets an alert, and statuses are only updated for known sections
+        self.assertEqual(OutboxMessage.objects.count(), 5)
+        self.assertEqual(Subscription.objects.filter(last_status=None).count(), 5)
+        self.assertEqual(Subscription.objects.filter(last_status=Subscription.OPEN).count(), 5)
+        self.assertEqual(Subscription.objects.filter(last_status=Subscription.CLOSED).count(), 5)
+        self.assertIn("TEST1000U (CRN: 90001)", OutboxMessage.objects.first().payload["body"])
+
+        # Enrollment is recorded for sections with known enrollment
+        self.assertEqual(EnrollmentSnapshot.objects.count(), 2)
+
+        # Repeated runs don't queue new alerts or record unchanged enrollment
+        send_alerts_task.apply()
+        self.assertEqual(OutboxMessage.objects.count(), 5)
+        self.assertEqual(EnrollmentSnapshot.objects.count(), 2)
+
+
+    @patch("alerts.tasks.SUBSCRIPTION_CHUNK_SIZE", 4)
+    @patch("courses.api.get_enrollment_info", return_value={"seatsAvailable": 5, "waitCount": 0, "waitAvailable": 0})
+    def test_failed_batch(self, mock_get_enrollment_info):
+
+        calls = []
+        def fail_second_batch(subscriptions, statuses):
+            calls.append(subscriptions)
+            if len(calls) == 2:
+                raise Exception("Database unavailable")
+            return update_statuses(subscriptions, statuses)
+
+        # Batches (of two users each) are committed separately, so the batch before a failure is kept
+        with patch("alerts.tasks.update_statuses", side_effect=fail_second_batch):
+            self.assertTrue(send_alerts_task.apply().failed())
+        self.assertEqual(OutboxMessage.objects.count(), 2)
+        self.assertEqual(Subscription.objects.filter(last_status=Subscription.OPEN).count(), 6)
+
+        # Running again queues the remaining alerts
+        send_alerts_task.apply()
+        self.assertEqual(OutboxMessage.objects.count(), 5)
+        self.assertEqual(Subscription.objects.filter(last_status=Subscription.OPEN).count(), 15)
+
+
+    def test_iter_user_batches(self):
+
+        subscriptions = list(Subscription.objects.order_by("user_id").values("id", "user_id"))
+        batches = list(iter_user_batches(iter(subscriptions), batch_size=4))
+        self.assertEqual([len(batch) for batch in batches], [6, 6, 3])
+
+
+class TestSMSSender(TestCase):
+
+    @patch("alerts.sms.SMS_RETRY_DELAY", 0)
+    @patch("alerts.sms.send_sms")
+    def test_send(self, mock_send_sms):
+
+        mock_send_sms.side_effect = [
+            TwilioRestException(503, "uri"), "SM1",
+            TwilioRestException(400, "uri"),
+        ]
+        with SMSSender(workers=1, rate=1000) as sender:
+            results = [sender.submit("+10000000000", "Body") for _ in range(2)]
+            results = [result.result() for result in results]
+
+        # Transient errors are retried, while others are returned
+        self.assertEqual(results[0]["sid"], "SM1")
+        self.assertIsNone(results[0]["error"])
+        self.assertIsNone(results[1]["sid"])
+        self.assertEqual(results[1]["error"].status, 400)
+        self.assertEqual(mock_send_sms.call_count, 3)
+
+
+    def test_rate_limiter(self):
+
+        limiter = RateLimiter(rate=100)
+        start = time.monotonic()
+        for _ in range(11):
+            limiter.wait()
+        self.assertGreaterEqual(time.monotonic() - start, 0.1)
+
+
+class TestPipelineBenchmark(TestCase):
+
+    def test_run_pipeline_benchmark(self):
+
+        # Imported here so that the benchmark (and the fake MyCampus server) is only loaded by this test
+        from alerts.benchmarks import STAGES, run_pipeline_benchmark
+
+        # Snapshots are written to a temporary directory instead of the recorded data
+        with tempfile.TemporaryDirectory() as snapshot_dir:
+            with patch("courses.management.commands.updatesections.SNAPSHOT_DIR", snapshot_dir):
+                results = run_pipeline_benchmark(courses=20, users=10, subscriptions=30, phone_fraction=0.5, sms_rate=1000)
+            self.assertEqual(
+                [file for directory, _, files in os.walk(snapshot_dir) for file in files], []
+            )
+        self.assertEqual(list(results), STAGES)
+        self.assertEqual(results["alerts"]["rows"], 30)
+        for result in results.values():
+            self.assertGreater(result["queries"], 0)
+            self.assertGreater(result["http_calls"], 0)
+
+        # Alerts are sent once per user, by email and by SMS for users with phones
+        self.assertEqual(results["delivery"]["http_calls"], results["delivery"]["rows"])
+
+        # The synthetic data is rolled back
+        self.assertEqual(Section.objects.count(), 0)
+        self.assertEqual(Subscription.objects.count(), 0)
+
+
+    def test_existing_sections(self):
+
+        from alerts.benchmarks import BENCHMARK_TERM, run_pipeline_benchmark
+
+        # Synthetic sections are numbered after existing sections, which are left alone
+        term = Term.objects.create(term="209901", term_desc="Test Term")
+        section = make_sections(term, make_course(), 1)[0]
+        Section.objects.filter(id=section.id).update(id=100000)
+        with tempfile.TemporaryDirectory() as snapshot_dir:
+            with patch("courses.management.commands.updatesections.SNAPSHOT_DIR", snapshot_dir):
+                run_pipeline_benchmark(courses=5, users=2, subscriptions=2, sms_rate=1000)
+        self.assertEqual(list(Section.objects.values_list("id", "term_id")), [(100000, "209901")])
+
+        Term.objects.create(term=BENCHMARK_TERM, term_desc="Benchmark Term")
+        with self.assertRaises(ValueError):
+            run_pipeline_benchmark(courses=5, users=2, subscriptions=2)
+
+
+class TestQueryPlans(QueryPlanMixin, TestCase):
+
+    def test_subscription_indexes(self):
+
+        self.assertUsesIndex(Subscription.objects.filter(user_id=1), ["user_id"])
+        self.assertUsesIndex(Subscription.objects.filter(section_id=1), ["section_id"])
+        self.assertUsesIndex(Subscription.objects.filter(user_id=1, section_id=1), ["user_id", "section_id"])
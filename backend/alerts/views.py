@@ -19,14 +19,12 @@ class SubscriptionListCreateDeleteView(APIView):
 
         term = request.query_params.get('term')
         
-        subscriptions = Subscription.objects.filter(
-            user=self.request.user, 
-        )
+        sections = Section.objects.filter(
+            subscription__user=self.request.user, 
+        ).prefetch_related("meetings")
 
         if term:
-            subscriptions = subscriptions.filter(section__term__term=term)
-
-        sections = [subscription.section for subscription in subscriptions]
+            sections = sections.filter(term__term=term)
 
         serializer = SectionSerializer(sections, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -44,32 +42,26 @@ class SubscriptionListCreateDeleteView(APIView):
             return Response({'detail': 'No course reference numbers provided.'}, status=status.HTTP_400_BAD_REQUEST)
         
         # Ensure the sections exist
-        sections = Section.objects.filter(
+        sections = list(Section.objects.filter(
             term__term=term, 
             term__registration_open=True,
             course_reference_number__in=course_reference_numbers,
-        )
+        ).prefetch_related("meetings"))
         if len(sections) != len(course_reference_numbers):
             return Response({'detail': 'One or more sections not found.'}, status=status.HTTP_400_BAD_REQUEST)
         
-        sections = {
-            section.course_reference_number: section
-            for section in Section.objects.filter(
-                term__term=term, course_reference_number__in=course_reference_numbers
-            )
-        }
-        
-        subscriptions = []
-        for crn in course_reference_numbers:
-            subscription, created = Subscription.objects.get_or_create(
-                user=request.user, section=sections[crn]
-            )
-            if created:
-                subscriptions.append(subscription)
-
-        serializer = SectionSerializer([
-            subscription.section for subscription in subscriptions
-        ], many=True)
+        # Only create subscriptions that don't exist yet
+        existing = set(
+            Subscription.objects.filter(
+                user=request.user, section__in=sections
+            ).values_list('section_id', flat=True)
+        )
+        sections = [section for section in sections if section.id not in existing]
+        Subscription.objects.bulk_create([
+            Subscription(user=request.user, section=section) for section in sections
+        ], ignore_conflicts=True)
+
+        serializer = SectionSerializer(sections, many=True)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     
@@ -0,0 +1,6 @@
+from django.apps import AppConfig
+
+
+class ConfigConfig(AppConfig):
+    # Registered so that project-wide management commands are found
+    name = 'config'
@@ -6,8 +6,37 @@ from django.conf import settings
 
 class MailgunEmailBackend(BaseEmailBackend):
 
+    def __init__(self, fail_silently: bool = False, **kwargs) -> None:
+        super().__init__(fail_silently=fail_silently, **kwargs)
+        self.session = None
+
+    def open(self) -> bool:
+        """Open a session to reuse connections across messages."""
+        if self.session is not None:
+            return False
+        self.session = requests.Session()
+        return True
+    
+    def close(self) -> None:
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+
     def send_messages(self, email_messages: list[EmailMessage]) -> int:
         
+        count = 0
+        new_session = self.open()
+
+        try:
+            count = self._send_messages(email_messages)
+        finally:
+            if new_session:
+                self.close()
+
+        return count
+
+    def _send_messages(self, email_messages: list[EmailMessage]) -> int:
+        
         count = 0
 
         for message in email_messages:
@@ -25,7 +54,11 @@ class MailgunEmailBackend(BaseEmailBackend):
                         data['html'] = content
                         break
 
-            response = requests.post(
+            # Mailgun adds custom headers given as "h:" parameters
+            for name, value in message.extra_headers.items():
+                data[f"h:{name}"] = value
+
+            response = self.session.post(
                 f"https://api.mailgun.net/v3/{settings.MAILGUN_DOMAIN}/messages",
                 auth=("api", settings.MAILGUN_API_KEY),
                 data=data,
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandParser
+
+from config.startup import ENTRY_POINTS, HEAVY_MODULES, get_import_times, get_package_times
+
+
+class Command(BaseCommand):
+    help = "Report the time spent importing modules when web and worker processes start"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--entry", action="append", choices=list(ENTRY_POINTS), help="The entry points to report on (default: all)")
+        parser.add_argument("--top", type=int, default=20, help="The number of packages and modules to list")
+
+    def handle(self, *args, **options):
+
+        for entry in options["entry"] or ENTRY_POINTS:
+            import_times = get_import_times(entry)
+            total = sum(import_time.self_us for import_time in import_times)
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{entry}: {len(import_times)} modules imported in {total / 1000:.1f}ms"
+            ))
+
+            self.stdout.write(f"{'self [ms]':>10} {'share':>6}  package")
+            package_times = sorted(get_package_times(import_times).items(), key=lambda item: -item[1])
+            for package, self_us in package_times[:options["top"]]:
+                self.stdout.write(f"{self_us / 1000:>10.1f} {self_us / total:>6.1%}  {package}")
+
+            self.stdout.write(f"\n{'self [ms]':>10} {'cumulative':>10}  module")
+            slowest = sorted(import_times, key=lambda import_time: -import_time.cumulative_us)
+            for import_time in slowest[:options["top"]]:
+                self.stdout.write(
+                    f"{import_time.self_us / 1000:>10.1f} {import_time.cumulative_us / 1000:>10.1f}  "
+                    f"{'  ' * import_time.depth}{import_time.module}"
+                )
+
+            heavy = [
+                module for module in HEAVY_MODULES 
+                if any(import_time.module == module for import_time in import_times)
+            ]
+            if heavy:
+                self.stdout.write(self.style.WARNING(f"Heavy modules loaded at startup: {', '.join(heavy)}"))
+            self.stdout.write("")
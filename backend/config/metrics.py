@@ -0,0 +1,141 @@
+import json
+import time
+import bisect
+import logging
+import threading
+from contextlib import contextmanager, nullcontext
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, Http404
+from django.utils.crypto import constant_time_compare
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the histogram buckets for timers, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_disabled = nullcontext()
+
+
+class Registry:
+    """
+    Counters and timer histograms for a single process, rendered in the Prometheus text format.
+
+    Each metric is keyed by its name and a sorted tuple of its label names and values.
+    """
+
+    def __init__(self, buckets: tuple[float] = BUCKETS):
+        self.buckets = buckets
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, labels: tuple, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name, labels] = self.counters.get((name, labels), 0) + value
+
+    def observe(self, name: str, labels: tuple, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            histogram = self.histograms.get((name, labels))
+            if histogram is None:
+                # The count in each bucket (and above the last), followed by the sum
+                histogram = self.histograms[name, labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            histogram[index] += 1
+            histogram[-1] += value
+
+    def clear(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def render(self) -> str:
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((key, list(histogram)) for key, histogram in self.histograms.items())
+
+        lines = []
+        previous = None
+        for (name, labels), value in counters:
+            if name != previous:
+                lines.append(f"# TYPE {name} counter")
+                previous = name
+            lines.append(f"{name}{format_labels(labels)} {value}")
+
+        for (name, labels), histogram in histograms:
+            if name != previous:
+                lines.append(f"# TYPE {name} histogram")
+                previous = name
+            count = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), histogram):
+                count += bucket_count
+                lines.append(f"{name}_bucket{format_labels(labels + (('le', str(bound)),))} {count}")
+            lines.append(f"{name}_sum{format_labels(labels)} {histogram[-1]}")
+            lines.append(f"{name}_count{format_labels(labels)} {count}")
+
+        return "\n".join(lines) + "\n"
+
+
+def format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n"))
+        for key, value in labels
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def get_labels(labels: dict) -> tuple:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+registry = Registry()
+
+
+def is_enabled() -> bool:
+    return settings.METRICS_ENABLED
+
+
+def increment(name: str, value: float = 1, **labels) -> None:
+    """Add to a counter."""
+    if not settings.METRICS_ENABLED:
+        return
+    registry.increment(name, get_labels(labels), value)
+
+
+def observe(name: str, seconds: float, **labels) -> None:
+    """Record a duration, and log it if structured metric logs are enabled."""
+    if not settings.METRICS_ENABLED:
+        return
+    registry.observe(name, get_labels(labels), seconds)
+    if settings.METRICS_LOG:
+        logger.info(json.dumps({"metric": name, "seconds": round(seconds, 6), **labels}))
+
+
+def timer(name: str, **labels):
+    """Return a context manager which records the time spent in a block. Does nothing when metrics are disabled."""
+    if not settings.METRICS_ENABLED:
+        return _disabled
+    return _timer(name, labels)
+
+
+@contextmanager
+def _timer(name: str, labels: dict):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """Export this process's metrics in the Prometheus text format, to requests bearing METRICS_TOKEN."""
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    # Metrics are never public, so every request is denied if no token is set
+    if not settings.METRICS_TOKEN or not constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {settings.METRICS_TOKEN}"
+    ):
+        return HttpResponse(status=401)
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,118 @@
+import os
+import io
+import re
+import json
+import time
+import uuid
+import pstats
+import random
+import cProfile
+import threading
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.http import HttpRequest, HttpResponse
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a sample of requests, and requests from staff users with the profiling header.
+
+    Each profile is written to `PROFILING_DIR` as a cProfile dump (readable with `pstats`
+    or snakeviz), alongside the SQL queries run and their timings. The slowest functions
+    are summarized in the response headers of requests profiled for staff. Only one request
+    is profiled at a time, since Python allows a single active profiler.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self._lock = threading.Lock()
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        requested = self.is_requested(request)
+        if not (requested or random.random() < settings.PROFILING_SAMPLE_RATE):
+            return self.get_response(request)
+        if not self._lock.acquire(blocking=False):
+            return self.get_response(request)
+
+        # Only loaded when a request is profiled, to keep startup fast
+        from django.test.utils import CaptureQueriesContext
+
+        try:
+            profiler = cProfile.Profile()
+            start = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    profiler.disable()
+            seconds = time.perf_counter() - start
+        finally:
+            self._lock.release()
+
+        profile_id = save_profile(request, profiler, queries.captured_queries, seconds)
+
+        # The summary describes the code, so it is only shown to staff who asked for it
+        if requested:
+            response["X-Profile-Id"] = profile_id
+            response["X-Profile-Time"] = f"{seconds:.4f}"
+            response["X-Profile-Queries"] = f"{len(queries.captured_queries)} ({get_query_time(queries.captured_queries):.4f}s)"
+            response["X-Profile-Hotspots"] = "; ".join(get_hotspots(profiler, settings.PROFILING_HOTSPOTS))
+        return response
+
+    def is_requested(self, request: HttpRequest) -> bool:
+        """Return whether a staff user asked for a request to be profiled."""
+        return bool(request.headers.get(settings.PROFILING_HEADER)) and is_staff(request)
+
+
+def is_staff(request: HttpRequest) -> bool:
+    """Return whether a request is from a staff user, by session or by token."""
+    from rest_framework.exceptions import AuthenticationFailed
+    from accounts.authentication import CachedJWTAuthentication
+
+    if request.user.is_authenticated:
+        return request.user.is_staff
+    try:
+        result = CachedJWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return False
+    return result is not None and result[0].is_staff
+
+
+def get_query_time(queries: list[dict]) -> float:
+    return sum(float(query["time"]) for query in queries)
+
+
+def get_hotspots(profiler: cProfile.Profile, count: int) -> list[str]:
+    """Describe the functions with the most time spent in them (excluding their callees)."""
+    stats = pstats.Stats(profiler, stream=io.StringIO()).sort_stats(pstats.SortKey.TIME)
+    hotspots = []
+    for function in stats.fcn_list[:count]:
+        filename, line, name = function
+        total_time = stats.stats[function][2]
+        hotspots.append(f"{os.path.basename(filename)}:{line}({name}) {total_time:.4f}s")
+    return hotspots
+
+
+def save_profile(request: HttpRequest, profiler: cProfile.Profile, queries: list[dict], seconds: float) -> str:
+    """Write a request's profile and SQL queries to the profiling directory. Returns the profile's id."""
+
+    path = re.sub(r"[^\w-]+", "-", request.path).strip("-") or "root"
+    profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{request.method.lower()}-{path}-{uuid.uuid4().hex[:8]}"
+
+    os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+    profiler.dump_stats(os.path.join(settings.PROFILING_DIR, f"{profile_id}.prof"))
+    with open(os.path.join(settings.PROFILING_DIR, f"{profile_id}.sql.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "method": request.method,
+            "path": request.get_full_path(),
+            "seconds": seconds,
+            "query_seconds": get_query_time(queries),
+            "queries": [{"sql": query["sql"], "seconds": float(query["time"])} for query in queries],
+        }, f, indent=2)
+
+    return profile_id
@@ -59,6 +59,7 @@ INSTALLED_APPS = [
     'courses.apps.CoursesConfig',
     'alerts.apps.AlertsConfig',
     'scheduling.apps.SchedulingConfig',
+    'config.apps.ConfigConfig',
 ]
 
 MIDDLEWARE = [
@@ -68,6 +69,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'config.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -179,6 +181,32 @@ else:
         }
     }
 
+# MyCampus API settings (e.g. pointed at `manage.py fakemycampus` for offline testing)
+MYCAMPUS_BASE_URL = os.getenv("MYCAMPUS_BASE_URL", "https://ssp.mycampus.ca/StudentRegistrationSsb/ssb")
+
+# Metrics settings (exported at /metrics to requests bearing METRICS_TOKEN, and logged as JSON lines if METRICS_LOG is set)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "False") == "True"
+METRICS_LOG = os.getenv("METRICS_LOG", "False") == "True"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "config.metrics": {"handlers": ["console"], "level": "INFO", "propagate": False},
+    },
+}
+
+# Profiling settings (profiles a sample of requests, and staff requests sent with the header)
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "False") == "True"
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_HEADER = "X-Profile"
+PROFILING_DIR = os.getenv("PROFILING_DIR", BASE_DIR / "profiles")
+PROFILING_HOTSPOTS = 5
+
 # Celery settings
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL")
 CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND")
@@ -189,16 +217,28 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'alerts.tasks.send_alerts_task',
         'schedule': crontab(minute=0),
     },
+    'deliver-outbox-task': {
+        'task': 'alerts.tasks.deliver_outbox_task',
+        'schedule': crontab(minute='*'),
+    },
+    'purge-outbox-task': {
+        'task': 'alerts.tasks.purge_outbox_task',
+        'schedule': crontab(minute=15, hour=4),
+    },
+    'downsample-enrollment-snapshots-task': {
+        'task': 'courses.tasks.downsample_enrollment_snapshots_task',
+        'schedule': crontab(minute=30, hour=4),
+    },
 }
 
 # Rest framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle',
+        'accounts.throttles.SlidingWindowAnonRateThrottle',
+        'accounts.throttles.SlidingWindowUserRateThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '60/min',
@@ -0,0 +1,74 @@
+import os
+import sys
+import json
+import subprocess
+from collections import defaultdict
+from dataclasses import dataclass
+
+from django.conf import settings
+
+
+# Code which loads what each kind of process loads before handling its first request or task
+ENTRY_POINTS = {
+    "web": (
+        "import config.wsgi\n"
+        "from django.urls import get_resolver\n"
+        "get_resolver().url_patterns\n"
+    ),
+    "worker": (
+        "import django\n"
+        "django.setup()\n"
+        "from config.celery import app\n"
+        "app.loader.import_default_modules()\n"
+    ),
+}
+
+# Modules which are slow to import, and are only loaded when they are first used
+HEAVY_MODULES = ["ortools", "numpy", "pandas", "google.protobuf", "twilio"]
+
+# The most modules the web entry point may load
+WEB_MODULE_BUDGET = 1300
+
+
+@dataclass
+class ImportTime:
+    """The time spent importing a module, as reported by `python -X importtime`."""
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def run_entry_point(entry: str, importtime: bool = False) -> subprocess.CompletedProcess:
+    """Load an entry point in a fresh interpreter, which prints the names of the modules loaded."""
+    code = ENTRY_POINTS[entry] + "import sys, json\nprint(json.dumps(sorted(sys.modules)))\n"
+    return subprocess.run(
+        [sys.executable, *(["-X", "importtime"] if importtime else []), "-c", code],
+        capture_output=True, text=True, check=True, cwd=settings.BASE_DIR,
+        env={**os.environ, "DJANGO_SETTINGS_MODULE": "config.settings"},
+    )
+
+
+def get_loaded_modules(entry: str) -> set[str]:
+    """Return the names of the modules loaded by an entry point."""
+    return set(json.loads(run_entry_point(entry).stdout.splitlines()[-1]))
+
+
+def get_import_times(entry: str) -> list[ImportTime]:
+    """Return the time spent importing each module loaded by an entry point, in the order they finished."""
+    import_times = []
+    for line in run_entry_point(entry, importtime=True).stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        depth = (len(module) - len(module.lstrip()) - 1) // 2
+        import_times.append(ImportTime(module.strip(), int(self_us), int(cumulative_us), depth))
+    return import_times
+
+
+def get_package_times(import_times: list[ImportTime]) -> dict[str, int]:
+    """Total the time spent importing the modules of each top-level package."""
+    package_times = defaultdict(int)
+    for import_time in import_times:
+        package_times[import_time.module.split(".")[0]] += import_time.self_us
+    return dict(package_times)
@@ -0,0 +1,48 @@
+from django.db import connection
+
+from accounts.authentication import user_cache
+from courses.models import Course, Term, Section
+
+
+class TokenTestMixin:
+    """Clears the users cached for tokens before each test, since rolled back tests can reuse user ids."""
+
+    def setUp(self):
+        super().setUp()
+        user_cache.clear()
+
+
+class QueryPlanMixin:
+    """Assertions about the query plans of querysets, for test cases."""
+
+    def assertUsesIndex(self, queryset, columns: list[str]):
+        """Assert that the query plan for a queryset searches an index on the given columns."""
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                # Small test tables would otherwise be scanned sequentially
+                cursor.execute("SET enable_seqscan = off")
+        plan = queryset.explain()
+        self.assertRegex(plan, r"SEARCH \S+ USING (COVERING )?INDEX|Index (Only )?Scan|Bitmap Index Scan")
+        for column in columns:
+            self.assertIn(column, plan)
+
+
+def make_course(subject: str = "TEST", course_number: str = "1000U", title: str = "Test Course") -> Course:
+    return Course.objects.create(
+        subject=subject, subject_description=subject.title(), subject_course=f"{subject}{course_number}",
+        course_title=title, course_number=course_number,
+    )
+
+
+def make_sections(term: Term, course: Course, n: int, is_section_linked: bool = False, meetings_faculty: list | None = None) -> list[Section]:
+    """Create `n` primary lecture sections of a course, with ids from 990000 and CRNs from 90000."""
+    meetings_faculty = meetings_faculty or []
+    sections = []
+    for i in range(n):
+        sections.append(Section.objects.create(
+            id=990000 + i, course_reference_number=str(90000 + i), part_of_term="1", sequence_number=str(i),
+            campus_description="OT-North Oshawa", schedule_type_description="Lecture",
+            is_section_linked=is_section_linked, faculty=[], meetings_faculty=meetings_faculty,
+            course=course, term=term, is_primary_section=True,
+        ))
+    return sections
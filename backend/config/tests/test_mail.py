@@ -0,0 +1,17 @@
+from unittest.mock import patch
+
+from django.core.mail import EmailMessage
+from django.test import SimpleTestCase, override_settings
+
+from config.mail import MailgunEmailBackend
+
+
+class TestMailgunEmailBackend(SimpleTestCase):
+
+    @override_settings(MAILGUN_DOMAIN="example.com", MAILGUN_API_KEY="key")
+    @patch("requests.Session.post")
+    def test_extra_headers(self, mock_post):
+
+        message = EmailMessage("Subject", "Body", "from@example.com", ["to@example.com"], headers={"X-Idempotency-Key": "key"})
+        self.assertEqual(MailgunEmailBackend().send_messages([message]), 1)
+        self.assertEqual(mock_post.call_args.kwargs["data"]["h:X-Idempotency-Key"], "key")
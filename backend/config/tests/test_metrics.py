@@ -0,0 +1,83 @@
+from unittest import mock
+
+import requests
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from config import metrics
+from courses import api
+from courses import cache as section_cache
+
+
+@override_settings(METRICS_ENABLED=True, METRICS_TOKEN="secret")
+class TestMetrics(TestCase):
+
+    def setUp(self) -> None:
+        metrics.registry.clear()
+        section_cache.local_cache.clear()
+
+
+    def test_render(self):
+
+        metrics.increment("requests_total", endpoint="a")
+        metrics.increment("requests_total", 2, endpoint="a")
+        metrics.observe("request_seconds", 0.02, endpoint="a")
+        metrics.observe("request_seconds", 100, endpoint="a")
+
+        text = metrics.registry.render()
+        self.assertIn('# TYPE requests_total counter\nrequests_total{endpoint="a"} 3', text)
+        self.assertIn('# TYPE request_seconds histogram', text)
+        self.assertIn('request_seconds_bucket{endpoint="a",le="0.01"} 0', text)
+        self.assertIn('request_seconds_bucket{endpoint="a",le="0.025"} 1', text)
+        self.assertIn('request_seconds_bucket{endpoint="a",le="+Inf"} 2', text)
+        self.assertIn('request_seconds_sum{endpoint="a"} 100.02', text)
+        self.assertIn('request_seconds_count{endpoint="a"} 2', text)
+
+
+    def test_disabled(self):
+
+        with override_settings(METRICS_ENABLED=False):
+            metrics.increment("requests_total")
+            with metrics.timer("request_seconds"):
+                pass
+            self.assertEqual(self.client.get(reverse("metrics")).status_code, 404)
+        self.assertEqual(metrics.registry.render(), "\n")
+
+
+    def test_view(self):
+
+        metrics.increment("requests_total")
+        response = self.client.get(reverse("metrics"), headers={"Authorization": "Bearer secret"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"requests_total 1", response.content)
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 401)
+        self.assertEqual(self.client.get(reverse("metrics"), headers={"Authorization": "Bearer wrong"}).status_code, 401)
+
+        # Metrics are denied if no token is set
+        with override_settings(METRICS_TOKEN=None):
+            response = self.client.get(reverse("metrics"), headers={"Authorization": "Bearer None"})
+            self.assertEqual(response.status_code, 401)
+
+
+    def test_api_errors(self):
+
+        with mock.patch("courses.api.requests.request", side_effect=requests.ConnectionError):
+            with self.assertRaises(requests.ConnectionError):
+                api.get_linked_sections("202409", "12345")
+
+        text = metrics.registry.render()
+        self.assertIn('mycampus_errors_total{endpoint="searchResults/fetchLinkedSections"} 1', text)
+        self.assertIn('mycampus_request_seconds_count{endpoint="searchResults/fetchLinkedSections"} 1', text)
+
+
+    def test_cache_hits(self):
+
+        section_cache.set_many({"metrics_a": 1, "metrics_b": 2}, timeout=60)
+        section_cache.local_cache.clear()
+        section_cache.get_many(["metrics_a", "metrics_b", "metrics_c"])
+        section_cache.get_many(["metrics_a"])
+
+        text = metrics.registry.render()
+        self.assertIn('section_cache_hits_total{layer="local"} 1', text)
+        self.assertIn('section_cache_hits_total{layer="shared"} 2', text)
+        self.assertIn('section_cache_misses_total 1', text)
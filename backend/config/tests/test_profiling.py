@@ -0,0 +1,70 @@
+import os
+import json
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from accounts.tokens import UserRefreshToken
+from config.testing import TokenTestMixin
+from courses.models import Term
+
+
+class TestProfilingMiddleware(TokenTestMixin, APITestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        Term.objects.create(term="202409", term_desc="Fall 2024")
+
+
+    def test_profile_staff_requests(self):
+
+        user = get_user_model().objects.create_user(email="staff@example.com", password="password")
+        access = UserRefreshToken.for_user(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+        with override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=0, PROFILING_DIR=self.directory.name):
+
+            # Only staff users can ask for a profile
+            response = self.client.get(reverse("terms"), headers={"X-Profile": "1"})
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("X-Profile-Id", response)
+
+            user.is_staff = True
+            user.save()
+            user.revoke_tokens()
+            access = UserRefreshToken.for_user(user).access_token
+            self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+            response = self.client.get(reverse("terms"), headers={"X-Profile": "1"})
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("X-Profile-Hotspots", response)
+            self.assertRegex(response["X-Profile-Queries"], r"^\d+ \(")
+
+        profile_id = response["X-Profile-Id"]
+        self.assertTrue(os.path.exists(os.path.join(self.directory.name, f"{profile_id}.prof")))
+        with open(os.path.join(self.directory.name, f"{profile_id}.sql.json"), "r", encoding="utf-8") as f:
+            profile = json.load(f)
+        self.assertEqual(profile["path"], reverse("terms"))
+        self.assertTrue(any("courses_term" in query["sql"] for query in profile["queries"]))
+
+
+    def test_sample_rate(self):
+
+        # Sampled requests are profiled without telling the client
+        with override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=1, PROFILING_DIR=self.directory.name):
+            response = self.client.get(reverse("terms"), headers={"X-Profile": "1"})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any(header.startswith("X-Profile") for header in response.headers))
+        files = os.listdir(self.directory.name)
+        self.assertEqual(len([name for name in files if name.endswith(".prof")]), 1)
+        self.assertEqual(len([name for name in files if name.endswith(".sql.json")]), 1)
+
+        # Middleware is loaded once per client, and left out entirely when disabled
+        with override_settings(PROFILING_ENABLED=False, PROFILING_SAMPLE_RATE=1, PROFILING_DIR=self.directory.name):
+            self.client_class().get(reverse("terms"))
+        self.assertEqual(len(os.listdir(self.directory.name)), 2)
@@ -0,0 +1,29 @@
+from django.test import SimpleTestCase
+
+from config.startup import HEAVY_MODULES, WEB_MODULE_BUDGET, get_loaded_modules, get_import_times
+
+
+class TestStartup(SimpleTestCase):
+
+    def test_web_import_budget(self):
+
+        modules = get_loaded_modules("web")
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, modules)
+        self.assertLessEqual(len(modules), WEB_MODULE_BUDGET)
+
+
+    def test_worker_imports(self):
+
+        modules = get_loaded_modules("worker")
+        self.assertIn("alerts.tasks", modules)
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, modules)
+
+
+    def test_import_times(self):
+
+        import_times = get_import_times("web")
+        modules = {import_time.module: import_time for import_time in import_times}
+        self.assertEqual(modules["config.wsgi"].depth, 0)
+        self.assertGreaterEqual(modules["config.wsgi"].cumulative_us, modules["config.wsgi"].self_us)
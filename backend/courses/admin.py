@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Course, Section, Term
+from .models import Course, Section, Term, LinkedSection, EnrollmentSnapshot
 
 
 @admin.register(Course)
@@ -14,4 +14,14 @@ class SectionAdmin(admin.ModelAdmin):
 
 @admin.register(Term)
 class TermAdmin(admin.ModelAdmin):
-    pass
\ No newline at end of file
+    pass
+
+
+@admin.register(LinkedSection)
+class LinkedSectionAdmin(admin.ModelAdmin):
+    raw_id_fields = ['primary_section']
+
+
+@admin.register(EnrollmentSnapshot)
+class EnrollmentSnapshotAdmin(admin.ModelAdmin):
+    raw_id_fields = ['section']
\ No newline at end of file
@@ -1,16 +1,47 @@
 import re
 
 import requests
+from django.conf import settings
+
+from config import metrics
 
 
-BASE_URL = "https://ssp.mycampus.ca/StudentRegistrationSsb/ssb"
 MEP_CODE = "UOIT"
 
+# Seconds to wait to connect to MyCampus, and for each read of its response
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+
+
+def get_timeout(deadline: float | None = None) -> tuple[float, float]:
+    """Return the (connect, read) timeouts for a request, which may be no longer than a caller's deadline."""
+    if deadline is None:
+        return CONNECT_TIMEOUT, READ_TIMEOUT
+    return min(CONNECT_TIMEOUT, deadline), min(READ_TIMEOUT, deadline)
+
+
+def request(method: str, endpoint: str, timeout: float | None = None, **kwargs) -> requests.Response:
+    """
+    Make a request to an endpoint of the MyCampus API, recording its latency and any error.
+
+    Requests give up after `timeout` seconds without a connection or a response, so that a stalled
+    server does not hold the calling thread indefinitely.
+    """
+    with metrics.timer("mycampus_request_seconds", endpoint=endpoint):
+        try:
+            response = requests.request(
+                method, f"{settings.MYCAMPUS_BASE_URL}/{endpoint}", timeout=get_timeout(timeout), **kwargs
+            )
+            response.raise_for_status()
+        except requests.RequestException:
+            metrics.increment("mycampus_errors_total", endpoint=endpoint)
+            raise
+    return response
+
 
 def search_course_codes(query: str, term: str, offset: int = 1, limit: int = 10):
     """Search for courses by course code and description."""
 
-    url = f"{BASE_URL}/classSearch/get_subjectcoursecombo"
     params = {
         "searchTerm": query,
         "term": term,
@@ -18,8 +49,7 @@ def search_course_codes(query: str, term: str, offset: int = 1, limit: int = 10)
         "max": limit,
         "mepCode": MEP_CODE,
     }
-    response = requests.get(url, params=params)
-    response.raise_for_status()
+    response = request("GET", "classSearch/get_subjectcoursecombo", params=params)
     return response.json()
 
 
@@ -30,9 +60,7 @@ def reset_data_form(jsessionid: str):
         "JSESSIONID": jsessionid,
     }
 
-    url = f"{BASE_URL}/classSearch/resetDataForm"
-    response = requests.post(url, cookies=cookies)
-    response.raise_for_status()
+    request("POST", "classSearch/resetDataForm", cookies=cookies)
 
 
 def get_sections(jsessionid: str, term: str, course_code: str = None, schedule_type: str = None, offset: int = 0, limit: int = 10):
@@ -44,7 +72,6 @@ def get_sections(jsessionid: str, term: str, course_code: str = None, schedule_t
         "JSESSIONID": jsessionid,
     }
     
-    url = f"{BASE_URL}/searchResults/searchResults"
     params = {
         "txt_subjectcoursecombo": course_code,
         "txt_term": term,
@@ -57,8 +84,7 @@ def get_sections(jsessionid: str, term: str, course_code: str = None, schedule_t
         "sortDirection": "asc",
         "mepCode": MEP_CODE,
     }
-    response = requests.get(url, params=params, cookies=cookies)
-    response.raise_for_status()
+    response = request("GET", "searchResults/searchResults", params=params, cookies=cookies)
 
     data = response.json()
     if data["data"] is None:
@@ -70,29 +96,25 @@ def get_sections(jsessionid: str, term: str, course_code: str = None, schedule_t
 def get_linked_sections(term: str, course_reference_number: str):
     """Get linked sections for a given course reference number."""
 
-    url = f"{BASE_URL}/searchResults/fetchLinkedSections"
     params = {
         "term": term,
         "courseReferenceNumber": course_reference_number,
         "mepCode": MEP_CODE,
     }
-    response = requests.get(url, params=params)
-    response.raise_for_status()
+    response = request("GET", "searchResults/fetchLinkedSections", params=params)
 
     return response.json()
 
 
-def get_enrollment_info(term: str, course_reference_number: str):
+def get_enrollment_info(term: str, course_reference_number: str, timeout: float | None = None):
     """Returns information regarding course availability."""
 
-    url = f"{BASE_URL}/searchResults/getEnrollmentInfo"
     params = {
         "term": term,
         "courseReferenceNumber": course_reference_number,
         "mepCode": MEP_CODE,
     }
-    response = requests.post(url, params=params)
-    response.raise_for_status()
+    response = request("POST", "searchResults/getEnrollmentInfo", timeout=timeout, params=params)
 
     # Parse response.text to get enrollment info
     patterns = {
@@ -0,0 +1,101 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError
+
+from django.core.cache import cache
+
+from config import metrics
+from config.cache import LocalCache, SingleFlight
+from . import api
+
+
+ENROLLMENT_INFO_TIMEOUT = 60 * 60 * 24
+
+# Entries are kept in process memory briefly, in front of the shared cache
+local_cache = LocalCache(maxsize=4096, timeout=60)
+single_flight = SingleFlight()
+
+
+def get_many(keys: list[str]) -> dict:
+    """Read many keys from the local cache, falling back to the shared cache in a single round trip."""
+    values = local_cache.get_many(keys)
+    missing = [key for key in keys if key not in values]
+    metrics.increment("section_cache_hits_total", len(values), layer="local")
+    if missing:
+        found = cache.get_many(missing)
+        local_cache.set_many(found)
+        values.update(found)
+        metrics.increment("section_cache_hits_total", len(found), layer="shared")
+        metrics.increment("section_cache_misses_total", len(missing) - len(found))
+    return values
+
+
+def set_many(mapping: dict, timeout: int | None) -> None:
+    """Write many keys to both the local and shared caches."""
+    if mapping:
+        cache.set_many(mapping, timeout=timeout)
+        local_cache.set_many(mapping)
+
+
+def enrollment_info_key(section_id: int) -> str:
+    return f"enrollment_info_{section_id}"
+
+
+def fetch_enrollment_info(section, timeout: float | None = None) -> dict:
+    """Fetch the enrollment info for a section, sharing the request with concurrent callers."""
+    return single_flight.do(
+        enrollment_info_key(section.id),
+        lambda: api.get_enrollment_info(section.term_id, section.course_reference_number, timeout=timeout),
+    )
+
+
+def get_enrollment_infos(sections: list, force_refresh: bool = False, max_workers: int = 8, timeout: float | None = None) -> dict[int, dict]:
+    """
+    Return the enrollment information for many sections, keyed by section id.
+
+    Cached entries are read with a single round trip, unless `force_refresh` is set. Misses are fetched 
+    concurrently from the API, and any section that cannot be fetched within `timeout` seconds 
+    (or whose request fails) is left out of the result.
+    """
+
+    enrollment_infos = {}
+    if not force_refresh:
+        keys = {enrollment_info_key(section.id): section for section in sections}
+        enrollment_infos = {
+            keys[key].id: value for key, value in get_many(list(keys)).items()
+        }
+
+    missing = list({section.id: section for section in sections if section.id not in enrollment_infos}.values())
+    if not missing:
+        return enrollment_infos
+
+    fetched = {}
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(missing)))
+    # Requests time out by the deadline too, so their threads don't outlive it
+    futures = {executor.submit(fetch_enrollment_info, section, timeout): section for section in missing}
+    try:
+        for future in as_completed(futures, timeout=timeout):
+            section = futures[future]
+            try:
+                enrollment_infos[section.id] = future.result()
+            except Exception:
+                continue
+            fetched[enrollment_info_key(section.id)] = enrollment_infos[section.id]
+    except TimeoutError:
+        pass
+    finally:
+        # Don't hold up the caller for requests that missed the deadline
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    set_many(fetched, timeout=ENROLLMENT_INFO_TIMEOUT)
+    return enrollment_infos
+
+
+def get_enrollment_info(section, force_refresh: bool = False) -> dict:
+    """Return the enrollment information for a single section, raising any error from the API."""
+    key = enrollment_info_key(section.id)
+    if not force_refresh:
+        value = get_many([key]).get(key)
+        if value is not None:
+            return value
+    value = fetch_enrollment_info(section)
+    set_many({key: value}, timeout=ENROLLMENT_INFO_TIMEOUT)
+    return value
@@ -0,0 +1,104 @@
+import json
+import time
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from .synthetic import SyntheticTerm
+
+
+class FakeMyCampusServer(ThreadingHTTPServer):
+    """
+    A local stand-in for the MyCampus API, serving the endpoints used in `courses.api`.
+
+    Responses are delayed by about `latency` seconds, and a fraction `error_rate`
+    of requests fail with a 503 error. Point `MYCAMPUS_BASE_URL` at `base_url` to use it.
+    Every request received is counted in `request_count`.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, terms: list[SyntheticTerm], host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        super().__init__((host, port), FakeMyCampusRequestHandler)
+        self.terms = {term.term: term for term in terms}
+        self.latency = latency
+        self.error_rate = error_rate
+        self.request_count = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/StudentRegistrationSsb/ssb"
+
+    def start(self) -> None:
+        """Serve requests in a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+
+class FakeMyCampusRequestHandler(BaseHTTPRequestHandler):
+
+    server: FakeMyCampusServer
+
+    def do_GET(self):
+        self.handle_request()
+
+    def do_POST(self):
+        self.handle_request()
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle_request(self):
+        url = urlsplit(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        endpoint = "/".join(url.path.rstrip("/").split("/")[-2:])
+        with self.server._lock:
+            self.server.request_count += 1
+
+        # Simulate a slow and unreliable server
+        if self.server.latency:
+            time.sleep(self.server.latency * self.server._random.uniform(0.5, 1.5))
+        if self.server._random.random() < self.server.error_rate:
+            return self.send_body(503, "text/plain", "Service Unavailable")
+
+        term = self.server.terms.get(params.get("term") or params.get("txt_term"))
+
+        if endpoint == "classSearch/resetDataForm":
+            return self.send_body(200, "application/json", "true")
+        if term is None:
+            return self.send_json({"success": False, "totalCount": 0, "data": None})
+        if endpoint == "classSearch/get_subjectcoursecombo":
+            return self.send_json(term.search_course_codes(
+                params.get("searchTerm", ""), int(params.get("offset", 1)), int(params.get("max", 10))
+            ))
+        if endpoint == "searchResults/searchResults":
+            return self.send_json(term.search_sections(
+                params.get("txt_subjectcoursecombo"), int(params.get("pageOffset", 0)), int(params.get("pageMaxSize", 10))
+            ))
+        if endpoint == "searchResults/fetchLinkedSections":
+            return self.send_json(term.get_linked_sections(params.get("courseReferenceNumber")))
+        if endpoint == "searchResults/getEnrollmentInfo":
+            return self.send_body(200, "text/html", term.render_enrollment_info(params.get("courseReferenceNumber")))
+        return self.send_body(404, "text/plain", "Not Found")
+
+    def send_json(self, data) -> None:
+        self.send_body(200, "application/json", json.dumps(data))
+
+    def send_body(self, status: int, content_type: str, body: str) -> None:
+        body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
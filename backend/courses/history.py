@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from .models import EnrollmentSnapshot
+
+# The number of sections looked up at a time
+BATCH_SIZE = 500
+
+# Snapshots older than each age are reduced to (at most) one per interval
+DOWNSAMPLING_TIERS = [
+    (timedelta(days=7), timedelta(hours=1)),
+    (timedelta(days=90), timedelta(days=1)),
+]
+
+# How far past each tier's age to look for snapshots that have not been downsampled yet
+DOWNSAMPLING_LOOKBACK = timedelta(days=2)
+
+
+def get_latest_snapshots(section_ids: list[int]) -> dict[int, EnrollmentSnapshot]:
+    """Return the most recent snapshot for each section which has one."""
+    latest = {}
+    for i in range(0, len(section_ids), BATCH_SIZE):
+        latest_id = (
+            EnrollmentSnapshot.objects
+            .filter(section_id=OuterRef("section_id"))
+            .order_by("-created_at", "-id")
+            .values("id")[:1]
+        )
+        snapshots = EnrollmentSnapshot.objects.filter(
+            section_id__in=section_ids[i:i + BATCH_SIZE], id=Subquery(latest_id)
+        )
+        latest.update((snapshot.section_id, snapshot) for snapshot in snapshots)
+    return latest
+
+
+def record_enrollment_snapshots(enrollment_infos: dict[int, dict], created_at: datetime | None = None) -> int:
+    """Record the enrollment of each section whose enrollment changed. Returns the number of snapshots."""
+    if created_at is None:
+        created_at = timezone.now()
+
+    latest = get_latest_snapshots(list(enrollment_infos))
+    snapshots = []
+    for section_id, enrollment_info in enrollment_infos.items():
+        snapshot = EnrollmentSnapshot.from_enrollment_info(section_id, enrollment_info, created_at)
+        if section_id not in latest or latest[section_id].get_values() != snapshot.get_values():
+            snapshots.append(snapshot)
+
+    EnrollmentSnapshot.objects.bulk_create(snapshots, batch_size=1000)
+    return len(snapshots)
+
+
+def downsample_enrollment_snapshots(now: datetime | None = None, full: bool = False) -> int:
+    """
+    Keep only the last snapshot in each interval for old snapshots. Returns the number deleted.
+
+    Only snapshots which recently passed each tier's age are scanned, unless `full` is set.
+    """
+    if now is None:
+        now = timezone.now()
+
+    deleted = 0
+    for age, interval in DOWNSAMPLING_TIERS:
+        snapshots = EnrollmentSnapshot.objects.filter(created_at__lt=now - age)
+        if not full:
+            snapshots = snapshots.filter(created_at__gte=now - age - DOWNSAMPLING_LOOKBACK)
+        snapshots = snapshots.order_by("section_id", "created_at", "id").values_list("id", "section_id", "created_at")
+
+        # Delete all but the last snapshot of each section in each interval
+        ids = []
+        previous = None
+        for id, section_id, created_at in snapshots.iterator(chunk_size=2000):
+            bucket = (section_id, int(created_at.timestamp() // interval.total_seconds()))
+            if previous is not None and previous[1] == bucket:
+                ids.append(previous[0])
+            previous = (id, bucket)
+            if len(ids) >= BATCH_SIZE:
+                deleted += delete_snapshots(ids)
+                ids = []
+        deleted += delete_snapshots(ids)
+
+    return deleted
+
+
+def delete_snapshots(ids: list[int]) -> int:
+    count, _ = EnrollmentSnapshot.objects.filter(id__in=ids).delete()
+    return count
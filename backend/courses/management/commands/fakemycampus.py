@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from courses.fakeserver import FakeMyCampusServer
+from courses.synthetic import SyntheticTerm
+from courses.management.commands.updatesections import get_sections_snapshot_path
+
+
+class Command(BaseCommand):
+    help = "Run a local stand-in for the MyCampus API with synthetic or recorded terms"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("terms", nargs="+", type=str, help="The terms to serve")
+        parser.add_argument("--host", type=str, default="127.0.0.1", help="The host to listen on")
+        parser.add_argument("--port", type=int, default=8001, help="The port to listen on")
+        parser.add_argument("--courses", type=int, default=500, help="The number of courses in each synthetic term")
+        parser.add_argument("--replay", action="store_true", help="Serve the raw data recorded by updatesections instead")
+        parser.add_argument("--latency", type=float, default=0.0, help="The average delay of each response in seconds")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="The fraction of requests which fail")
+        parser.add_argument("--volatility", type=float, default=0.1, help="The chance that a section's enrollment changes between requests")
+        parser.add_argument("--seed", type=int, default=0, help="The seed for generated data and simulated errors")
+
+    def handle(self, *args, **options):
+
+        terms = []
+        for term in options["terms"]:
+            if options["replay"]:
+                if get_sections_snapshot_path(term) is None:
+                    raise CommandError(f"No cached data found for term: {term}")
+                terms.append(SyntheticTerm.replay(term, seed=options["seed"], volatility=options["volatility"]))
+            else:
+                terms.append(SyntheticTerm.generate(
+                    term, courses=options["courses"], seed=options["seed"], volatility=options["volatility"]
+                ))
+
+        server = FakeMyCampusServer(
+            terms, host=options["host"], port=options["port"], 
+            latency=options["latency"], error_rate=options["error_rate"], seed=options["seed"],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Serving {sum(len(term.sections) for term in terms)} sections at {server.base_url}\n"
+            f"Set MYCAMPUS_BASE_URL={server.base_url} to use this server"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -1,12 +1,26 @@
+import os
 import sys
+import gzip
 import html
 import json
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator
 
 from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import transaction
 
-from courses.models import Course, Term, Section
-from courses.api import get_sections
+from courses.models import Course, Term, Section, Meeting, LinkedSection, parse_linked_crns
+from courses.api import get_sections, get_linked_sections
+from courses.search import invalidate_search_index
+from courses.versioning import bump_data_version
+from courses.tasks import warm_cache_task
+
+
+SNAPSHOT_DIR = "courses/data/raw"
+
+# The number of sections written to the database at a time
+BATCH_SIZE = 500
 
 
 class Command(BaseCommand):
@@ -16,77 +30,103 @@ class Command(BaseCommand):
         parser.add_argument("term", type=str, help="The term to update the course sections for")
         parser.add_argument("--usecache", action="store_true", help="Use cached data instead of fetching from the API")
         parser.add_argument("--jsessionid", type=str, help="A valid JSESSIONID cookie value")
+        parser.add_argument("--workers", type=int, default=8, help="The number of concurrent requests for linked sections")
 
     def handle(self, *args, **options):
 
         if not options["usecache"] and not options["jsessionid"]:
             raise CommandError("You must provide a JSESSIONID cookie value when not the --usecache option")
 
-        # Load the course sections from a file or fetch them from the API
-        if options["usecache"]:
-            try:
-                with open(f"courses/data/raw/sections/{options['term']}.json", "r", encoding="utf-8") as f:
-                    sections = json.load(f)
-            except FileNotFoundError:
-                raise CommandError(f"No cached data found for term: {options['term']}")
-        else:
+        # Fetch the course sections from the API, streaming them into a snapshot file
+        if not options["usecache"]:
             try:
-                sections = get_all_sections(options["term"], options["jsessionid"])
+                save_sections_snapshot(
+                    options["term"], iter_all_sections(options["term"], options["jsessionid"])
+                )
             except BaseException as e:
                 raise CommandError(f"Failed to retrieve course sections: {e}")
-        
-        # Save the raw data to a file
-        if not options["usecache"]:
-            with open(f"courses/data/raw/sections/{options['term']}.json", "w", encoding="utf-8") as f:
-                json.dump(sections, f, indent=2)
-
-        # Unescape HTML entities
-        sections = unescape(sections)
-
-        # Get the CRNs of the primary sections for each course
-        primary_section_crns = get_primary_section_crns(sections)
-
-        for section in sections:
 
-            # Create or update each course
-            course, _ = Course.objects.update_or_create(
+        if get_sections_snapshot_path(options["term"]) is None:
+            raise CommandError(f"No cached data found for term: {options['term']}")
+
+        # Get the CRNs of the primary sections for each course, along with each course and term
+        summaries = []
+        courses = {}
+        term_desc = None
+        for section in read_sections_snapshot(options["term"]):
+            summaries.append({
+                key: section[key] for key in 
+                ("courseReferenceNumber", "subjectCourse", "scheduleTypeDescription", "isSectionLinked")
+            })
+            courses[section["subjectCourse"]] = Course(
                 subject_course=section["subjectCourse"],
-                defaults={
-                    "subject": section["subject"],
-                    "subject_description": section["subjectDescription"],
-                    "course_title": section["courseTitle"],
-                    "course_number": section["courseNumber"],
-                }
+                subject=section["subject"],
+                subject_description=section["subjectDescription"],
+                course_title=section["courseTitle"],
+                course_number=section["courseNumber"],
             )
+            term_desc = section["termDesc"]
+        primary_section_crns = get_primary_section_crns(summaries)
 
-            # Create or update each term
-            term, _ = Term.objects.update_or_create(
-                term=section["term"],
-                defaults={"term_desc": section["termDesc"]}
-            )
+        with transaction.atomic():
 
-            # Create or update each section
-            section, _ = Section.objects.update_or_create(
-                id=section["id"],
-                defaults={
-                    "course_reference_number": section["courseReferenceNumber"],
-                    "part_of_term": section["partOfTerm"],
-                    "sequence_number": section["sequenceNumber"],
-                    "campus_description": section["campusDescription"],
-                    "schedule_type_description": section["scheduleTypeDescription"],
-                    "credit_hours": section["creditHours"],
-                    "credit_hour_high": section["creditHourHigh"],
-                    "credit_hour_low": section["creditHourLow"],
-                    "credit_hour_indicator": section["creditHourIndicator"],
-                    "link_identifier": section["linkIdentifier"],
-                    "is_section_linked": section["isSectionLinked"],
-                    "faculty": section["faculty"],
-                    "meetings_faculty": section["meetingsFaculty"],
-                    "course": course,
-                    "term": term,
-                    "is_primary_section": section['courseReferenceNumber'] in primary_section_crns,
-                }
+            # Create or update the term and each course
+            if term_desc is not None:
+                Term.objects.update_or_create(term=options["term"], defaults={"term_desc": term_desc})
+            Course.objects.bulk_create(
+                courses.values(), batch_size=BATCH_SIZE, update_conflicts=True, unique_fields=["subject_course"],
+                update_fields=["subject", "subject_description", "course_title", "course_number"],
             )
+            del courses
+
+            # Create or update each section (and its meetings) in batches
+            Meeting.objects.filter(section__term__term=options["term"]).delete()
+            batch = []
+            for section in read_sections_snapshot(options["term"]):
+                batch.append(section)
+                if len(batch) >= BATCH_SIZE:
+                    save_sections(batch, primary_section_crns)
+                    batch = []
+            save_sections(batch, primary_section_crns)
+
+            save_term_courses(options["term"])
+
+        invalidate_search_index()
+
+        # Load the linked sections for each primary section from a file or fetch them from the API
+        linked_sections_path = get_linked_snapshot_path(options["term"])
+        primary_crns = [
+            section["courseReferenceNumber"] for section in summaries
+            if section["isSectionLinked"] and section["courseReferenceNumber"] in primary_section_crns
+        ]
+        if options["usecache"]:
+            try:
+                with open(linked_sections_path, "r", encoding="utf-8") as f:
+                    linked_crns = json.load(f)
+            except FileNotFoundError:
+                # Linked sections will be fetched on demand instead
+                linked_crns = None
+        else:
+            try:
+                linked_crns = get_all_linked_crns(options["term"], primary_crns, options["workers"])
+            except BaseException as e:
+                raise CommandError(f"Failed to retrieve linked sections: {e}")
+            os.makedirs(os.path.dirname(linked_sections_path), exist_ok=True)
+            with open(linked_sections_path, "w", encoding="utf-8") as f:
+                json.dump(linked_crns, f)
+
+        if linked_crns is not None:
+            save_linked_crns(options["term"], linked_crns)
+
+        bump_data_version(options["term"])
+
+        # Warm the cache for freshly ingested data in the background. The data is already saved,
+        # so an unavailable broker only leaves the cache to fill on demand
+        if not options["usecache"]:
+            try:
+                warm_cache_task.delay(options["term"], options["workers"])
+            except Exception as e:
+                self.stdout.write(self.style.WARNING(f"Failed to queue cache warming: {e}"))
 
         if "test" not in sys.argv:
             self.stdout.write(
@@ -94,22 +134,143 @@ class Command(BaseCommand):
             )
 
 
-def get_all_sections(term: str, jsessionid: str):
-    """Retrieve all course sections for a given term."""
+def iter_all_sections(term: str, jsessionid: str) -> Iterator[dict]:
+    """Retrieve all course sections for a given term, one page at a time."""
     
-    data = []
     offset = 0
     limit = 500
 
     while True:
         result = get_sections(jsessionid, term, offset=offset, limit=limit)
-        data.extend(result["data"])
+        yield from result["data"]
 
         offset += limit
         if offset >= result['totalCount']:
             break
 
-    return data
+
+def get_sections_snapshot_path(term: str) -> str | None:
+    """Return the path of the raw sections snapshot for a term, preferring compressed snapshots."""
+    for path in (f"{SNAPSHOT_DIR}/sections/{term}.jsonl.gz", f"{SNAPSHOT_DIR}/sections/{term}.json"):
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def get_linked_snapshot_path(term: str) -> str:
+    """Return the path of the raw linked sections snapshot for a term."""
+    return f"{SNAPSHOT_DIR}/linked/{term}.json"
+
+
+def save_sections_snapshot(term: str, sections: Iterable[dict]) -> None:
+    """Write raw sections to a gzipped snapshot, one JSON record per line."""
+    path = f"{SNAPSHOT_DIR}/sections/{term}.jsonl.gz"
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        with gzip.open(f"{path}.tmp", "wt", encoding="utf-8") as f:
+            for section in sections:
+                f.write(json.dumps(section, separators=(",", ":")))
+                f.write("\n")
+        os.replace(f"{path}.tmp", path)
+    finally:
+        # Left behind only if writing failed, since it is renamed otherwise
+        if os.path.exists(f"{path}.tmp"):
+            os.remove(f"{path}.tmp")
+
+
+def read_sections_snapshot(term: str) -> Iterator[dict]:
+    """Read (and unescape) the sections in a term's snapshot one at a time."""
+    path = get_sections_snapshot_path(term)
+    if path.endswith(".jsonl.gz"):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                yield unescape(json.loads(line))
+    else:
+        # Older, uncompressed snapshots hold a single JSON array
+        with open(path, "r", encoding="utf-8") as f:
+            for section in json.load(f):
+                yield unescape(section)
+
+
+def save_sections(sections: list[dict], primary_section_crns: set) -> None:
+    """Create or update a batch of sections and their meetings."""
+
+    objs = []
+    meetings = []
+    for section in sections:
+        obj = Section(
+            id=section["id"],
+            course_reference_number=section["courseReferenceNumber"],
+            part_of_term=section["partOfTerm"],
+            sequence_number=section["sequenceNumber"],
+            campus_description=section["campusDescription"],
+            schedule_type_description=section["scheduleTypeDescription"],
+            credit_hours=section["creditHours"],
+            credit_hour_high=section["creditHourHigh"],
+            credit_hour_low=section["creditHourLow"],
+            credit_hour_indicator=section["creditHourIndicator"],
+            link_identifier=section["linkIdentifier"],
+            is_section_linked=section["isSectionLinked"],
+            faculty=section["faculty"],
+            meetings_faculty=section["meetingsFaculty"],
+            course_id=section["subjectCourse"],
+            term_id=section["term"],
+            is_primary_section=section["courseReferenceNumber"] in primary_section_crns,
+        )
+        obj.update_time_bitmap()
+        objs.append(obj)
+        meetings.extend(Meeting.from_meetings_faculty(obj.id, section["meetingsFaculty"]))
+
+    # Linked sections are saved separately, so whether they were fetched is kept
+    Section.objects.bulk_create(
+        objs, update_conflicts=True, unique_fields=["id"],
+        update_fields=[
+            field.name for field in Section._meta.concrete_fields
+            if not field.primary_key and field.name != "linked_fetched"
+        ],
+    )
+    Meeting.objects.bulk_create(meetings)
+
+
+def get_all_linked_crns(term: str, course_reference_numbers: list[str], workers: int) -> dict[str, list[list[str]]]:
+    """Retrieve the linked CRNs for each of the given primary sections concurrently."""
+
+    def fetch(crn: str) -> list[list[str]]:
+        return parse_linked_crns(get_linked_sections(term, crn))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(fetch, course_reference_numbers)
+        return dict(zip(course_reference_numbers, results))
+
+
+def save_term_courses(term: str) -> None:
+    """Record the courses offered in a term."""
+    TermCourse = Course.terms.through
+    TermCourse.objects.bulk_create([
+        TermCourse(course_id=course_id, term_id=term)
+        for course_id in Section.objects.filter(term__term=term).order_by().values_list("course_id", flat=True).distinct()
+    ], ignore_conflicts=True)
+
+
+def save_linked_crns(term: str, linked_crns: dict[str, list[list[str]]]) -> None:
+    """Replace the stored linked sections for a term."""
+
+    section_ids = dict(
+        Section.objects.filter(
+            term__term=term, course_reference_number__in=linked_crns.keys()
+        ).values_list("course_reference_number", "id")
+    )
+
+    linked_sections = []
+    for crn, groups in linked_crns.items():
+        if crn in section_ids:
+            linked_sections.extend(LinkedSection.from_crns(section_ids[crn], groups))
+
+    with transaction.atomic():
+        LinkedSection.objects.filter(primary_section__term__term=term).delete()
+        LinkedSection.objects.bulk_create(linked_sections, batch_size=1000)
+        Section.objects.filter(term__term=term).update(linked_fetched=False)
+        Section.objects.filter(id__in=section_ids.values()).update(linked_fetched=True)
 
 
 def get_primary_section_crns(sections: list) -> set:
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandParser
+
+from courses.tasks import warm_cache, format_stats
+
+
+class Command(BaseCommand):
+    help = "Fill the cache with linked sections and enrollment info for a term"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("term", type=str, help="The term to warm the cache for")
+        parser.add_argument("--workers", type=int, default=8, help="The number of concurrent requests to the API")
+
+    def handle(self, *args, **options):
+        stats = warm_cache(options["term"], options["workers"])
+        self.stdout.write(
+            self.style.SUCCESS(f'Warmed cache for term "{options["term"]}": {format_stats(stats)}')
+        )
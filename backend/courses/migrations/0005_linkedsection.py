@@ -0,0 +1,27 @@
+# Generated by Django 5.1 on 2026-10-19 13:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_alter_course_options_alter_section_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LinkedSection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('group', models.PositiveIntegerField()),
+                ('course_reference_number', models.CharField(max_length=128)),
+                ('primary_section', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='linked_sections', to='courses.section')),
+            ],
+            options={
+                'ordering': ['primary_section_id', 'group', 'id'],
+                'constraints': [models.UniqueConstraint(fields=('primary_section', 'group', 'course_reference_number'), name='unique_linked_section')],
+            },
+        ),
+    ]
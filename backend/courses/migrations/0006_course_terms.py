@@ -0,0 +1,28 @@
+# Generated by Django 5.1 on 2026-10-19 13:13
+
+from django.db import migrations, models
+
+
+def populate_course_terms(apps, schema_editor):
+    Section = apps.get_model('courses', 'Section')
+    Course = apps.get_model('courses', 'Course')
+    Course.terms.through.objects.bulk_create([
+        Course.terms.through(course_id=course_id, term_id=term_id)
+        for course_id, term_id in Section.objects.order_by().values_list('course_id', 'term_id').distinct()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_linkedsection'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='terms',
+            field=models.ManyToManyField(blank=True, related_name='courses', to='courses.term'),
+        ),
+        migrations.RunPython(populate_course_terms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.1 on 2026-10-19 13:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+DAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+
+def populate_meetings(apps, schema_editor):
+    Section = apps.get_model('courses', 'Section')
+    Meeting = apps.get_model('courses', 'Meeting')
+    meetings = []
+    for section_id, meetings_faculty in Section.objects.values_list('id', 'meetings_faculty').iterator():
+        for meeting in meetings_faculty:
+            meetings.append(Meeting(
+                section_id=section_id,
+                begin_time=meeting['meetingTime']['beginTime'],
+                end_time=meeting['meetingTime']['endTime'],
+                start_date=meeting['meetingTime']['startDate'],
+                end_date=meeting['meetingTime']['endDate'],
+                days=sum(1 << i for i, day in enumerate(DAYS) if meeting['meetingTime'][day]),
+            ))
+    Meeting.objects.bulk_create(meetings, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_course_terms'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Meeting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('begin_time', models.CharField(max_length=4, null=True)),
+                ('end_time', models.CharField(max_length=4, null=True)),
+                ('start_date', models.CharField(max_length=10, null=True)),
+                ('end_date', models.CharField(max_length=10, null=True)),
+                ('days', models.PositiveSmallIntegerField(default=0)),
+                ('section', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='meetings', to='courses.section')),
+            ],
+            options={
+                'ordering': ['section_id', 'id'],
+            },
+        ),
+        migrations.RunPython(populate_meetings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1 on 2026-10-19 13:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0007_meeting'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='term',
+            name='data_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='term',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.1 on 2026-10-19 13:17
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_sections(apps, schema_editor):
+    """
+    Merge sections which share a term and CRN into the first of them, so the CRN can be made unique.
+
+    Subscriptions, meetings and linked sections are moved to the kept section before the duplicates
+    are deleted. Rows the kept section already has an equivalent of are left to be deleted with them.
+    """
+    Section = apps.get_model('courses', 'Section')
+    Meeting = apps.get_model('courses', 'Meeting')
+    LinkedSection = apps.get_model('courses', 'LinkedSection')
+    Subscription = apps.get_model('alerts', 'Subscription')
+
+    groups = (
+        Section.objects.values('term', 'course_reference_number')
+        .annotate(first_id=Min('id'), count=Count('id'))
+        .filter(count__gt=1)
+    )
+    for group in groups:
+        kept = group['first_id']
+        duplicates = list(
+            Section.objects.filter(term=group['term'], course_reference_number=group['course_reference_number'])
+            .exclude(id=kept).values_list('id', flat=True)
+        )
+
+        subscribed = set(Subscription.objects.filter(section_id=kept).values_list('user_id', flat=True))
+        for subscription in Subscription.objects.filter(section_id__in=duplicates).order_by('id'):
+            if subscription.user_id not in subscribed:
+                subscription.section_id = kept
+                subscription.save(update_fields=['section'])
+                subscribed.add(subscription.user_id)
+
+        # Meetings are derived from the section's meeting data, so they are only moved if the kept section has none
+        if not Meeting.objects.filter(section_id=kept).exists():
+            first_duplicate = Meeting.objects.filter(section_id__in=duplicates).aggregate(first=Min('section_id'))['first']
+            Meeting.objects.filter(section_id=first_duplicate).update(section_id=kept)
+
+        linked = set(
+            LinkedSection.objects.filter(primary_section_id=kept).values_list('group', 'course_reference_number')
+        )
+        for linked_section in LinkedSection.objects.filter(primary_section_id__in=duplicates).order_by('id'):
+            if (linked_section.group, linked_section.course_reference_number) not in linked:
+                linked_section.primary_section_id = kept
+                linked_section.save(update_fields=['primary_section'])
+                linked.add((linked_section.group, linked_section.course_reference_number))
+
+        Section.objects.filter(id__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0008_term_data_version'),
+        # Subscriptions to duplicate sections are moved before the user and section are made unique
+        ('alerts', '0004_alter_subscription_last_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_sections, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='section',
+            index=models.Index(fields=['term', 'course'], name='section_term_course_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='section',
+            constraint=models.UniqueConstraint(fields=('term', 'course_reference_number'), name='unique_term_crn'),
+        ),
+    ]
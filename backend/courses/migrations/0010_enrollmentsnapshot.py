@@ -0,0 +1,32 @@
+# Generated by Django 5.1 on 2026-10-19 13:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0009_section_section_term_course_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EnrollmentSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('enrollment', models.IntegerField(null=True)),
+                ('maximum_enrollment', models.IntegerField(null=True)),
+                ('seats_available', models.IntegerField(null=True)),
+                ('wait_capacity', models.IntegerField(null=True)),
+                ('wait_count', models.IntegerField(null=True)),
+                ('wait_available', models.IntegerField(null=True)),
+                ('section', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='enrollment_snapshots', to='courses.section')),
+            ],
+            options={
+                'ordering': ['section_id', 'created_at'],
+                'indexes': [models.Index(fields=['section', 'created_at'], name='snapshot_section_created_idx')],
+            },
+        ),
+    ]
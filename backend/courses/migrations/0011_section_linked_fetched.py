@@ -0,0 +1,24 @@
+# Generated by Django 5.1 on 2026-10-19 14:11
+
+from django.db import migrations, models
+
+
+def mark_linked_fetched(apps, schema_editor):
+    Section = apps.get_model('courses', 'Section')
+    Section.objects.filter(linked_sections__isnull=False).update(linked_fetched=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0010_enrollmentsnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='section',
+            name='linked_fetched',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(mark_linked_fetched, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,9 @@
-from django.db import models
-from django.core.cache import cache
+from collections import defaultdict
 
-from .api import get_linked_sections, get_enrollment_info
+from django.db import models, transaction
+
+from . import cache as section_cache
+from .api import get_linked_sections
 from .time_bitmap import TimeBitmap
 
 
@@ -12,6 +14,7 @@ class Course(models.Model):
     subject_course = models.CharField(primary_key=True, max_length=128)
     course_title = models.CharField(max_length=128)
     course_number = models.CharField(max_length=128)
+    terms = models.ManyToManyField("Term", related_name="courses", blank=True)
 
     class Meta:
         ordering = ["course_title", "subject_course"]
@@ -25,6 +28,8 @@ class Term(models.Model):
     term = models.CharField(primary_key=True, max_length=6)
     term_desc = models.CharField(max_length=128)
     registration_open = models.BooleanField(default=False)
+    data_version = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["term"]
@@ -52,42 +57,78 @@ class Section(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
     term = models.ForeignKey(Term, on_delete=models.CASCADE)
     is_primary_section = models.BooleanField()
+    # Whether the linked sections have been stored, so sections without any are not fetched again
+    linked_fetched = models.BooleanField(default=False, editable=False)
     _time_bitmap = models.CharField(max_length=512, editable=False)
 
     class Meta:
         ordering = ["course__subject_course", "schedule_type_description", "course_reference_number"]
+        indexes = [
+            models.Index(fields=["term", "course"], name="section_term_course_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["term", "course_reference_number"], name="unique_term_crn"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.term} - {self.course_reference_number}"
 
 
     def get_linked_crns(self) -> list[list[str]]:
-        """Return the CRNs of the linked sections for this class (from the cache if available)."""
+        """Return the CRNs of the linked sections for this class."""
+        return Section.get_many_linked_crns([self])[self.id]
+
+
+    @staticmethod
+    def get_many_linked_crns(sections: list['Section']) -> dict[int, list[list[str]]]:
+        """
+        Return the CRNs of the linked sections for many sections with a single query, keyed by section id.
+
+        Linked sections are stored during ingestion. Any linked section without stored links is fetched 
+        from the API once, and the result (even if empty) is stored for future requests.
+        """
 
-        if not self.is_section_linked:
-            return []
+        linked_crns = {section.id: [] for section in sections}
+
+        groups = defaultdict(lambda: defaultdict(list))
+        for section_id, group, crn in LinkedSection.objects.filter(
+            primary_section__in=[section.id for section in sections if section.is_section_linked]
+        ).values_list("primary_section_id", "group", "course_reference_number"):
+            groups[section_id][group].append(crn)
+
+        fetched = []
+        for section in sections:
+            if not section.is_section_linked:
+                continue
+            if section.id in groups:
+                linked_crns[section.id] = list(groups[section.id].values())
+            elif not section.linked_fetched:
+                linked_crns[section.id] = parse_linked_crns(
+                    get_linked_sections(section.term_id, section.course_reference_number)
+                )
+                fetched.append(section)
 
-        key = f"linked_crns_{self.id}"
-        if key not in cache:
-            result = get_linked_sections(self.term.term, self.course_reference_number)
-            linked_crns = [
-                [section['courseReferenceNumber'] for section in sections]
-                for sections in result['linkedData']
-            ]
-            cache.set(key, linked_crns, timeout=None)
+        if fetched:
+            LinkedSection.objects.bulk_create([
+                linked_section for section in fetched
+                for linked_section in LinkedSection.from_crns(section.id, linked_crns[section.id])
+            ], ignore_conflicts=True)
+            Section.mark_linked_fetched(fetched)
 
-        return cache.get(key)
+        return linked_crns
+
+
+    @staticmethod
+    def mark_linked_fetched(sections: list['Section']) -> None:
+        """Record that the linked sections of many sections have been stored."""
+        Section.objects.filter(id__in=[section.id for section in sections]).update(linked_fetched=True)
+        for section in sections:
+            section.linked_fetched = True
     
 
     def get_enrollment_info(self, force_refresh=False) -> dict:
         """Return the enrollment information for this section (from the cache if available)."""
-        
-        key = f"enrollment_info_{self.id}"
-        if (key not in cache) or force_refresh:
-            result = get_enrollment_info(self.term.term, self.course_reference_number)
-            cache.set(key, result, timeout=60 * 60 * 24)
-
-        return cache.get(key)
+        return section_cache.get_enrollment_info(self, force_refresh=force_refresh)
 
 
     def _calculate_time_bitmap(self) -> TimeBitmap:
@@ -115,6 +156,156 @@ class Section(models.Model):
         return TimeBitmap(int(self._time_bitmap))
     
 
-    def save(self, *args, **kwargs) -> None:
+    def update_time_bitmap(self) -> None:
+        """Recalculate the stored TimeBitmap e.g. before saving sections in bulk."""
         self._time_bitmap = str(self._calculate_time_bitmap().bitmap)
-        return super().save(*args, **kwargs)
\ No newline at end of file
+    
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        section = super().from_db(db, field_names, values)
+        section._loaded_meetings_faculty = section.__dict__.get("meetings_faculty")
+        return section
+
+
+    def save(self, *args, **kwargs) -> None:
+        self.update_time_bitmap()
+        update_fields = kwargs.get("update_fields")
+        # Meetings are read instead of the raw meeting data, so they are rebuilt whenever it changes
+        rebuild_meetings = (
+            (update_fields is None or "meetings_faculty" in update_fields)
+            and (self._state.adding or getattr(self, "_loaded_meetings_faculty", None) != self.meetings_faculty)
+        )
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if rebuild_meetings:
+                self.meetings.all().delete()
+                Meeting.objects.bulk_create(Meeting.from_meetings_faculty(self.id, self.meetings_faculty))
+        self._loaded_meetings_faculty = self.meetings_faculty
+
+
+class Meeting(models.Model):
+    """A recurring meeting of a section e.g. Tuesdays and Fridays from 12:40 to 14:00"""
+    section = models.ForeignKey(Section, on_delete=models.CASCADE, related_name="meetings")
+    begin_time = models.CharField(max_length=4, null=True)
+    end_time = models.CharField(max_length=4, null=True)
+    start_date = models.CharField(max_length=10, null=True)
+    end_date = models.CharField(max_length=10, null=True)
+    days = models.PositiveSmallIntegerField(default=0)
+
+    # The days of the week for each possible value of `days`, a bitmask over TimeBitmap.DAYS
+    DAYS_BY_MASK = [
+        [day for i, day in enumerate(TimeBitmap.DAYS) if mask & (1 << i)]
+        for mask in range(1 << len(TimeBitmap.DAYS))
+    ]
+
+    class Meta:
+        ordering = ["section_id", "id"]
+
+    def __str__(self) -> str:
+        return f"{self.section} - {self.begin_time} - {self.end_time}"
+    
+
+    def get_days(self) -> list[str]:
+        """Return the days of the week this meeting takes place on."""
+        return self.DAYS_BY_MASK[self.days]
+    
+
+    @staticmethod
+    def from_meetings_faculty(section_id: int, meetings_faculty: list[dict]) -> list['Meeting']:
+        """Create (unsaved) meetings from a section's raw `meetingsFaculty` data."""
+        return [
+            Meeting(
+                section_id=section_id,
+                begin_time=meeting["meetingTime"]["beginTime"],
+                end_time=meeting["meetingTime"]["endTime"],
+                start_date=meeting["meetingTime"]["startDate"],
+                end_date=meeting["meetingTime"]["endDate"],
+                days=sum(
+                    1 << i for i, day in enumerate(TimeBitmap.DAYS) if meeting["meetingTime"][day]
+                ),
+            )
+            for meeting in meetings_faculty
+        ]
+
+
+class LinkedSection(models.Model):
+    """A section that must be taken alongside a primary section e.g. a lab linked to a lecture"""
+    primary_section = models.ForeignKey(Section, on_delete=models.CASCADE, related_name="linked_sections")
+    group = models.PositiveIntegerField()
+    course_reference_number = models.CharField(max_length=128)
+
+    class Meta:
+        ordering = ["primary_section_id", "group", "id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["primary_section", "group", "course_reference_number"], name="unique_linked_section"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.primary_section} - {self.group} - {self.course_reference_number}"
+    
+
+    @staticmethod
+    def from_crns(primary_section_id: int, linked_crns: list[list[str]]) -> list['LinkedSection']:
+        """Create (unsaved) linked sections for each group of CRNs linked to a primary section."""
+        return [
+            LinkedSection(primary_section_id=primary_section_id, group=group, course_reference_number=crn)
+            for group, crns in enumerate(linked_crns)
+            for crn in crns
+        ]
+
+
+class EnrollmentSnapshot(models.Model):
+    """A section's enrollment at a point in time, recorded when it changes"""
+    # Lookups by section are served by the (section, created_at) index
+    section = models.ForeignKey(Section, on_delete=models.CASCADE, related_name="enrollment_snapshots", db_index=False)
+    created_at = models.DateTimeField()
+    enrollment = models.IntegerField(null=True)
+    maximum_enrollment = models.IntegerField(null=True)
+    seats_available = models.IntegerField(null=True)
+    wait_capacity = models.IntegerField(null=True)
+    wait_count = models.IntegerField(null=True)
+    wait_available = models.IntegerField(null=True)
+
+    # Enrollment info keys for each field
+    FIELDS = {
+        "enrollment": "enrollment",
+        "maximum_enrollment": "maximumEnrollment",
+        "seats_available": "seatsAvailable",
+        "wait_capacity": "waitCapacity",
+        "wait_count": "waitCount",
+        "wait_available": "waitAvailable",
+    }
+
+    class Meta:
+        ordering = ["section_id", "created_at"]
+        indexes = [
+            models.Index(fields=["section", "created_at"], name="snapshot_section_created_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.section} - {self.created_at}"
+    
+
+    @staticmethod
+    def from_enrollment_info(section_id: int, enrollment_info: dict, created_at) -> 'EnrollmentSnapshot':
+        """Create an (unsaved) snapshot from a `getEnrollmentInfo` API response."""
+        return EnrollmentSnapshot(
+            section_id=section_id, 
+            created_at=created_at, 
+            **{field: enrollment_info.get(key) for field, key in EnrollmentSnapshot.FIELDS.items()}
+        )
+    
+
+    def get_values(self) -> tuple:
+        return tuple(getattr(self, field) for field in self.FIELDS)
+
+
+def parse_linked_crns(linked_sections: dict) -> list[list[str]]:
+    """Extract the groups of linked CRNs from a `fetchLinkedSections` API response."""
+    return [
+        [section['courseReferenceNumber'] for section in sections]
+        for sections in linked_sections['linkedData']
+    ]
@@ -0,0 +1,94 @@
+import uuid
+from bisect import bisect_left
+
+from django.core.cache import cache
+
+from .models import Course
+from .serializers import CourseSerializer
+
+
+INDEX_VERSION_KEY = "course_search_index_version"
+
+
+class CourseSearchIndex:
+    """An in-memory index for searching courses by course code and title."""
+
+    def __init__(self, version: str):
+        self.version = version
+
+        # Serialized courses, in their default order
+        self.courses = CourseSerializer(Course.objects.all(), many=True).data
+        self.haystacks = [
+            f"{course['subject_course']} {course['course_title']}".lower()
+            for course in self.courses
+        ]
+
+        # Sorted course codes, for prefix matching
+        self.codes = sorted(
+            (course["subject_course"].lower(), i) for i, course in enumerate(self.courses)
+        )
+
+        # The courses offered in each term
+        self.terms = {}
+        for term, course in Course.terms.through.objects.values_list("term_id", "course_id"):
+            self.terms.setdefault(term, set()).add(course)
+
+
+    def search(self, query: str, term: str | None = None, limit: int = 20) -> list[dict]:
+        """
+        Return courses matching every word in the query, optionally limited to a single term.
+
+        Courses whose code starts with the query are ranked first.
+        """
+
+        if term is not None and term not in self.terms:
+            return []
+        offered = self.terms.get(term)
+
+        def is_offered(i: int) -> bool:
+            return offered is None or self.courses[i]["subject_course"] in offered
+        
+        words = query.lower().replace(",", " ").split()
+        results = []
+
+        # Find courses whose code starts with the query e.g. "math 10" matches MATH1010U
+        prefix = "".join(words)
+        if prefix:
+            start = bisect_left(self.codes, (prefix, -1))
+            for code, i in self.codes[start:]:
+                if len(results) >= limit or not code.startswith(prefix):
+                    break
+                if is_offered(i):
+                    results.append(i)
+
+        # Find all other courses containing every word in their code or title
+        ranked = set(results)
+        for i, haystack in enumerate(self.haystacks):
+            if len(results) >= limit:
+                break
+            if i not in ranked and is_offered(i) and all(word in haystack for word in words):
+                results.append(i)
+
+        return [self.courses[i] for i in results]
+
+
+_index = None
+
+
+def get_search_index() -> CourseSearchIndex:
+    """Return the search index, rebuilding it if the course data has changed."""
+    global _index
+    version = cache.get_or_set(INDEX_VERSION_KEY, lambda: uuid.uuid4().hex, timeout=None)
+    if _index is None or _index.version != version:
+        _index = CourseSearchIndex(version)
+    return _index
+
+
+def invalidate_search_index() -> None:
+    """Mark the search index as stale in every process, e.g. after ingesting new data."""
+    cache.set(INDEX_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def search_courses(query: str, term: str | None = None, limit: int = 20) -> list[dict]:
+    """Search for courses by course code and title."""
+    return get_search_index().search(query, term, limit)
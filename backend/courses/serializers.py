@@ -1,6 +1,5 @@
 from rest_framework import serializers
-from .models import Course, Section, Term
-from .time_bitmap import TimeBitmap
+from .models import Course, Section, Term, EnrollmentSnapshot
 
 
 class CourseSerializer(serializers.ModelSerializer):
@@ -17,17 +16,16 @@ class SectionSerializer(serializers.ModelSerializer):
 
 
     def get_meeting_times(self, obj: Section) -> list[dict]:
+        # Use prefetch_related("meetings") to avoid a query per section
         return [
             {
-                "begin_time": meeting["meetingTime"]["beginTime"],
-                "end_time": meeting["meetingTime"]["endTime"],
-                "start_date": meeting["meetingTime"]["startDate"],
-                "end_date": meeting["meetingTime"]["endDate"],
-                "days": [
-                    day for day in TimeBitmap.DAYS if meeting["meetingTime"][day]
-                ],
+                "begin_time": meeting.begin_time,
+                "end_time": meeting.end_time,
+                "start_date": meeting.start_date,
+                "end_date": meeting.end_date,
+                "days": meeting.get_days(),
             }
-            for meeting in obj.meetings_faculty
+            for meeting in obj.meetings.all()
         ]
 
 
@@ -36,4 +34,13 @@ class SectionSerializer(serializers.ModelSerializer):
 class TermSerializer(serializers.ModelSerializer):
     class Meta:
         model = Term
-        fields = ["term", "term_desc", "registration_open"]
\ No newline at end of file
+        fields = ["term", "term_desc", "registration_open"]
+
+
+class EnrollmentSnapshotSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = EnrollmentSnapshot
+        fields = [
+            "created_at", "enrollment", "maximum_enrollment", "seats_available", 
+            "wait_capacity", "wait_count", "wait_available"
+        ]
\ No newline at end of file
@@ -0,0 +1,253 @@
+import json
+import random
+import threading
+
+from .models import Course, Term
+
+
+SUBJECTS = [
+    ("BIOL", "Biology"), ("BUSI", "Business"), ("CHEM", "Chemistry"), ("COMM", "Communication"),
+    ("CSCI", "Computer Science"), ("ENGR", "Engineering"), ("MATH", "Mathematics"), ("PHY", "Physics"),
+    ("PSYC", "Psychology"), ("SOCI", "Sociology"), ("ECON", "Economics"), ("NURS", "Nursing"),
+]
+
+TITLES = [
+    "Introduction to {}", "Foundations of {}", "Topics in {}", "Applied {}", "Advanced {}", "{} Laboratory",
+]
+
+# Scheduled blocks as (begin time, end time), and days on which blocks are held
+TIME_SLOTS = [
+    ("0810", "0930"), ("0940", "1100"), ("1110", "1230"), ("1240", "1400"),
+    ("1410", "1530"), ("1540", "1700"), ("1710", "1830"), ("1840", "2000"),
+]
+DAY_PATTERNS = [
+    ("monday", "wednesday"), ("tuesday", "thursday"), ("monday", "thursday"),
+    ("wednesday", "friday"), ("tuesday",), ("friday",),
+]
+DAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+CAMPUSES = ["OT-North Oshawa", "OT-North Oshawa", "OT-Downtown Oshawa", "OT-Online"]
+
+
+def get_meeting_time(begin_time: str | None, end_time: str | None, days: tuple[str]) -> dict:
+    """Return a meeting in the format of the `meetingsFaculty` field of a section."""
+    meeting_time = {day: day in days for day in DAYS}
+    meeting_time.update({
+        "beginTime": begin_time,
+        "endTime": end_time,
+        "startDate": "09/03/2024",
+        "endDate": "12/03/2024",
+        "building": None,
+        "room": None,
+    })
+    return {"meetingTime": meeting_time}
+
+
+class SyntheticTerm:
+    """
+    A term of sections, linked sections and enrollment in the format of the MyCampus API.
+
+    Terms are either generated (deterministically, from a seed) or replayed from raw data
+    recorded by `updatesections`. Enrollment changes randomly between requests,
+    depending on `volatility`.
+    """
+
+    def __init__(self, term: str, sections: list[dict], linked_crns: dict[str, list[list[str]]], seed: int = 0, volatility: float = 0.0):
+        self.term = term
+        self.sections = sections
+        self.sections_by_crn = {section["courseReferenceNumber"]: section for section in sections}
+        self.linked_crns = linked_crns
+        self.volatility = volatility
+        self._random = random.Random(seed)
+        self._enrollment = {}
+        self._lock = threading.Lock()
+
+
+    @classmethod
+    def generate(cls, term: str, courses: int = 100, seed: int = 0, volatility: float = 0.0, linked_fraction: float = 0.5, max_lectures: int = 3, max_linked_sections: int = 4, meetings_per_section: int = 1, first_id: int = 100000) -> 'SyntheticTerm':
+        """
+        Generate a term with the given number of courses.
+
+        A `linked_fraction` of courses have tutorials or labs linked to each lecture, 
+        with up to `max_linked_sections` more linked sections than lectures.
+        Section ids are numbered from `first_id`.
+        """
+
+        rng = random.Random(seed)
+        sections = []
+        linked_crns = {}
+
+        def add_section(course: dict, schedule_type: str, is_linked: bool, meetings: list[dict]) -> str:
+            crn = str(10000 + len(sections))
+            sections.append({
+                "id": first_id + len(sections),
+                "term": term,
+                "termDesc": f"Synthetic Term {term}",
+                "courseReferenceNumber": crn,
+                "partOfTerm": "1",
+                "courseNumber": course["courseNumber"],
+                "subject": course["subject"],
+                "subjectDescription": course["subjectDescription"],
+                "sequenceNumber": f"{len(sections) % 100:03}",
+                "campusDescription": rng.choice(CAMPUSES),
+                "scheduleTypeDescription": schedule_type,
+                "courseTitle": course["courseTitle"],
+                "creditHours": 3,
+                "creditHourHigh": None,
+                "creditHourLow": 3,
+                "creditHourIndicator": None,
+                "linkIdentifier": None,
+                "isSectionLinked": is_linked,
+                "subjectCourse": course["subjectCourse"],
+                "faculty": [],
+                "meetingsFaculty": meetings,
+            })
+            return crn
+
+        for i in range(courses):
+            subject, subject_description = SUBJECTS[i % len(SUBJECTS)]
+            course_number = f"{1000 + (i // len(SUBJECTS)) * 10 % 9000:04}U"
+            course = {
+                "subject": subject,
+                "subjectDescription": subject_description,
+                "courseNumber": course_number,
+                "subjectCourse": f"{subject}{course_number}",
+                "courseTitle": rng.choice(TITLES).format(subject_description),
+            }
+
+            is_linked = rng.random() < linked_fraction
+            lectures = [
+                add_section(course, "Lecture", is_linked, [
+                    get_meeting_time(*rng.choice(TIME_SLOTS), rng.choice(DAY_PATTERNS[:4]))
+                    for _ in range(meetings_per_section)
+                ])
+                for _ in range(rng.randint(1, max_lectures))
+            ]
+            if is_linked:
+                schedule_type = rng.choice(["Tutorial", "Laboratory"])
+                groups = [
+                    [add_section(course, schedule_type, True, [
+                        get_meeting_time(*rng.choice(TIME_SLOTS), rng.choice(DAY_PATTERNS[4:]))
+                        for _ in range(meetings_per_section)
+                    ])]
+                    for _ in range(len(lectures) + rng.randint(1, max_linked_sections))
+                ]
+                for crn in lectures:
+                    linked_crns[crn] = groups
+
+        return cls(term, sections, linked_crns, seed=seed, volatility=volatility)
+
+
+    @classmethod
+    def replay(cls, term: str, seed: int = 0, volatility: float = 0.0) -> 'SyntheticTerm':
+        """Load a term from the raw data recorded by `updatesections`."""
+        # Avoid importing management commands until they are needed
+        from courses.management.commands.updatesections import read_sections_snapshot, get_linked_snapshot_path
+
+        sections = list(read_sections_snapshot(term))
+        try:
+            with open(get_linked_snapshot_path(term), "r", encoding="utf-8") as f:
+                linked_crns = json.load(f)
+        except FileNotFoundError:
+            linked_crns = {}
+        return cls(term, sections, linked_crns, seed=seed, volatility=volatility)
+
+
+    def save(self) -> None:
+        """Save the term's courses, sections and linked sections to the database."""
+        # Avoid importing management commands until they are needed
+        from courses.management.commands import updatesections
+
+        Term.objects.update_or_create(term=self.term, defaults={"term_desc": f"Synthetic Term {self.term}"})
+        courses = {
+            section["subjectCourse"]: Course(
+                subject_course=section["subjectCourse"],
+                subject=section["subject"],
+                subject_description=section["subjectDescription"],
+                course_title=section["courseTitle"],
+                course_number=section["courseNumber"],
+            )
+            for section in self.sections
+        }
+        Course.objects.bulk_create(courses.values(), ignore_conflicts=True)
+
+        primary_section_crns = updatesections.get_primary_section_crns(self.sections)
+        for i in range(0, len(self.sections), updatesections.BATCH_SIZE):
+            updatesections.save_sections(self.sections[i:i + updatesections.BATCH_SIZE], primary_section_crns)
+        updatesections.save_term_courses(self.term)
+        updatesections.save_linked_crns(self.term, self.linked_crns)
+
+
+    def search_sections(self, course_code: str | None = None, offset: int = 0, limit: int = 10) -> dict:
+        """Return a `searchResults` response."""
+        sections = self.sections
+        if course_code:
+            sections = [section for section in sections if section["subjectCourse"] == course_code]
+        return {
+            "success": True,
+            "totalCount": len(sections),
+            "data": sections[offset:offset + limit],
+            "pageOffset": offset,
+            "pageMaxSize": limit,
+        }
+
+
+    def search_course_codes(self, query: str, offset: int = 1, limit: int = 10) -> list[dict]:
+        """Return a `get_subjectcoursecombo` response."""
+        courses = {}
+        for section in self.sections:
+            text = f"{section['subjectCourse']} {section['courseTitle']}"
+            if query.lower() in text.lower():
+                courses[section["subjectCourse"]] = {"code": section["subjectCourse"], "description": text}
+        return list(courses.values())[offset - 1:offset - 1 + limit]
+
+
+    def get_linked_sections(self, course_reference_number: str) -> dict:
+        """Return a `fetchLinkedSections` response."""
+        return {
+            "linkedData": [
+                [self.sections_by_crn.get(crn, {"courseReferenceNumber": crn}) for crn in crns]
+                for crns in self.linked_crns.get(course_reference_number, [])
+            ]
+        }
+
+
+    def get_enrollment_info(self, course_reference_number: str) -> dict:
+        """Return the current enrollment of a section, which may have changed since the last request."""
+        with self._lock:
+            info = self._enrollment.get(course_reference_number)
+            if info is None:
+                maximum = self._random.choice([30, 40, 60, 80, 120, 250])
+                wait_capacity = self._random.choice([0, 10, 20])
+                info = {
+                    "enrollment": self._random.randint(maximum // 2, maximum),
+                    "maximumEnrollment": maximum,
+                    "waitCapacity": wait_capacity,
+                    "waitCount": 0,
+                }
+                self._enrollment[course_reference_number] = info
+            elif self._random.random() < self.volatility:
+                info["enrollment"] = max(0, min(info["maximumEnrollment"], info["enrollment"] + self._random.randint(-3, 3)))
+                if info["enrollment"] == info["maximumEnrollment"]:
+                    info["waitCount"] = self._random.randint(0, info["waitCapacity"])
+                else:
+                    info["waitCount"] = 0
+            info = dict(info)
+
+        info["seatsAvailable"] = info["maximumEnrollment"] - info["enrollment"]
+        info["waitAvailable"] = info["waitCapacity"] - info["waitCount"]
+        return info
+
+
+    def render_enrollment_info(self, course_reference_number: str) -> str:
+        """Return a `getEnrollmentInfo` response, which is an HTML fragment."""
+        info = self.get_enrollment_info(course_reference_number)
+        labels = [
+            ("Enrollment Actual", "enrollment"), ("Enrollment Maximum", "maximumEnrollment"),
+            ("Enrollment Seats Available", "seatsAvailable"), ("Waitlist Capacity", "waitCapacity"),
+            ("Waitlist Actual", "waitCount"), ("Waitlist Seats Available", "waitAvailable"),
+        ]
+        return "\n".join(
+            f'<span class="status-bold">{label}:</span> <span dir="ltr"> {info[key]} </span><br/>'
+            for label, key in labels
+        )
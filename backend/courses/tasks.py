@@ -0,0 +1,95 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from celery import shared_task
+from celery.utils.log import get_task_logger
+
+from . import cache as section_cache
+from .history import downsample_enrollment_snapshots
+from .api import get_linked_sections
+from .models import Section, LinkedSection, parse_linked_crns
+
+logger = get_task_logger(__name__)
+
+
+@shared_task
+def warm_cache_task(term: str, workers: int = 8):
+    stats = warm_cache(term, workers)
+    logger.info(f"Warmed cache for term {term}: {format_stats(stats)}")
+
+
+@shared_task
+def downsample_enrollment_snapshots_task():
+    deleted = downsample_enrollment_snapshots()
+    logger.info(f"Deleted {deleted} enrollment snapshots while downsampling")
+
+
+def warm_cache(term: str, workers: int = 8) -> dict:
+    """Fill in missing linked sections and enrollment info for every section in a term."""
+
+    sections = list(Section.objects.filter(term__term=term))
+    stats = {"term": term, "sections": len(sections)}
+
+    # Fetch linked sections for any primary section without stored links
+    start = time.perf_counter()
+    primary_sections = [
+        section for section in sections if section.is_primary_section and section.is_section_linked
+    ]
+    stored = set(
+        LinkedSection.objects.filter(primary_section__in=primary_sections)
+        .values_list("primary_section_id", flat=True).distinct()
+    )
+    missing = [
+        section for section in primary_sections if section.id not in stored and not section.linked_fetched
+    ]
+
+    def fetch(section: Section) -> list[LinkedSection] | None:
+        try:
+            result = get_linked_sections(term, section.course_reference_number)
+        except Exception as e:
+            logger.warning(f"Failed to fetch linked sections for CRN {section.course_reference_number}: {e}")
+            return None
+        return LinkedSection.from_crns(section.id, parse_linked_crns(result))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = dict(zip(missing, executor.map(fetch, missing)))
+    fetched = [section for section, result in results.items() if result is not None]
+    LinkedSection.objects.bulk_create(
+        [linked_section for section in fetched for linked_section in results[section]],
+        batch_size=1000, ignore_conflicts=True,
+    )
+    Section.mark_linked_fetched(fetched)
+
+    stats["linked_hits"] = len(primary_sections) - len(missing)
+    stats["linked_total"] = len(primary_sections)
+    stats["linked_seconds"] = time.perf_counter() - start
+
+    # Fetch enrollment info for any section missing from the cache
+    start = time.perf_counter()
+    cached = section_cache.get_many([section_cache.enrollment_info_key(section.id) for section in sections])
+    missing = [
+        section for section in sections if section_cache.enrollment_info_key(section.id) not in cached
+    ]
+    fetched = section_cache.get_enrollment_infos(missing, force_refresh=True, max_workers=workers)
+
+    stats["enrollment_hits"] = len(sections) - len(missing)
+    stats["enrollment_total"] = len(sections)
+    stats["enrollment_failed"] = len(missing) - len(fetched)
+    stats["enrollment_seconds"] = time.perf_counter() - start
+
+    return stats
+
+
+def format_stats(stats: dict) -> str:
+    """Summarize cache warming statistics on a single line."""
+
+    def ratio(hits: int, total: int) -> str:
+        return f"{hits}/{total} ({hits / total:.0%})" if total else "0/0"
+
+    return (
+        f"linked sections hit {ratio(stats['linked_hits'], stats['linked_total'])} "
+        f"in {stats['linked_seconds']:.2f}s, "
+        f"enrollment info hit {ratio(stats['enrollment_hits'], stats['enrollment_total'])} "
+        f"in {stats['enrollment_seconds']:.2f}s "
+        f"({stats['enrollment_failed']} failed)"
+    )
@@ -0,0 +1,207 @@
+import io
+import time
+import threading
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.core.management import call_command
+
+from config.cache import LocalCache, SingleFlight
+from config.testing import make_course, make_sections
+from courses import cache as section_cache
+from courses.models import Term, LinkedSection
+from courses.fakeserver import FakeMyCampusServer
+from courses.synthetic import SyntheticTerm
+from courses.tasks import warm_cache, format_stats
+
+
+class TestLocalCache(TestCase):
+
+    def test_lru_and_ttl(self):
+
+        local_cache = LocalCache(maxsize=2, timeout=60)
+        local_cache.set("a", 1)
+        local_cache.set("b", 2)
+        local_cache.get("a")
+        local_cache.set("c", 3)
+        self.assertEqual(local_cache.get_many(["a", "b", "c"]), {"a": 1, "c": 3})
+
+        local_cache = LocalCache(maxsize=2, timeout=0)
+        local_cache.set("a", 1)
+        self.assertIsNone(local_cache.get("a"))
+
+
+class TestSingleFlight(TestCase):
+
+    def test_concurrent_calls(self):
+
+        single_flight = SingleFlight()
+        calls = []
+        results = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.1)
+            return "result"
+
+        threads = [
+            threading.Thread(target=lambda: results.append(single_flight.do("key", fetch)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["result"] * 5)
+
+
+class TestEnrollmentInfoCache(TestCase):
+
+    def setUp(self) -> None:
+        term = Term.objects.create(term="209901", term_desc="Test Term")
+        self.sections = make_sections(term, make_course(), 3)
+        cache.delete_many([section_cache.enrollment_info_key(section.id) for section in self.sections])
+        section_cache.local_cache.clear()
+
+
+    def test_get_enrollment_infos(self):
+
+        fetch = mock.patch("courses.api.get_enrollment_info", side_effect=lambda term, crn, timeout=None: {"crn": crn})
+
+        with fetch as get_enrollment_info:
+            enrollment_infos = section_cache.get_enrollment_infos(self.sections)
+        self.assertEqual(get_enrollment_info.call_count, 3)
+        self.assertEqual(enrollment_infos[self.sections[0].id], {"crn": "90000"})
+
+        # Entries are served from the local cache, then the shared cache
+        with fetch as get_enrollment_info, mock.patch.object(cache, "get_many") as get_many:
+            section_cache.get_enrollment_infos(self.sections)
+        get_enrollment_info.assert_not_called()
+        get_many.assert_not_called()
+
+        section_cache.local_cache.clear()
+        with fetch as get_enrollment_info:
+            self.assertEqual(section_cache.get_enrollment_infos(self.sections), enrollment_infos)
+        get_enrollment_info.assert_not_called()
+
+        # Forced refreshes always fetch
+        with fetch as get_enrollment_info:
+            section_cache.get_enrollment_infos(self.sections, force_refresh=True)
+        self.assertEqual(get_enrollment_info.call_count, 3)
+
+
+    def test_stalled_server(self):
+
+        server = FakeMyCampusServer([SyntheticTerm.generate("209901", courses=1)], latency=3)
+        server.start()
+        self.addCleanup(server.stop)
+        threads = set(threading.enumerate())
+
+        start = time.perf_counter()
+        with override_settings(MYCAMPUS_BASE_URL=server.base_url):
+            self.assertEqual(section_cache.get_enrollment_infos(self.sections, timeout=0.2), {})
+        self.assertLess(time.perf_counter() - start, 1)
+
+        # The requests give up by the deadline, so no worker thread is left waiting on the server
+        workers = [
+            thread for thread in set(threading.enumerate()) - threads if thread.name.startswith("ThreadPoolExecutor")
+        ]
+        for thread in workers:
+            thread.join(timeout=1)
+        self.assertFalse(any(thread.is_alive() for thread in workers))
+
+
+class TestWarmCache(TestCase):
+
+    def setUp(self) -> None:
+        term = Term.objects.create(term="209901", term_desc="Test Term")
+        self.sections = make_sections(term, make_course(), 4, is_section_linked=True)
+        cache.delete_many([section_cache.enrollment_info_key(section.id) for section in self.sections])
+        section_cache.local_cache.clear()
+
+        # The first section's links and enrollment info are already stored
+        LinkedSection.objects.create(primary_section=self.sections[0], group=0, course_reference_number="91000")
+        section_cache.set_many({section_cache.enrollment_info_key(self.sections[0].id): {"crn": "90000"}}, timeout=60)
+
+
+    def fetch_linked_sections(self, term, crn):
+        if crn == "90002":
+            return {"linkedData": []}
+        if crn == "90003":
+            raise ConnectionError("The API is unavailable")
+        return {"linkedData": [[{"courseReferenceNumber": f"9{crn}"}]]}
+
+
+    def test_warm_cache(self):
+
+        with (
+            mock.patch("courses.tasks.get_linked_sections", side_effect=self.fetch_linked_sections) as get_linked_sections,
+            mock.patch("courses.api.get_enrollment_info", side_effect=lambda term, crn, timeout=None: {"crn": crn}) as get_enrollment_info,
+        ):
+            stats = warm_cache("209901", workers=2)
+
+        self.assertEqual(get_linked_sections.call_count, 3)
+        self.assertEqual(get_enrollment_info.call_count, 3)
+        self.assertEqual(
+            {key: value for key, value in stats.items() if not key.endswith("_seconds")},
+            {
+                "term": "209901", "sections": 4,
+                "linked_hits": 1, "linked_total": 4,
+                "enrollment_hits": 1, "enrollment_total": 4, "enrollment_failed": 0,
+            },
+        )
+        self.assertEqual(
+            list(LinkedSection.objects.filter(primary_section__in=self.sections[1:]).values_list("course_reference_number", flat=True)),
+            ["990001"],
+        )
+        self.assertEqual(section_cache.get_enrollment_infos(self.sections[1:2]), {self.sections[1].id: {"crn": "90001"}})
+
+        # Everything fetched is a hit the next time (even without any links), except the links which failed
+        with (
+            mock.patch("courses.tasks.get_linked_sections", side_effect=self.fetch_linked_sections) as get_linked_sections,
+            mock.patch("courses.api.get_enrollment_info") as get_enrollment_info,
+        ):
+            stats = warm_cache("209901")
+        get_linked_sections.assert_called_once_with("209901", "90003")
+        get_enrollment_info.assert_not_called()
+        self.assertEqual((stats["linked_hits"], stats["enrollment_hits"]), (3, 4))
+
+
+    def test_failed_enrollment_info(self):
+
+        with (
+            mock.patch("courses.tasks.get_linked_sections", side_effect=self.fetch_linked_sections),
+            mock.patch("courses.api.get_enrollment_info", side_effect=ConnectionError("The API is unavailable")),
+        ):
+            stats = warm_cache("209901")
+        self.assertEqual((stats["enrollment_hits"], stats["enrollment_failed"]), (1, 3))
+
+
+    def test_format_stats(self):
+
+        stats = {
+            "term": "209901", "sections": 4,
+            "linked_hits": 1, "linked_total": 4, "linked_seconds": 0.5,
+            "enrollment_hits": 0, "enrollment_total": 0, "enrollment_failed": 0, "enrollment_seconds": 0.25,
+        }
+        self.assertEqual(
+            format_stats(stats),
+            "linked sections hit 1/4 (25%) in 0.50s, enrollment info hit 0/0 in 0.25s (0 failed)",
+        )
+
+
+    def test_command(self):
+
+        stdout = io.StringIO()
+        with (
+            mock.patch("courses.tasks.get_linked_sections", side_effect=self.fetch_linked_sections),
+            mock.patch("courses.api.get_enrollment_info", side_effect=lambda term, crn, timeout=None: {"crn": crn}),
+        ):
+            call_command("warmcache", "209901", workers=2, stdout=stdout)
+        self.assertIn(
+            'Warmed cache for term "209901": linked sections hit 1/4 (25%)', stdout.getvalue()
+        )
+        self.assertIn("enrollment info hit 1/4 (25%)", stdout.getvalue())
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta, timezone
+
+from django.test import TestCase
+
+from config.testing import make_course, make_sections
+from courses.models import Term, EnrollmentSnapshot
+from courses.history import record_enrollment_snapshots, downsample_enrollment_snapshots
+
+
+def get_enrollment_info(seats_available: int) -> dict:
+    return {
+        "enrollment": 30 - seats_available,
+        "maximumEnrollment": 30,
+        "seatsAvailable": seats_available,
+        "waitCapacity": None,
+        "waitCount": None,
+        "waitAvailable": None,
+    }
+
+
+class TestEnrollmentSnapshots(TestCase):
+
+    def setUp(self) -> None:
+        term = Term.objects.create(term="209901", term_desc="Test Term")
+        make_sections(term, make_course(), 3)
+
+
+    def test_record_enrollment_snapshots(self):
+
+        enrollment_infos = {990000: get_enrollment_info(0), 990001: get_enrollment_info(5)}
+        self.assertEqual(record_enrollment_snapshots(enrollment_infos), 2)
+
+        # Only changes are recorded
+        with self.assertNumQueries(1):
+            self.assertEqual(record_enrollment_snapshots(enrollment_infos), 0)
+        enrollment_infos[990001] = get_enrollment_info(4)
+        enrollment_infos[990002] = get_enrollment_info(1)
+        self.assertEqual(record_enrollment_snapshots(enrollment_infos), 2)
+
+        snapshots = EnrollmentSnapshot.objects.filter(section_id=990001)
+        self.assertEqual([snapshot.seats_available for snapshot in snapshots], [5, 4])
+
+
+    def test_downsample_enrollment_snapshots(self):
+
+        now = datetime(2099, 6, 1, tzinfo=timezone.utc)
+        for minutes in range(160, -20, -20):
+            record_enrollment_snapshots(
+                {990000: get_enrollment_info(minutes // 20)}, created_at=now - timedelta(days=8, minutes=minutes)
+            )
+        record_enrollment_snapshots({990000: get_enrollment_info(1)}, created_at=now)
+        self.assertEqual(EnrollmentSnapshot.objects.count(), 10)
+
+        # Old snapshots are reduced to the last in each hour, while recent snapshots are kept
+        self.assertEqual(downsample_enrollment_snapshots(now), 5)
+        self.assertEqual(
+            list(EnrollmentSnapshot.objects.values_list("created_at", flat=True)), 
+            [now - timedelta(days=8, minutes=minutes) for minutes in (140, 80, 20, 0)] + [now]
+        )
+        self.assertEqual(downsample_enrollment_snapshots(now), 0)
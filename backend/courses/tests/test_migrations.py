@@ -0,0 +1,71 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+
+class TestMergeDuplicateSections(TransactionTestCase):
+
+    before = [("courses", "0008_term_data_version"), ("alerts", "0004_alter_subscription_last_status")]
+    after = [("courses", "0009_section_section_term_course_idx_and_more")]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        # Users are made with their latest fields, which the state of the targets alone may not include
+        executor.loader.build_graph()
+        nodes = targets + [node for node in executor.loader.graph.leaf_nodes() if node[0] == "accounts"]
+        return executor.loader.project_state(nodes).apps
+
+    def tearDown(self) -> None:
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+
+    def test_merge_duplicate_sections(self):
+
+        apps = self.migrate(self.before)
+        Term = apps.get_model("courses", "Term")
+        Course = apps.get_model("courses", "Course")
+        Section = apps.get_model("courses", "Section")
+        Meeting = apps.get_model("courses", "Meeting")
+        LinkedSection = apps.get_model("courses", "LinkedSection")
+        Subscription = apps.get_model("alerts", "Subscription")
+        User = apps.get_model("accounts", "User")
+
+        term = Term.objects.create(term="209901", term_desc="Test Term")
+        course = Course.objects.create(
+            subject="TEST", subject_description="Test", subject_course="TEST1000U", course_title="Test Course", course_number="1000U"
+        )
+        for id in (1, 2, 3):
+            Section.objects.create(
+                id=id, course_reference_number="90000", part_of_term="1", sequence_number="1",
+                campus_description="OT-North Oshawa", schedule_type_description="Lecture", is_section_linked=True,
+                faculty=[], meetings_faculty=[], course=course, term=term, is_primary_section=True, _time_bitmap="",
+            )
+        Meeting.objects.create(section_id=2, days=1)
+        LinkedSection.objects.create(primary_section_id=1, group=0, course_reference_number="91000")
+        LinkedSection.objects.create(primary_section_id=2, group=0, course_reference_number="91000")
+        LinkedSection.objects.create(primary_section_id=3, group=1, course_reference_number="91001")
+        users = [User.objects.create(email=f"user{i}@example.com", password="!") for i in range(3)]
+        Subscription.objects.create(user=users[0], section_id=1)
+        Subscription.objects.create(user=users[0], section_id=2)
+        Subscription.objects.create(user=users[1], section_id=2)
+        Subscription.objects.create(user=users[1], section_id=3)
+        Subscription.objects.create(user=users[2], section_id=3)
+
+        apps = self.migrate(self.after)
+        Section = apps.get_model("courses", "Section")
+        Meeting = apps.get_model("courses", "Meeting")
+        LinkedSection = apps.get_model("courses", "LinkedSection")
+        Subscription = apps.get_model("alerts", "Subscription")
+
+        # Every user keeps one subscription, and the kept section gains the duplicates' meetings and links
+        self.assertEqual(list(Section.objects.values_list("id", flat=True)), [1])
+        self.assertEqual(
+            sorted(Subscription.objects.values_list("user__email", "section_id")),
+            [("user0@example.com", 1), ("user1@example.com", 1), ("user2@example.com", 1)],
+        )
+        self.assertEqual(list(Meeting.objects.values_list("section_id", flat=True)), [1])
+        self.assertEqual(
+            sorted(LinkedSection.objects.values_list("primary_section_id", "group", "course_reference_number")),
+            [(1, 0, "91000"), (1, 1, "91001")],
+        )
@@ -1,7 +1,10 @@
+from unittest import mock
+
 from django.test import TestCase
 from django.core.management import call_command
 
-from courses.models import Course, Section
+from config.testing import QueryPlanMixin, make_course, make_sections
+from courses.models import Term, Section, LinkedSection
 from courses.time_bitmap import TimeBitmap
 
 
@@ -67,4 +70,85 @@ class TestSection(TestCase):
 
         # CSCI1030U, LAB, Thursday 09:40 - 11:00
         section = Section.objects.get(term__term="202309", course_reference_number="42685")
-        self.assertEqual(section.get_time_bitmap(), TimeBitmap.from_begin_and_end_time('0940', '1100', 'thursday'))
\ No newline at end of file
+        self.assertEqual(section.get_time_bitmap(), TimeBitmap.from_begin_and_end_time('0940', '1100', 'thursday'))
+
+
+class TestSectionMeetings(TestCase):
+
+    def get_meetings_faculty(self, begin_time: str, end_time: str, *days: str) -> list[dict]:
+        meeting_time = {"beginTime": begin_time, "endTime": end_time, "startDate": "09/05/2099", "endDate": "12/04/2099"}
+        return [{"meetingTime": {**meeting_time, **{day: day in days for day in TimeBitmap.DAYS}}}]
+
+
+    def test_meetings_follow_meetings_faculty(self):
+
+        term = Term.objects.create(term="209901", term_desc="Test Term")
+        section = make_sections(term, make_course(), 1, meetings_faculty=self.get_meetings_faculty("1240", "1400", "tuesday"))[0]
+        self.assertEqual([meeting.get_days() for meeting in section.meetings.all()], [["tuesday"]])
+
+        # Editing the raw meeting data (e.g. in the admin) rebuilds the meetings
+        section = Section.objects.get(id=section.id)
+        section.meetings_faculty = self.get_meetings_faculty("0940", "1100", "monday", "friday")
+        section.save()
+        self.assertEqual(
+            [(meeting.begin_time, meeting.get_days()) for meeting in section.meetings.all()], [("0940", ["monday", "friday"])]
+        )
+
+        # Other edits keep the meetings
+        meeting_ids = list(section.meetings.values_list("id", flat=True))
+        section = Section.objects.get(id=section.id)
+        section.campus_description = "OT-Downtown Oshawa"
+        section.save()
+        self.assertEqual(list(section.meetings.values_list("id", flat=True)), meeting_ids)
+
+
+class TestLinkedSection(TestCase):
+
+    def setUp(self) -> None:
+        term = Term.objects.create(term="209901", term_desc="Test Term")
+        self.sections = make_sections(term, make_course(), 2, is_section_linked=True)
+
+
+    def test_get_many_linked_crns(self):
+
+        LinkedSection.objects.bulk_create(
+            LinkedSection.from_crns(self.sections[0].id, [["91000", "92000"], ["91001", "92001"]])
+        )
+        response = {"linkedData": [[{"courseReferenceNumber": "91002"}]]}
+
+        # Stored links are read with a single query, missing links are fetched and stored
+        with mock.patch("courses.models.get_linked_sections", return_value=response) as fetch:
+            with self.assertNumQueries(3):
+                linked_crns = Section.get_many_linked_crns(self.sections)
+        fetch.assert_called_once_with("209901", "90001")
+        self.assertEqual(linked_crns, {
+            self.sections[0].id: [["91000", "92000"], ["91001", "92001"]],
+            self.sections[1].id: [["91002"]],
+        })
+
+        with mock.patch("courses.models.get_linked_sections") as fetch:
+            self.assertEqual(self.sections[1].get_linked_crns(), [["91002"]])
+        fetch.assert_not_called()
+
+
+    def test_no_linked_sections(self):
+
+        # Sections without any linked sections are only fetched once
+        with mock.patch("courses.models.get_linked_sections", return_value={"linkedData": []}) as fetch:
+            self.assertEqual(self.sections[0].get_linked_crns(), [])
+            self.assertEqual(Section.objects.get(id=self.sections[0].id).get_linked_crns(), [])
+        fetch.assert_called_once_with("209901", "90000")
+
+
+class TestQueryPlans(QueryPlanMixin, TestCase):
+
+    def test_section_indexes(self):
+        
+        self.assertUsesIndex(
+            Section.objects.filter(term__term="202309", course__subject_course__in=["MATH1010U", "CSCI1030U"]),
+            ["term_id", "course_id"]
+        )
+        self.assertUsesIndex(
+            Section.objects.filter(term__term="202309", course_reference_number__in=["42684", "44746"]),
+            ["term_id", "course_reference_number"]
+        )
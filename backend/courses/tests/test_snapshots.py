@@ -0,0 +1,113 @@
+import io
+import os
+import gzip
+import json
+import tempfile
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.core.management import call_command
+
+from courses.models import Section, LinkedSection
+from courses.synthetic import SyntheticTerm
+from courses.fakeserver import FakeMyCampusServer
+from courses.management.commands import updatesections
+
+
+class TestSectionsSnapshot(TestCase):
+
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.snapshot_dir = directory.name
+        patcher = mock.patch.object(updatesections, "SNAPSHOT_DIR", self.snapshot_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+    def test_round_trip(self):
+
+        sections = [{"id": 1, "courseTitle": "Law &amp; Society"}, {"id": 2, "courseTitle": "Calculus"}]
+        updatesections.save_sections_snapshot("209901", iter(sections))
+
+        path = updatesections.get_sections_snapshot_path("209901")
+        self.assertEqual(path, f"{self.snapshot_dir}/sections/209901.jsonl.gz")
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            self.assertEqual([json.loads(line) for line in f], sections)
+
+        # Sections are unescaped as they are read
+        self.assertEqual(
+            [section["courseTitle"] for section in updatesections.read_sections_snapshot("209901")],
+            ["Law & Society", "Calculus"],
+        )
+
+
+    def test_legacy_snapshot(self):
+
+        os.makedirs(f"{self.snapshot_dir}/sections")
+        with open(f"{self.snapshot_dir}/sections/209901.json", "w", encoding="utf-8") as f:
+            json.dump([{"id": 1, "courseTitle": "Law &amp; Society"}], f)
+
+        self.assertEqual(updatesections.get_sections_snapshot_path("209901"), f"{self.snapshot_dir}/sections/209901.json")
+        self.assertEqual(list(updatesections.read_sections_snapshot("209901")), [{"id": 1, "courseTitle": "Law & Society"}])
+
+        # Compressed snapshots are preferred once they are written
+        updatesections.save_sections_snapshot("209901", [{"id": 2, "courseTitle": "Calculus"}])
+        self.assertEqual(list(updatesections.read_sections_snapshot("209901")), [{"id": 2, "courseTitle": "Calculus"}])
+
+
+    def test_failed_write(self):
+
+        updatesections.save_sections_snapshot("209901", [{"id": 1}])
+
+        def fail():
+            yield {"id": 2}
+            raise ConnectionError("The API is unavailable")
+
+        with self.assertRaises(ConnectionError):
+            updatesections.save_sections_snapshot("209901", fail())
+
+        # The earlier snapshot is kept, and the partial one is removed
+        self.assertEqual(os.listdir(f"{self.snapshot_dir}/sections"), ["209901.jsonl.gz"])
+        self.assertEqual(list(updatesections.read_sections_snapshot("209901")), [{"id": 1}])
+
+
+    def test_update_from_snapshots(self):
+
+        term = SyntheticTerm.generate("209901", courses=10, seed=1)
+        updatesections.save_sections_snapshot("209901", term.sections)
+        os.makedirs(f"{self.snapshot_dir}/linked")
+        with open(updatesections.get_linked_snapshot_path("209901"), "w", encoding="utf-8") as f:
+            json.dump(term.linked_crns, f)
+
+        call_command("updatesections", "209901", "--usecache")
+        self.assertEqual(Section.objects.filter(term_id="209901").count(), len(term.sections))
+        self.assertEqual(
+            set(LinkedSection.objects.filter(primary_section__term_id="209901").values_list("primary_section__course_reference_number", flat=True)),
+            {crn for crn, groups in term.linked_crns.items() if groups},
+        )
+        self.assertEqual(
+            set(Section.objects.filter(term_id="209901", linked_fetched=True).values_list("course_reference_number", flat=True)),
+            set(term.linked_crns),
+        )
+
+
+    def test_update_from_api(self):
+
+        term = SyntheticTerm.generate("209901", courses=10, seed=1)
+        server = FakeMyCampusServer([term])
+        server.start()
+        self.addCleanup(server.stop)
+
+        # Sections are saved even if cache warming cannot be queued
+        stdout = io.StringIO()
+        with (
+            override_settings(MYCAMPUS_BASE_URL=server.base_url),
+            mock.patch.object(updatesections, "warm_cache_task") as warm_cache_task,
+        ):
+            warm_cache_task.delay.side_effect = ConnectionError("The broker is unavailable")
+            call_command("updatesections", "209901", jsessionid="jsessionid", workers=2, stdout=stdout)
+        warm_cache_task.delay.assert_called_once_with("209901", 2)
+        self.assertIn("Failed to queue cache warming: The broker is unavailable", stdout.getvalue())
+        self.assertEqual(Section.objects.filter(term_id="209901").count(), len(term.sections))
+        self.assertTrue(os.path.exists(updatesections.get_linked_snapshot_path("209901")))
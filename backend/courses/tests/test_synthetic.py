@@ -0,0 +1,82 @@
+import requests
+from django.test import TestCase, override_settings
+
+from courses import api
+from courses.models import Meeting
+from courses.fakeserver import FakeMyCampusServer
+from courses.synthetic import SyntheticTerm
+from courses.management.commands.updatesections import iter_all_sections, get_primary_section_crns
+
+
+class TestSyntheticTerm(TestCase):
+
+    def test_generate(self):
+
+        term = SyntheticTerm.generate("209901", courses=50, seed=1)
+        self.assertEqual(len({section["subjectCourse"] for section in term.sections}), 50)
+        self.assertEqual(
+            [section["id"] for section in term.sections], 
+            [section["id"] for section in SyntheticTerm.generate("209901", courses=50, seed=1).sections]
+        )
+
+        # Linked sections are the non-primary sections of their course
+        primary_crns = get_primary_section_crns(term.sections)
+        for crn, groups in term.linked_crns.items():
+            self.assertIn(crn, primary_crns)
+            for group in groups:
+                self.assertNotIn(group[0], primary_crns)
+
+        # Sections can be saved like real data
+        for section in term.sections[:10]:
+            Meeting.from_meetings_faculty(section["id"], section["meetingsFaculty"])
+
+
+    def test_enrollment_info(self):
+
+        term = SyntheticTerm.generate("209901", courses=5, volatility=1.0)
+        info = term.get_enrollment_info("10000")
+        self.assertEqual(info["seatsAvailable"], info["maximumEnrollment"] - info["enrollment"])
+        self.assertEqual(info["waitAvailable"], info["waitCapacity"] - info["waitCount"])
+
+
+class TestFakeMyCampusServer(TestCase):
+
+    def setUp(self) -> None:
+        self.term = SyntheticTerm.generate("209901", courses=30)
+        self.server = FakeMyCampusServer([self.term])
+        self.server.start()
+        self.settings = override_settings(MYCAMPUS_BASE_URL=self.server.base_url)
+        self.settings.enable()
+
+    def tearDown(self) -> None:
+        self.settings.disable()
+        self.server.stop()
+
+
+    def test_api(self):
+
+        sections = list(iter_all_sections("209901", "jsessionid"))
+        self.assertEqual(sections, self.term.sections)
+
+        crn = next(iter(self.term.linked_crns))
+        linked_sections = api.get_linked_sections("209901", crn)
+        self.assertEqual(
+            [[section["courseReferenceNumber"] for section in group] for group in linked_sections["linkedData"]],
+            self.term.linked_crns[crn]
+        )
+
+        enrollment_info = api.get_enrollment_info("209901", crn)
+        self.assertEqual(set(enrollment_info), {
+            "enrollment", "maximumEnrollment", "seatsAvailable", "waitCapacity", "waitCount", "waitAvailable"
+        })
+        self.assertNotIn(None, enrollment_info.values())
+
+        courses = api.search_course_codes(self.term.sections[0]["subjectCourse"], "209901")
+        self.assertEqual(courses[0]["code"], self.term.sections[0]["subjectCourse"])
+
+
+    def test_errors(self):
+
+        self.server.error_rate = 1.0
+        with self.assertRaises(requests.HTTPError):
+            api.get_enrollment_info("209901", "10000")
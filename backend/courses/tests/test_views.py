@@ -1,8 +1,30 @@
+import json
+from unittest.mock import patch
+
 from django.urls import reverse
 from django.core.management import call_command
 from rest_framework.test import APITestCase
 
-from courses.models import Term
+from config.testing import make_course, make_sections
+from courses.models import Course, Term, EnrollmentSnapshot
+from courses.search import invalidate_search_index
+from courses.versioning import bump_data_version
+
+
+def create_sections() -> None:
+    term = Term.objects.create(term="209901")
+    course = Course.objects.create(
+        subject="MATH", subject_description="Mathematics", subject_course="MATH1010U",
+        course_title="Calculus I", course_number="1010U",
+    )
+    meetings_faculty = [
+        {"meetingTime": {
+            "beginTime": "1240", "endTime": "1400", "startDate": "09/05/2023", "endDate": "12/04/2023",
+            "monday": False, "tuesday": True, "wednesday": False, "thursday": False, 
+            "friday": True, "saturday": False, "sunday": False,
+        }},
+    ]
+    make_sections(term, course, 3, meetings_faculty=meetings_faculty)
 
 
 class TestTermsView(APITestCase):
@@ -73,4 +95,209 @@ class TestCoursesView(APITestCase):
 
         response = self.client.get(url, {"term": "202401", "search": "Discrete Math"})
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.data), 0)
\ No newline at end of file
+        self.assertEqual(len(response.data), 0)
+
+
+class TestCourseSearch(APITestCase):
+
+    def setUp(self) -> None:
+        term = Term.objects.create(term="209901")
+        Term.objects.create(term="209909")
+        courses = [
+            ("MATH", "1010U", "Calculus I"),
+            ("MATH", "2050U", "Linear Algebra"),
+            ("MATH", "2080U", "Discrete Mathematics"),
+            ("CSCI", "2110U", "Discrete Mathematics for Computer Science"),
+            ("BIOL", "1000U", "Biology I"),
+        ]
+        for subject, number, title in courses:
+            course = Course.objects.create(
+                subject=subject, subject_description=subject, subject_course=subject + number,
+                course_title=title, course_number=number,
+            )
+            if number != "1000U":
+                course.terms.add(term)
+        invalidate_search_index()
+
+    def test_search(self):
+
+        url = reverse("courses")
+
+        response = self.client.get(url, {"term": "209901", "search": "math"})
+        self.assertEqual(
+            [course["subject_course"] for course in response.data], 
+            ["MATH1010U", "MATH2050U", "MATH2080U", "CSCI2110U"]
+        )
+
+        response = self.client.get(url, {"term": "209901", "search": "math 20"})
+        self.assertEqual(
+            [course["subject_course"] for course in response.data], 
+            ["MATH2050U", "MATH2080U"]
+        )
+
+        response = self.client.get(url, {"term": "209901", "search": "Discrete Math"})
+        self.assertEqual(len(response.data), 2)
+
+        response = self.client.get(url, {"term": "209909"})
+        self.assertEqual(len(response.data), 0)
+
+        response = self.client.get(url, {"search": "biol"})
+        self.assertEqual(len(response.data), 1)
+
+        # New data is picked up once the index is invalidated
+        Course.objects.filter(subject_course="BIOL1000U").first().terms.add("209901")
+        invalidate_search_index()
+        response = self.client.get(url, {"term": "209901", "search": "biol"})
+        self.assertEqual(len(response.data), 1)
+
+
+class TestSectionsView(APITestCase):
+
+    def setUp(self) -> None:
+        create_sections()
+
+    def test_sections_view(self):
+
+        url = reverse("sections", kwargs={"course": "MATH1010U"})
+
+        # Data version, sections and meetings
+        with self.assertNumQueries(3):
+            response = self.client.get(url, {"term": "209901"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 3)
+        self.assertEqual(response.data[0]["meeting_times"], [{
+            "begin_time": "1240",
+            "end_time": "1400",
+            "start_date": "09/05/2023",
+            "end_date": "12/04/2023",
+            "days": ["tuesday", "friday"],
+        }])
+
+
+class TestBatchSectionsView(APITestCase):
+
+    def setUp(self) -> None:
+        create_sections()
+
+    def test_batch_sections_view(self):
+
+        url = reverse("batch-sections")
+
+        # Data version, sections and meetings
+        with self.assertNumQueries(3):
+            response = self.client.get(url, {"term": "209901", "courses": "MATH1010U,CSCI1030U"})
+            data = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(data.keys()), ["MATH1010U", "CSCI1030U"])
+        self.assertEqual(len(data["MATH1010U"]), 3)
+        self.assertEqual(data["MATH1010U"][0]["meeting_times"][0]["days"], ["tuesday", "friday"])
+        self.assertEqual(data["CSCI1030U"], [])
+
+        response = self.client.get(url, {"term": "209901", "courses": "MATH1010U"}, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(url, {"term": "209901"})
+        self.assertEqual(response.status_code, 400)
+
+
+class TestConditionalRequests(APITestCase):
+
+    def setUp(self) -> None:
+        Term.objects.create(term="209901")
+
+    def test_conditional_requests(self):
+
+        url = reverse("terms")
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("public", response["Cache-Control"])
+        etag = response["ETag"]
+
+        # Unchanged data is not sent again
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # Different parameters have their own ETag
+        response = self.client.get(url, {"registration_open": "true"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        # Ingesting new data changes the ETag
+        bump_data_version("209901")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+        # Cached responses are served without querying the terms again
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data), 1)
+
+
+    def test_model_changes(self):
+
+        url = reverse("sections", kwargs={"course": "MATH1010U"})
+        term = Term.objects.get(term="209901")
+        course = make_course("MATH", "1010U")
+        course.terms.add(term)
+        section = make_sections(term, course, 1)[0]
+
+        # Sections and courses changed outside of updatesections change the ETag
+        etag = self.client.get(url, {"term": "209901"})["ETag"]
+        for change in (section.save, course.save, section.delete):
+            change()
+            response = self.client.get(url, {"term": "209901"}, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response["ETag"], etag)
+            etag = response["ETag"]
+
+
+
+class TestEnrollmentHistoryView(APITestCase):
+
+    def setUp(self) -> None:
+        create_sections()
+
+    def test_enrollment_history_view(self):
+
+        url = reverse("enrollment-history", kwargs={"section": 990000})
+        for seats_available in (2, 1, 0):
+            EnrollmentSnapshot.objects.create(
+                section_id=990000, created_at=f"2099-06-0{3 - seats_available}T12:00:00Z", seats_available=seats_available
+            )
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([snapshot["seats_available"] for snapshot in response.data["results"]], [2, 1, 0])
+        self.assertIsNone(response.data["next"])
+
+        response = self.client.get(url, {"since": "2099-06-02T00:00:00Z"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([snapshot["seats_available"] for snapshot in response.data["results"]], [1, 0])
+
+        for since in ("yesterday", "2024-13-45T00:00"):
+            response = self.client.get(url, {"since": since})
+            self.assertEqual(response.status_code, 400)
+
+        response = self.client.get(reverse("enrollment-history", kwargs={"section": 1}))
+        self.assertEqual(response.status_code, 404)
+
+
+    @patch("courses.views.EnrollmentHistoryPagination.page_size", 2)
+    def test_enrollment_history_pages(self):
+
+        url = reverse("enrollment-history", kwargs={"section": 990000})
+        for day in range(1, 6):
+            EnrollmentSnapshot.objects.create(section_id=990000, created_at=f"2099-06-0{day}T12:00:00Z", seats_available=day)
+
+        seats_available = []
+        response = self.client.get(url, {"since": "2099-06-02T00:00:00Z"})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data["results"]), 2)
+            seats_available.extend(snapshot["seats_available"] for snapshot in response.data["results"])
+            if response.data["next"] is None:
+                break
+            response = self.client.get(response.data["next"])
+        self.assertEqual(seats_available, [2, 3, 4, 5])
@@ -4,5 +4,7 @@ from . import views
 urlpatterns = [
     path("", views.CoursesView.as_view(), name="courses"),
     path("terms/", views.TermsView.as_view(), name="terms"),
+    path("sections/", views.BatchSectionsView.as_view(), name="batch-sections"),
+    path("sections/<int:section>/history/", views.EnrollmentHistoryView.as_view(), name="enrollment-history"),
     path("<str:course>/sections/", views.SectionsView.as_view(), name="sections"),
 ]
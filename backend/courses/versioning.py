@@ -0,0 +1,44 @@
+from datetime import datetime
+
+from django.db.models import Count, F, Max, Sum
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Course, Section, Term
+
+
+def get_data_version(term: str | None = None) -> tuple[str, datetime | None]:
+    """
+    Return a version token and the last modification time for the course data of a term.
+    
+    If no term is given, the version covers all terms.
+    """
+    terms = Term.objects.all() if term is None else Term.objects.filter(term=term)
+    result = terms.aggregate(count=Count("term"), version=Sum("data_version"), updated_at=Max("updated_at"))
+    updated_at = result["updated_at"]
+    token = f"{result['count']}.{result['version']}.{updated_at.timestamp() if updated_at else None}"
+    return token, updated_at
+
+
+def bump_data_version(term: str) -> None:
+    """Mark the course data for a term as changed e.g. after ingesting new sections."""
+    Term.objects.filter(term=term).update(
+        data_version=F("data_version") + 1, updated_at=timezone.now()
+    )
+
+
+# Bulk changes (e.g. by updatesections) don't send signals, so they bump the version themselves
+
+@receiver(post_save, sender=Section)
+@receiver(post_delete, sender=Section)
+def section_changed(sender, instance: Section, **kwargs) -> None:
+    bump_data_version(instance.term_id)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def course_changed(sender, instance: Course, **kwargs) -> None:
+    # A deleted course's terms are no longer recorded, so every term is bumped
+    terms = Term.objects.filter(courses=instance) if kwargs["signal"] is post_save else Term.objects.all()
+    terms.update(data_version=F("data_version") + 1, updated_at=timezone.now())
@@ -1,16 +1,70 @@
+import json
+import hashlib
+
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_datetime
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, urlencode
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.exceptions import APIException
+from rest_framework.exceptions import APIException, ParseError
 from rest_framework import status
 from rest_framework import generics
-from rest_framework import filters
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.encoders import JSONEncoder
 import django_filters.rest_framework
 
-from .models import Term, Course, Section
-from .serializers import TermSerializer, CourseSerializer, SectionSerializer
+from .models import Term, Course, Section, EnrollmentSnapshot
+from .serializers import TermSerializer, CourseSerializer, SectionSerializer, EnrollmentSnapshotSerializer
+from .search import search_courses
+from .versioning import get_data_version
+
+
+class VersionedCacheMixin:
+    """
+    Cache list responses by the version of the underlying course data.
+
+    Responses carry an ETag, a Last-Modified time and public Cache-Control headers, 
+    and conditional requests for unchanged data are answered with a 304.
+    """
+
+    cache_max_age = 60 * 5
+    cache_timeout = 60 * 60 * 24
+
+    def get_data_version_term(self) -> str | None:
+        return self.request.query_params.get("term") or None
+
+    def get_versioned_cache_key(self, request) -> tuple[str, str, int | None]:
+        """Return the cache key, ETag and Last-Modified time for the current data version."""
+        version, last_modified = get_data_version(self.get_data_version_term())
+        params = urlencode(sorted(request.query_params.lists()), doseq=True)
+        key = hashlib.sha256(f"{request.path}?{params}#{version}".encode()).hexdigest()
+        return key, f'"{key[:32]}"', last_modified and int(last_modified.timestamp())
+
+    def patch_versioned_headers(self, response, etag: str, last_modified: int | None):
+        response["ETag"] = etag
+        if last_modified:
+            response["Last-Modified"] = http_date(last_modified)
+        patch_cache_control(response, public=True, max_age=self.cache_max_age)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        key, etag, last_modified = self.get_versioned_cache_key(request)
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            data = cache.get(f"response_{key}")
+            if data is None:
+                data = list(super().list(request, *args, **kwargs).data)
+                cache.set(f"response_{key}", data, timeout=self.cache_timeout)
+            response = Response(data)
+
+        return self.patch_versioned_headers(response, etag, last_modified)
 
 
-class TermsView(generics.ListAPIView):
+class TermsView(VersionedCacheMixin, generics.ListAPIView):
     queryset = Term.objects.all()
     serializer_class = TermSerializer
     filter_backends = [django_filters.rest_framework.DjangoFilterBackend]
@@ -18,22 +72,21 @@ class TermsView(generics.ListAPIView):
 
 
 class CoursesView(generics.ListAPIView):
+    """Search courses. Responses aren't cached, as free text queries are rarely repeated exactly."""
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
-    filter_backends = [filters.SearchFilter]
-    search_fields = ["subject_course", "course_title"]
     
 
-    def filter_queryset(self, queryset):
-        queryset = super().filter_queryset(queryset)
-        term = self.request.query_params.get("term")
-        if term:
-            queryset = queryset.filter(section__term__term=term).distinct()
-        queryset = queryset[:20]
-        return queryset
+    def list(self, request, *args, **kwargs):
+        courses = search_courses(
+            query=request.query_params.get("search", ""),
+            term=request.query_params.get("term") or None,
+            limit=20,
+        )
+        return Response(courses)
     
 
-class SectionsView(generics.ListAPIView):
+class SectionsView(VersionedCacheMixin, generics.ListAPIView):
     queryset = Section.objects.all()
     serializer_class = SectionSerializer
     filter_backends = [django_filters.rest_framework.DjangoFilterBackend]
@@ -42,7 +95,7 @@ class SectionsView(generics.ListAPIView):
     def get_queryset(self):
         return Section.objects.filter(
             course__subject_course=self.kwargs.get("course")
-        )
+        ).prefetch_related("meetings")
 
     def filter_queryset(self, queryset):
         queryset = super().filter_queryset(queryset)
@@ -50,3 +103,94 @@ class SectionsView(generics.ListAPIView):
         if term:
             queryset = queryset.filter(term__term=term)
         return queryset
+
+
+class EnrollmentHistoryPagination(CursorPagination):
+    """Pages through snapshots in the order they were recorded, using the (section, created_at) index."""
+    ordering = "created_at"
+    page_size = 500
+
+
+class EnrollmentHistoryView(generics.ListAPIView):
+    """Returns the recorded enrollment of a section over time, optionally `since` a datetime."""
+    serializer_class = EnrollmentSnapshotSerializer
+    pagination_class = EnrollmentHistoryPagination
+
+    def get_queryset(self):
+        section = get_object_or_404(Section, id=self.kwargs.get("section"))
+        queryset = EnrollmentSnapshot.objects.filter(section=section)
+        since = self.request.query_params.get("since")
+        if since:
+            try:
+                since = parse_datetime(since)
+            except ValueError:
+                # Well formatted but invalid datetimes e.g. 2024-13-45T00:00
+                since = None
+            if since is None:
+                raise ParseError("since must be an ISO 8601 datetime.")
+            queryset = queryset.filter(created_at__gte=since)
+        return queryset
+
+
+class BatchSectionsView(VersionedCacheMixin, APIView):
+    """List the sections of several courses in a term, grouped by course."""
+
+    max_courses = 20
+
+    def get(self, request, *args, **kwargs):
+
+        term = request.query_params.get("term")
+        course_codes = [
+            code for value in request.query_params.getlist("courses") for code in value.split(",") if code
+        ]
+
+        if not term:
+            return Response({"detail": "No term provided."}, status=status.HTTP_400_BAD_REQUEST)
+        if not course_codes:
+            return Response({"detail": "No courses provided."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(course_codes) > self.max_courses:
+            return Response({"detail": "Too many courses provided."}, status=status.HTTP_400_BAD_REQUEST)
+
+        key, etag, last_modified = self.get_versioned_cache_key(request)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            sections = Section.objects.filter(
+                term__term=term, course__subject_course__in=course_codes
+            ).prefetch_related("meetings")
+            response = StreamingHttpResponse(
+                stream_sections_by_course(sections, course_codes), content_type="application/json"
+            )
+
+        return self.patch_versioned_headers(response, etag, last_modified)
+
+
+def stream_sections_by_course(sections, course_codes: list[str]):
+    """Serialize sections as a JSON object of course codes to lists of sections, one section at a time."""
+
+    encoder = JSONEncoder()
+    remaining = dict.fromkeys(course_codes)
+    current = None
+
+    yield "{"
+
+    # Sections are ordered by course, so each course's sections are contiguous
+    for section in sections.iterator(chunk_size=500):
+        if section.course_id != current:
+            if current is not None:
+                yield "],"
+            current = section.course_id
+            remaining.pop(current, None)
+            yield f"{encoder.encode(current)}:["
+        else:
+            yield ","
+        yield encoder.encode(SectionSerializer(section).data)
+
+    if current is not None:
+        yield "]"
+
+    # Include requested courses without any sections
+    for course_code in remaining:
+        yield f"{',' if current is not None else ''}{encoder.encode(course_code)}:[]"
+        current = course_code
+
+    yield "}"
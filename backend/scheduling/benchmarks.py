@@ -0,0 +1,121 @@
+import time
+import random
+import statistics
+
+from django.db import transaction
+from django.db.models import Max
+
+from courses.models import Term, Section
+from courses.synthetic import SyntheticTerm
+from .scheduling import generate_schedules, SOLVERS
+from .exceptions import SchedulingException
+
+
+BENCHMARK_TERM = "999901"
+
+# Synthetic terms to schedule, from typical requests to harder ones
+SCENARIOS = {
+    "small": {"term": {"courses": 100}, "course_codes": 4},
+    "typical": {"term": {"courses": 500}, "course_codes": 5},
+    "linked": {"term": {"courses": 500, "linked_fraction": 1.0, "max_linked_sections": 8}, "course_codes": 5},
+    "dense": {"term": {"courses": 500, "meetings_per_section": 3}, "course_codes": 6},
+    "large": {"term": {"courses": 2000, "max_lectures": 5}, "course_codes": 8},
+}
+
+FILTERS = {"remove_downtown_classes": True, "remove_classes_before": "0810", "remove_classes_after": "2100"}
+PREFERENCES = {"more_free_days": True, "less_breaks_between_classes": True, "more_online_classes": True}
+
+# Phases of generate_schedules, in the order they run
+PHASES = ["load", "combinations", "filters", "bitmaps", "model", "solve", "expand", "score"]
+
+
+def run_benchmarks(scenarios: list[str] | None = None, solvers: list[str] | None = None, repeats: int = 3, time_limit: int = 1, max_solutions: int | None = 200, seed: int = 0) -> dict:
+    """
+    Time generate_schedules with each solver for each scenario.
+
+    Each scenario's term is saved in a transaction which is rolled back afterwards, with section
+    ids above any existing section so that no real section is overwritten (or locked) meanwhile.
+    Results hold the median seconds spent in each phase and in total.
+    """
+
+    if Term.objects.filter(term=BENCHMARK_TERM).exists():
+        raise ValueError(f"The benchmark term {BENCHMARK_TERM} already exists")
+
+    results = {}
+    for name in scenarios or SCENARIOS:
+        scenario = SCENARIOS[name]
+        results[name] = {}
+
+        with transaction.atomic():
+            first_id = (Section.objects.aggregate(Max("id"))["id__max"] or 0) + 1
+            term = SyntheticTerm.generate(BENCHMARK_TERM, seed=seed, first_id=first_id, **scenario["term"])
+            term.save()
+            course_codes = sorted(random.Random(seed).sample(
+                sorted({section["subjectCourse"] for section in term.sections}), scenario["course_codes"]
+            ))
+
+            for solver in solvers or SOLVERS:
+                runs = [
+                    run_benchmark(course_codes, solver, time_limit, max_solutions) for _ in range(repeats)
+                ]
+                results[name][solver] = {
+                    "course_codes": course_codes,
+                    "sections": len(term.sections),
+                    "schedules": runs[-1]["schedules"],
+                    "error": runs[-1]["error"],
+                    "timings": {
+                        phase: statistics.median(run["timings"].get(phase, 0.0) for run in runs)
+                        for phase in PHASES + ["total"]
+                    },
+                }
+
+            transaction.set_rollback(True)
+
+    return results
+
+
+def run_benchmark(course_codes: list[str], solver: str, time_limit: int, max_solutions: int | None) -> dict:
+    """Time a single call to generate_schedules."""
+
+    timings = {}
+    error = None
+    schedules = []
+
+    start = time.perf_counter()
+    try:
+        schedules = generate_schedules(
+            BENCHMARK_TERM, course_codes, num_schedules=3, time_limit=time_limit, max_solutions=max_solutions,
+            filters=FILTERS, preferences=PREFERENCES, solver=solver, timings=timings,
+        )
+    except SchedulingException as e:
+        error = e.message
+    timings["total"] = time.perf_counter() - start
+
+    # Solving includes building the model, which is reported separately
+    if "model" in timings:
+        timings["solve"] -= timings["model"]
+
+    return {"timings": timings, "schedules": len(schedules), "error": error}
+
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float = 0.25, min_seconds: float = 0.005) -> list[str]:
+    """
+    List the phases that are slower than the baseline by more than a `tolerance` fraction.
+
+    Phases which take less than `min_seconds` in both runs are too noisy to compare.
+    """
+
+    regressions = []
+    for name, solvers in results.items():
+        for solver, result in solvers.items():
+            baseline_timings = baseline.get(name, {}).get(solver, {}).get("timings", {})
+            for phase, seconds in result["timings"].items():
+                if phase not in baseline_timings:
+                    continue
+                if max(seconds, baseline_timings[phase]) < min_seconds:
+                    continue
+                if seconds > baseline_timings[phase] * (1 + tolerance):
+                    regressions.append(
+                        f"{name}/{solver}/{phase}: {seconds:.4f}s (baseline {baseline_timings[phase]:.4f}s)"
+                    )
+    return regressions
@@ -1,33 +1,57 @@
 from collections import defaultdict
 from courses.time_bitmap import TimeBitmap
+from courses import cache as section_cache
 from courses.models import Section
 
 
+# Limits for fetching enrollment info when removing closed sections
+ENROLLMENT_FETCH_WORKERS = 8
+ENROLLMENT_FETCH_TIMEOUT = 5
+
+
 def apply_filters(options: dict, filters: dict, sections: dict[str, Section]) -> dict:
     """Apply filters to the given course options."""
 
     filtered = defaultdict(list)
-    memo = dict()
+
+    # Gather every candidate CRN, so that each section is only evaluated once
+    crns = {
+        crn 
+        for section_combinations in options.values() 
+        for combination in section_combinations 
+        for crn in combination
+    }
+    memo = {
+        crn: is_section_filtered(sections[crn], filters) for crn in crns
+    }
+
+    # Check the remaining sections for open seats in a single batch
+    if filters.get("remove_closed_sections", False):
+        remaining = [sections[crn] for crn in crns if not memo[crn]]
+        enrollment_infos = section_cache.get_enrollment_infos(
+            remaining, max_workers=ENROLLMENT_FETCH_WORKERS, timeout=ENROLLMENT_FETCH_TIMEOUT
+        )
+        for section in remaining:
+            # Keep sections whose enrollment info could not be retrieved in time
+            if section.id in enrollment_infos:
+                memo[section.course_reference_number] = is_section_closed(
+                    section, enrollment_infos[section.id]
+                )
 
     for course_code, section_combinations in options.items():
         for combination in section_combinations:
-            for crn in combination:
-                
-                if crn not in memo:
-                    section = sections[crn]
-                    memo[crn] = is_section_filtered(section, filters)
-                
-                if memo[crn]:
-                    break
-
-            else:
+            if not any(memo[crn] for crn in combination):
                 filtered[course_code].append(combination)
 
     return filtered
 
 
 def is_section_filtered(section: Section, filters: dict) -> bool:
-    """Returns True if the section should be filtered out."""
+    """
+    Returns True if the section should be filtered out.
+    
+    Closed sections are handled separately by `apply_filters`, so that enrollment info can be fetched in bulk.
+    """
     
     # Evaluate filters (from the least to the most expensive to compute)
     if filters.get("remove_downtown_classes", False):
@@ -39,16 +63,14 @@ def is_section_filtered(section: Section, filters: dict) -> bool:
     if "remove_classes_after" in filters:
         if is_section_after(section, filters["remove_classes_after"]):
             return True
-    if filters.get("remove_closed_sections", False):
-        if is_section_closed(section):
-            return True
         
     return False
 
 
-def is_section_closed(section: Section) -> bool:
+def is_section_closed(section: Section, enrollment_info: dict | None = None) -> bool:
     """Returns True if the section is closed."""
-    enrollment_info = section.get_enrollment_info()
+    if enrollment_info is None:
+        enrollment_info = section.get_enrollment_info()
     if enrollment_info["seatsAvailable"] is None:
         return True
     return enrollment_info["seatsAvailable"] <= 0
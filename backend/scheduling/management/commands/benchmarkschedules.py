@@ -0,0 +1,60 @@
+import json
+import platform
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from scheduling.benchmarks import SCENARIOS, PHASES, run_benchmarks, compare_to_baseline
+from scheduling.scheduling import SOLVERS
+
+
+class Command(BaseCommand):
+    help = "Time schedule generation on synthetic terms, optionally checking for regressions against a baseline"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="The scenarios to run (default: all)")
+        parser.add_argument("--solver", action="append", choices=SOLVERS, help="The solvers to run (default: all)")
+        parser.add_argument("--repeats", type=int, default=3, help="The number of runs to take the median of")
+        parser.add_argument("--time-limit", type=int, default=1, help="The time limit for each solver in seconds")
+        parser.add_argument("--max-solutions", type=int, default=200, help="The maximum number of solutions for each solver")
+        parser.add_argument("--seed", type=int, default=0, help="The seed for synthetic terms")
+        parser.add_argument("--output", type=str, help="A file to write the results to as JSON")
+        parser.add_argument("--baseline", type=str, help="A JSON file of earlier results to compare against")
+        parser.add_argument("--tolerance", type=float, default=0.25, help="The fraction by which a phase may be slower than the baseline")
+
+    def handle(self, *args, **options):
+
+        results = run_benchmarks(
+            scenarios=options["scenario"], solvers=options["solver"], repeats=options["repeats"],
+            time_limit=options["time_limit"], max_solutions=options["max_solutions"], seed=options["seed"],
+        )
+
+        # Print the median time of each phase in milliseconds
+        self.stdout.write(f"{'scenario':<10} {'solver':<8} {'schedules':>9} " + " ".join(f"{phase:>12}" for phase in PHASES + ["total"]))
+        for name, solvers in results.items():
+            for solver, result in solvers.items():
+                timings = " ".join(f"{result['timings'][phase] * 1000:>12.2f}" for phase in PHASES + ["total"])
+                self.stdout.write(f"{name:<10} {solver:<8} {result['schedules']:>9} {timings}")
+                if result["error"]:
+                    self.stdout.write(self.style.WARNING(f"  {result['error']}"))
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump({
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "options": {key: options[key] for key in ("repeats", "time_limit", "max_solutions", "seed")},
+                    "results": results,
+                }, f, indent=2)
+
+        if options["baseline"]:
+            try:
+                with open(options["baseline"], "r", encoding="utf-8") as f:
+                    baseline = json.load(f)["results"]
+            except (FileNotFoundError, KeyError, json.JSONDecodeError) as e:
+                raise CommandError(f"Failed to read baseline: {e}")
+            regressions = compare_to_baseline(results, baseline, tolerance=options["tolerance"])
+            if regressions:
+                raise CommandError("Regressions found:\n" + "\n".join(regressions))
+            self.stdout.write(self.style.SUCCESS("No regressions found"))
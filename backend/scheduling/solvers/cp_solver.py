@@ -3,11 +3,31 @@ import itertools
 from ortools.sat.python import cp_model
 
 from courses.time_bitmap import TimeBitmap
+from scheduling.timing import record_time
 
 
-def get_valid_time_assignments(course_codes: list[str], combinations: dict[str, set[TimeBitmap]], time_limit: int = None, max_solutions: int = None):
+def get_valid_time_assignments(course_codes: list[str], combinations: dict[str, set[TimeBitmap]], time_limit: int = None, max_solutions: int = None, timings: dict[str, float] | None = None):
     """Generate valid schedules using constraint programming."""
 
+    with record_time(timings, "model"):
+        model, variables = build_model(course_codes, combinations)
+
+    # Set up the solver
+    solver = cp_model.CpSolver()
+    solver.parameters.enumerate_all_solutions = True
+    if time_limit is not None:
+        solver.parameters.max_time_in_seconds = time_limit
+    callback = SolverCallback(variables, max_solutions)
+
+    # Solve the model
+    status = solver.solve(model, callback)
+
+    return callback.solutions
+
+
+def build_model(course_codes: list[str], combinations: dict[str, set[TimeBitmap]]) -> tuple[cp_model.CpModel, dict]:
+    """Build a model choosing one option for each course, without conflicts."""
+
     model = cp_model.CpModel()
 
     # Create a variable for each assignment of a course to a section
@@ -33,17 +53,7 @@ def get_valid_time_assignments(course_codes: list[str], combinations: dict[str,
 
     model.validate()
 
-    # Set up the solver
-    solver = cp_model.CpSolver()
-    solver.parameters.enumerate_all_solutions = True
-    if time_limit is not None:
-        solver.parameters.max_time_in_seconds = time_limit
-    callback = SolverCallback(variables, max_solutions)
-
-    # Solve the model
-    status = solver.solve(model, callback)
-
-    return callback.solutions
+    return model, variables
 
 
 class SolverCallback(cp_model.CpSolverSolutionCallback):
@@ -0,0 +1,52 @@
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from config.testing import make_course, make_sections
+from courses.models import Term, Section
+from courses.synthetic import SyntheticTerm
+from scheduling.benchmarks import BENCHMARK_TERM, run_benchmarks, compare_to_baseline, PHASES
+
+
+class TestBenchmarks(TestCase):
+
+    def test_run_benchmarks(self):
+
+        results = run_benchmarks(["small"], ["cp"], repeats=1, time_limit=1, max_solutions=5)
+        result = results["small"]["cp"]
+        self.assertEqual(len(result["course_codes"]), 4)
+        self.assertEqual(set(result["timings"]), set(PHASES + ["total"]))
+        self.assertGreater(result["timings"]["total"], 0)
+
+        # The synthetic term is rolled back
+        self.assertEqual(Section.objects.count(), 0)
+
+
+    def test_existing_sections(self):
+
+        # Synthetic sections are numbered after existing sections, which are left alone
+        term = Term.objects.create(term="209901", term_desc="Test Term")
+        section = make_sections(term, make_course(), 1)[0]
+        Section.objects.filter(id=section.id).update(id=100000)
+
+        with patch("scheduling.benchmarks.SyntheticTerm.generate", wraps=SyntheticTerm.generate) as generate:
+            run_benchmarks(["small"], ["cp"], repeats=1, time_limit=1, max_solutions=5)
+        self.assertEqual(generate.call_args.kwargs["first_id"], 100001)
+        self.assertEqual(list(Section.objects.values_list("id", "term_id")), [(100000, "209901")])
+
+        Term.objects.create(term=BENCHMARK_TERM, term_desc="Benchmark Term")
+        with self.assertRaises(ValueError):
+            run_benchmarks(["small"], ["cp"], repeats=1)
+
+
+    def test_compare_to_baseline(self):
+
+        baseline = {"small": {"cp": {"timings": {"load": 0.1, "solve": 0.2, "score": 0.001}}}}
+        results = {"small": {"cp": {"timings": {"load": 0.11, "solve": 0.4, "score": 0.003, "model": 1.0}}}}
+
+        regressions = compare_to_baseline(results, baseline)
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith("small/cp/solve"))
+
+        self.assertEqual(compare_to_baseline(results, baseline, tolerance=1.5), [])
+        self.assertEqual(compare_to_baseline(results, {}), [])
@@ -1,9 +1,14 @@
+from unittest import mock
+
 from django.test import TestCase
+from django.core.cache import cache
 from django.core.management import call_command
 
-from courses.models import Section
+from courses import cache as section_cache
+from config.testing import make_course, make_sections
+from courses.models import Term, Section
 from scheduling.scheduling import get_valid_section_combinations, generate_schedules, get_sections
-from scheduling.filtering import is_section_downtown, is_section_before, is_section_after, is_section_closed
+from scheduling.filtering import apply_filters, is_section_downtown, is_section_before, is_section_after, is_section_closed
 from scheduling.scoring import count_days_with_scheduled_classes, count_breaks_between_classes, count_online_classes
 
 
@@ -89,6 +94,41 @@ class TestFiltering(TestCase):
         self.assertTrue(is_section_closed(section))
 
 
+class TestApplyFilters(TestCase):
+
+    def setUp(self) -> None:
+        term = Term.objects.create(term="209901", term_desc="Test Term")
+        self.sections = {
+            section.course_reference_number: section for section in make_sections(term, make_course(), 3)
+        }
+        cache.delete_many([f"enrollment_info_{section.id}" for section in self.sections.values()])
+        section_cache.local_cache.clear()
+
+
+    def test_remove_closed_sections(self):
+
+        # One open section is cached, the others must be fetched
+        cache.set(f"enrollment_info_{self.sections['90000'].id}", {"seatsAvailable": 5})
+        enrollment_infos = {
+            "90001": {"seatsAvailable": 0},
+            "90002": {"seatsAvailable": None},
+        }
+        options = {"TEST1000U": [["90000"], ["90001"], ["90002"]]}
+
+        with mock.patch("courses.api.get_enrollment_info", side_effect=lambda term, crn, timeout=None: enrollment_infos[crn]) as fetch:
+            filtered = apply_filters(options, {"remove_closed_sections": True}, self.sections)
+
+        self.assertEqual(fetch.call_count, 2)
+        self.assertEqual(filtered["TEST1000U"], [["90000"]])
+
+        # Sections that could not be fetched are kept
+        cache.delete(f"enrollment_info_{self.sections['90001'].id}")
+        section_cache.local_cache.delete(f"enrollment_info_{self.sections['90001'].id}")
+        with mock.patch("courses.api.get_enrollment_info", side_effect=Exception):
+            filtered = apply_filters(options, {"remove_closed_sections": True}, self.sections)
+        self.assertEqual(filtered["TEST1000U"], [["90000"], ["90001"]])
+
+
 class TestScoring(TestCase):
 
     def setUp(self) -> None:
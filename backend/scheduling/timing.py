@@ -0,0 +1,24 @@
+import time
+from contextlib import contextmanager
+
+from config import metrics
+
+
+@contextmanager
+def record_time(timings: dict[str, float] | None, phase: str):
+    """
+    Add the time spent in a block to `timings[phase]`, if timings are being recorded.
+
+    The time is also exported as the `scheduling_phase_seconds` metric when metrics are enabled.
+    """
+    if timings is None and not metrics.is_enabled():
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        if timings is not None:
+            timings[phase] = timings.get(phase, 0.0) + seconds
+        metrics.observe("scheduling_phase_seconds", seconds, phase=phase)
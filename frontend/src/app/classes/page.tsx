@@ -9,9 +9,9 @@ import { Header } from "@/components/shared/header"
 import { Footer } from "@/components/shared/footer"
 import { SectionsDialog } from "@/components/classes/sections-dialog"
 import { InfoIcon, Loader } from "lucide-react"
-import { useState, useEffect, useMemo } from "react"
+import { useState, useEffect, useMemo, useRef } from "react"
 import type { Term, Course, Section } from "@/types"
-import { listTerms, listCourses } from "@/services/courses"
+import { listTerms, listCourses, listSectionsForCourses } from "@/services/courses"
 import { debounce } from "lodash"
 import { SearchBar } from "@/components/shared/search-bar"
 
@@ -95,14 +95,17 @@ function SearchResults({
 }) {
 
   const [courses, setCourses] = useState<Course[]>([])
+  const [sections, setSections] = useState<Record<Course["subject_course"], Section[]>>({})
   const [loading, setLoading] = useState(false)
   const [debouncedQuery, setDebouncedQuery] = useState<string>("")
   const [debouncedTerm, setDebouncedTerm] = useState<Term | undefined>()
+  const latestSearch = useRef(0)
 
 
   const debouncedSearch = useMemo(() => {
 
     function handleSearch(query: string, term: Term | undefined) {
+      const search = ++latestSearch.current
       setDebouncedQuery(query)
       setDebouncedTerm(term)
   
@@ -110,9 +113,23 @@ function SearchResults({
   
         setLoading(true)
   
+        setSections({})
         listCourses(term.term, query)
         .then(response => {
           setCourses(response.data)
+          // Fetch the sections of every result at once, rather than as each course is opened
+          if (response.data.length > 0) {
+            listSectionsForCourses(response.data.map(course => course.subject_course), term.term)
+            .then(response => {
+              // Sections for an earlier search (possibly in another term) are ignored
+              if (search === latestSearch.current) {
+                setSections(response.data)
+              }
+            })
+            .catch(error => {
+              console.error(error)
+            })
+          }
         })
         .catch(error => {
           console.error(error)
@@ -122,6 +139,7 @@ function SearchResults({
         })
       } else {
         setCourses([])
+        setSections({})
       }
     }
 
@@ -154,6 +172,7 @@ function SearchResults({
               key={course.subject_course}
               term={debouncedTerm}
               course={course}
+              prefetchedSections={sections[course.subject_course]}
               selectedSections={selectedSections}
               setSelectedSections={setSelectedSections}
             />
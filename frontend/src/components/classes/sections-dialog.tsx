@@ -16,30 +16,34 @@ import { listSections } from "@/services/courses"
 export function SectionsDialog({
   term,
   course, 
+  prefetchedSections,
   selectedSections,
   setSelectedSections
 } : {
   term: Term,
   course: Course,
+  prefetchedSections?: Section[],
   selectedSections: Set<Section["id"]>,
   setSelectedSections: (sections: Set<Section["id"]>) => void
 }) {
 
   const [confirmationDialogOpen, setConfirmationDialogOpen] = useState(false)
   const [open, setOpen] = useState(false)
-  const [sections, setSections] = useState<Section[]>([])
+  const [fetchedSections, setFetchedSections] = useState<Section[]>([])
+  const sections = prefetchedSections ?? fetchedSections
 
+  // Sections are only fetched for this course if they weren't fetched with the search results
   useEffect(() => {
-    if (open && sections.length === 0) {
+    if (open && prefetchedSections === undefined && fetchedSections.length === 0) {
       listSections(course.subject_course, term.term)
       .then(response => {
-        setSections(response.data)
+        setFetchedSections(response.data)
       })
       .catch(error => {
         console.error(error)
       })
     }
-  }, [open, course, term, sections.length])
+  }, [open, course, term, prefetchedSections, fetchedSections.length])
   
   function handleOpenChange(open: boolean) {
     setOpen(open)
@@ -21,4 +21,11 @@ export async function listSections(course: string, term?: string) {
   return await instance.get<Section[]>(`courses/${course}/sections/`, {
     params: { term },
   });
-}
\ No newline at end of file
+}
+
+
+export async function listSectionsForCourses(courses: string[], term: string) {
+  return await instance.get<Record<Course["subject_course"], Section[]>>("courses/sections/", {
+    params: { term, courses: courses.join(",") },
+  });
+}